@@ -2,4 +2,17 @@
 class ProgramSettings:
     DEFAULT_CRYPT_KEY = "?l4![e_-_~:[C8oZO#Y3K,z53Mb$#2x6"  # Used for db table 'saves'
     DATABASE_PATH = "app_database.db"                       # Name of the database
-    CRYPT_KEY = DEFAULT_CRYPT_KEY                           # Set to the default crypt key to avoid errors with empty crypt_key while initilization
\ No newline at end of file
+    CRYPT_KEY = DEFAULT_CRYPT_KEY                           # Set to the default crypt key to avoid errors with empty crypt_key while initilization
+    KDF_ALGORITHM = "scrypt"                                # Key derivation function for the user password: "scrypt" or "pbkdf2-sha256"
+    KDF_TARGET_SECONDS = 0.3                                # Wanted duration of the key derivation on unlock, used to calibrate the KDF cost
+    PLAINTEXT_CACHE_SIZE = 32                               # Max number of decrypted passwords kept in memory
+    PLAINTEXT_CACHE_TTL_SECONDS = 60                        # Time after which a decrypted password is removed from memory
+    RECRYPT_PROCESSES = None                                # Worker processes for re-encrypting large vaults, None for one per CPU core
+    RECRYPT_PROCESS_MIN_VALUES = 50000                      # Re-encrypt smaller vaults with threads, starting processes would cost more than it saves
+    DB_BUSY_TIMEOUT_SECONDS = 5.0                           # Time a write waits for the write lock of another connection (e.g. second program instance)
+    DB_SYNCHRONOUS = "NORMAL"                               # SQLite synchronous level: "NORMAL" is crash-safe with WAL, "FULL" also survives power loss
+    ASYNC_DB_READ_THREADS = 4                               # Threads of AsyncDBManager for concurrent lookups (writes use one thread)
+    AGENT_SOCKET_PATH = "app_agent.sock"                    # Unix domain socket of the vault agent (agent.py)
+    AGENT_IDLE_LOCK_SECONDS = 300                           # The vault agent locks the vault after this time without requests
+    BREACHED_PASSWORDS_PATH = "breached_passwords.bin"      # Optional list of breached passwords (see BreachedPasswords.Convert)
+    PASSPHRASE_WORDLIST_PATH = "passphrase_words.bin"      # Optional large word list for passphrases (see Wordlist.Convert), else the bundled one
@@ -0,0 +1,150 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable
+
+from Backend.Utils.DBManager import DBManager
+from Backend.ProgramSettings import ProgramSettings
+
+
+class AsyncDBManager:
+    """
+    asyncio facade of a DBManager.
+
+    Mirrors the tableValues_* / tableSaves_* methods as coroutines. The SQLite work never runs
+    on the event loop thread:
+    - Lookups run on a pool of reader threads (ProgramSettings.ASYNC_DB_READ_THREADS). Every thread
+      has its own read-only connection (see DBManager.read_connection), so lookups run concurrently.
+    - Writes run on a single writer thread, so they are applied one after the other.
+
+    Usage:
+        async with AsyncDBManager(db) as async_db:
+            key = await async_db.tableValues_GetValue("SiteA")
+    """
+
+    def __init__(self, db: DBManager):
+        """
+        Initializes the facade and its threads.
+
+        Args:
+            db (DBManager): The database manager all calls are delegated to.
+        """
+        self.db = db
+        self._read_executor = ThreadPoolExecutor(max_workers=ProgramSettings.ASYNC_DB_READ_THREADS,
+                                                 thread_name_prefix="AsyncDBManager-read")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AsyncDBManager-write")
+
+    async def __aenter__(self) -> "AsyncDBManager":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        # Close waits for the queued calls, so it must not run on the event loop thread
+        await asyncio.get_running_loop().run_in_executor(None, self.Close)
+
+    def Close(self):
+        """
+        Waits for running calls and stops the threads. The DBManager itself stays open.
+        Blocks until the queued calls are done, 'async with' runs it off the event loop thread.
+        """
+        self._read_executor.shutdown(wait=True)
+        self._write_executor.shutdown(wait=True)
+
+    async def _Read(self, function: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, partial(function, *args))
+
+    async def _Write(self, function: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._write_executor, partial(function, *args))
+
+    async def RunInTransaction(self, function: Callable[[DBManager], object]):
+        """
+        Runs several writes in one transaction on the writer thread.
+
+        Args:
+            function (Callable[[DBManager], object]): Called with the DBManager inside DBManager.transaction().
+
+        Returns:
+            object: The result of function.
+        """
+        def run():
+            with self.db.transaction():
+                return function(self.db)
+        return await self._Write(run)
+
+    # 'values' table, see the DBManager methods of the same name
+
+    async def tableValues_CreateValue(self, name: str, key: bytes, fingerprint: bytes | None = None) -> int:
+        return await self._Write(self.db.tableValues_CreateValue, name, key, fingerprint)
+
+    async def tableValues_CreateValues(self, values: list[tuple[str, bytes]]) -> int:
+        return await self._Write(self.db.tableValues_CreateValues, values)
+
+    async def tableValues_TryCreateValue(self, name: str, key: bytes, fingerprint: bytes | None = None) -> bool:
+        return await self._Write(self.db.tableValues_TryCreateValue, name, key, fingerprint)
+
+    async def tableValues_UpsertValue(self, name: str, key: bytes, fingerprint: bytes | None = None):
+        return await self._Write(self.db.tableValues_UpsertValue, name, key, fingerprint)
+
+    async def tableValues_UpsertValues(self, values: list[tuple[str, bytes]]):
+        return await self._Write(self.db.tableValues_UpsertValues, values)
+
+    async def tableValues_SaveValue(self, name: str, key: bytes, fingerprint: bytes | None = None) -> bool:
+        return await self._Write(self.db.tableValues_SaveValue, name, key, fingerprint)
+
+    async def tableValues_SaveValues(self, values: list[tuple[str, bytes]]) -> int:
+        return await self._Write(self.db.tableValues_SaveValues, values)
+
+    async def tableValues_SaveKeys(self, keys: list[tuple[int, bytes]], key_generation: int) -> int:
+        return await self._Write(self.db.tableValues_SaveKeys, keys, key_generation)
+
+    async def tableValues_SaveFingerprints(self, fingerprints: list[tuple[int, bytes]]) -> int:
+        return await self._Write(self.db.tableValues_SaveFingerprints, fingerprints)
+
+    async def tableValues_DeleteValue(self, name: str) -> bool:
+        return await self._Write(self.db.tableValues_DeleteValue, name)
+
+    async def tableValues_DeleteValues(self, names: list[str]) -> int:
+        return await self._Write(self.db.tableValues_DeleteValues, names)
+
+    async def tableValues_GetValue(self, name: str) -> bytes | None:
+        return await self._Read(self.db.tableValues_GetValue, name)
+
+    async def tableValues_GetAllValues(self) -> list[tuple[str, bytes]]:
+        return await self._Read(self.db.tableValues_GetAllValues)
+
+    async def tableValues_GetAllNames(self) -> list[str]:
+        return await self._Read(self.db.tableValues_GetAllNames)
+
+    async def tableValues_Count(self, below_key_generation: int | None = None, missing_fingerprint: bool = False) -> int:
+        return await self._Read(self.db.tableValues_Count, below_key_generation, missing_fingerprint)
+
+    async def tableValues_Search(self, query: str, limit: int = DBManager.SEARCH_LIMIT) -> list[str]:
+        return await self._Read(self.db.tableValues_Search, query, limit)
+
+    async def tableValues_GetReusedNames(self) -> list[list[str]]:
+        return await self._Read(self.db.tableValues_GetReusedNames)
+
+    async def tableValues_GetValueChunks(self, chunk_size: int = 1000, after_value_id: int = 0,
+                                         below_key_generation: int | None = None, missing_fingerprint: bool = False
+                                         ) -> AsyncIterator[list[tuple[int, str, bytes]]]:
+        # Every chunk is read with its own call, so the loop thread is free between the chunks
+        chunks = self.db.tableValues_GetValueChunks(chunk_size, after_value_id, below_key_generation,
+                                                    missing_fingerprint)
+        while (chunk := await self._Read(next, chunks, None)) is not None:
+            yield chunk
+
+    # 'saves' table, see the DBManager methods of the same name
+
+    async def tableSaves_UpdateSave(self, save_id: int, name: str, value: bytes) -> bool:
+        return await self._Write(self.db.tableSaves_UpdateSave, save_id, name, value)
+
+    async def tableSaves_SetSave(self, name: str, value: bytes) -> bool:
+        return await self._Write(self.db.tableSaves_SetSave, name, value)
+
+    async def tableSaves_DeleteSave(self, name: str) -> bool:
+        return await self._Write(self.db.tableSaves_DeleteSave, name)
+
+    async def tableSaves_GetSave(self, save_id: int) -> bytes | None:
+        return await self._Read(self.db.tableSaves_GetSave, save_id)
+
+    async def tableSaves_GetSaveByName(self, name: str) -> bytes | None:
+        return await self._Read(self.db.tableSaves_GetSaveByName, name)
@@ -0,0 +1,72 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+
+from Backend.Utils.Encryption import Encryption
+
+
+class AsyncEncryption:
+    """
+    asyncio facade of an Encryption.
+
+    Encrypt / Decrypt run on a dedicated thread pool, never on the event loop thread.
+    OpenSSL releases the GIL while encrypting, so concurrent calls run in parallel.
+
+    Usage:
+        async with AsyncEncryption(encryption) as async_encryption:
+            password = await async_encryption.Decrypt(key)
+    """
+
+    def __init__(self, encryption: Encryption, max_workers: int = Encryption.MAX_WORKERS):
+        """
+        Initializes the facade and its threads.
+
+        Args:
+            encryption (Encryption): The encryption all calls are delegated to. Its key may be
+                                     changed (e.g. on unlock), the calls always use the current key.
+            max_workers (int): The number of crypto threads.
+        """
+        self.encryption = encryption
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="AsyncEncryption")
+
+    async def __aenter__(self) -> "AsyncEncryption":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        # Close waits for the queued calls, so it must not run on the event loop thread
+        await asyncio.get_running_loop().run_in_executor(None, self.Close)
+
+    def Close(self):
+        """
+        Waits for running calls and stops the threads.
+        Blocks until the queued calls are done, 'async with' runs it off the event loop thread.
+        """
+        self._executor.shutdown(wait=True)
+
+    async def _Run(self, function: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+
+    async def Encrypt(self, message: str) -> bytes:
+        """
+        See Encryption.Encrypt.
+        """
+        return await self._Run(self.encryption.Encrypt, message)
+
+    async def Decrypt(self, encryptedMessage: bytes | str) -> str:
+        """
+        See Encryption.Decrypt.
+        """
+        return await self._Run(self.encryption.Decrypt, encryptedMessage)
+
+    async def EncryptMany(self, messages: list[str]) -> list[bytes]:
+        """
+        See Encryption.EncryptMany.
+        """
+        return await self._Run(self.encryption.EncryptMany, messages)
+
+    async def DecryptMany(self, encryptedMessages: list[bytes]) -> list[str]:
+        """
+        See Encryption.DecryptMany.
+        """
+        return await self._Run(self.encryption.DecryptMany, encryptedMessages)
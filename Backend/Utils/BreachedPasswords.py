@@ -0,0 +1,252 @@
+import hashlib
+import heapq
+import itertools
+import math
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterable, Iterator
+
+
+class BreachedPasswords:
+    """
+    Offline check of passwords against a list of breached passwords (e.g. the SHA-1 list of Have I Been Pwned).
+
+    The list is converted once (see Convert) into a binary file of sorted 20-byte SHA-1 hashes.
+    The file is memory-mapped and binary-searched, so a lookup reads about log2(n) records
+    and the list is never loaded into memory. An optional Bloom filter file (BLOOM_SUFFIX) answers
+    most lookups of passwords that are not in the list without touching the hash file.
+
+    Usage:
+        BreachedPasswords.Convert("pwned-passwords-sha1-ordered-by-hash.txt", "breached_passwords.bin")
+        with BreachedPasswords("breached_passwords.bin") as breached_passwords:
+            breached_passwords.Contains("password1")  # True
+    """
+
+    RECORD_SIZE = 20                     # Size of a SHA-1 hash in bytes
+    BLOOM_SUFFIX = ".bloom"              # File name suffix of the Bloom filter of a hash file
+    BLOOM_HEADER = struct.Struct("<QI")  # Bloom filter file: number of bits, number of hash functions, then the bits
+    BLOOM_BITS_PER_HASH = 10             # Bits of the Bloom filter per hash (about 1 % false positives)
+    SORT_CHUNK_SIZE = 1_000_000          # Hashes sorted in memory at a time by Convert (about 60 MB as bytes objects)
+    MERGE_FAN_IN = 64                    # Sorted runs merged at a time by Convert (open files)
+
+    def __init__(self, path: str):
+        """
+        Opens a hash file created by Convert, and its Bloom filter if it exists.
+
+        Args:
+            path (str): The path of the hash file.
+        """
+        self.path = path
+        self._hashes = self._Map(path)
+        self.count = len(self._hashes) // self.RECORD_SIZE if self._hashes is not None else 0
+
+        self._bloom = self._Map(path + self.BLOOM_SUFFIX)
+        if self._bloom is not None:
+            self._bloom_bits, self._bloom_hash_count = self.BLOOM_HEADER.unpack_from(self._bloom)
+
+    @classmethod
+    def OpenIfExists(cls, path: str | None) -> "BreachedPasswords | None":
+        """
+        Opens a hash file if it exists (it is optional, e.g. ProgramSettings.BREACHED_PASSWORDS_PATH).
+
+        Returns:
+            BreachedPasswords | None: The opened hash file, or None if it does not exist.
+        """
+        return cls(path) if path is not None and os.path.exists(path) else None
+
+    def __enter__(self) -> "BreachedPasswords":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+
+    def Close(self):
+        """
+        Closes the memory-mapped files.
+        """
+        for mapped_file in (self._hashes, self._bloom):
+            if mapped_file is not None:
+                mapped_file.close()
+        self._hashes = self._bloom = None
+        self.count = 0
+
+    def Contains(self, password: str) -> bool:
+        """
+        Checks if a password is in the list of breached passwords.
+
+        Args:
+            password (str): The password to check.
+
+        Returns:
+            bool: True if the password is in the list.
+        """
+        return self.ContainsHash(hashlib.sha1(password.encode("utf-8")).digest())
+
+    def ContainsHash(self, sha1_hash: bytes) -> bool:
+        """
+        Checks if a SHA-1 hash is in the list of breached passwords.
+
+        Args:
+            sha1_hash (bytes): The 20-byte SHA-1 hash of the password.
+
+        Returns:
+            bool: True if the hash is in the list.
+        """
+        if self.count == 0:
+            return False
+        if self._bloom is not None and not self._BloomContains(sha1_hash):
+            return False
+
+        # Binary search for the first record >= sha1_hash
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = middle * self.RECORD_SIZE
+            if self._hashes[offset:offset + self.RECORD_SIZE] < sha1_hash:
+                low = middle + 1
+            else:
+                high = middle
+        offset = low * self.RECORD_SIZE
+        return low < self.count and self._hashes[offset:offset + self.RECORD_SIZE] == sha1_hash
+
+    def _BloomContains(self, sha1_hash: bytes) -> bool:
+        offset = self.BLOOM_HEADER.size
+        for bit in self._BloomBits(sha1_hash, self._bloom_bits, self._bloom_hash_count):
+            if not self._bloom[offset + bit // 8] & (1 << (bit % 8)):
+                return False
+        return True
+
+    @staticmethod
+    def _BloomBits(sha1_hash: bytes, bit_count: int, hash_count: int) -> Iterator[int]:
+        # The SHA-1 hash is already uniform, its first 16 bytes give the two hashes of the double hashing
+        first = int.from_bytes(sha1_hash[:8], "little")
+        second = int.from_bytes(sha1_hash[8:16], "little") | 1
+        for i in range(hash_count):
+            yield (first + i * second) % bit_count
+
+    @staticmethod
+    def _Map(path: str) -> mmap.mmap | None:
+        # Memory-maps a file read-only, None if it does not exist or is empty (empty files cannot be mapped)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        with open(path, "rb") as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def Convert(cls, source_path: str, target_path: str, bloom_filter: bool = True) -> int:
+        """
+        Converts a text list of SHA-1 hashes (one hex hash per line, optionally followed by ':count',
+        like the HIBP download) into a sorted binary hash file for BreachedPasswords.
+
+        The hashes are sorted in chunks of SORT_CHUNK_SIZE, the sorted runs are merged MERGE_FAN_IN
+        at a time (several passes for long lists), so the memory and the number of open files do not
+        grow with the list. The runs need about as much temporary disk space as the hash file.
+        Duplicate hashes are removed.
+
+        The Bloom filter is sized for the hashes without duplicates and filled through a memory-mapped
+        file in a second pass over the hash file. It has BLOOM_BITS_PER_HASH bits per hash (about 1 GB
+        for the HIBP list), the conversion is fastest if the filter fits into memory.
+
+        Args:
+            source_path (str): The path of the text list.
+            target_path (str): The path of the binary hash file to create.
+            bloom_filter (bool): Also create the Bloom filter file (target_path + BLOOM_SUFFIX).
+
+        Returns:
+            int: The number of hashes in the binary hash file.
+        """
+        bloom_path = target_path + cls.BLOOM_SUFFIX
+        if os.path.exists(bloom_path):
+            os.remove(bloom_path)  # Belongs to the old hash file
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(target_path))) as directory:
+            run_names = (os.path.join(directory, f"run{i}") for i in itertools.count())
+
+            # Write the hashes as sorted runs of binary records
+            run_paths = []
+            with open(source_path, "r", encoding="ascii", errors="replace") as source:
+                for chunk in cls._ReadChunks(source):
+                    chunk.sort()
+                    run_paths.append(next(run_names))
+                    with open(run_paths[-1], "wb") as run:
+                        run.write(b"".join(chunk))
+
+            # Merge the runs in groups until the last merge fits into MERGE_FAN_IN open files
+            while len(run_paths) > cls.MERGE_FAN_IN:
+                merged_paths = []
+                for start in range(0, len(run_paths), cls.MERGE_FAN_IN):
+                    merged_paths.append(next(run_names))
+                    with open(merged_paths[-1], "wb") as run:
+                        cls._MergeRuns(run_paths[start:start + cls.MERGE_FAN_IN], run)
+                run_paths = merged_paths
+
+            with open(target_path, "wb") as target:
+                written = cls._MergeRuns(run_paths, target)
+
+            if bloom_filter:
+                # Built next to the target and renamed when complete, an incomplete filter would miss hashes
+                bloom_temp_path = os.path.join(directory, "bloom")
+                cls._WriteBloomFilter(target_path, bloom_temp_path, written)
+                os.replace(bloom_temp_path, bloom_path)
+        return written
+
+    @classmethod
+    def _ReadChunks(cls, lines: Iterable[str]) -> Iterator[list[bytes]]:
+        # Parses the text lines into chunks of binary hashes, invalid lines are skipped
+        chunk = []
+        for line in lines:
+            try:
+                sha1_hash = bytes.fromhex(line[:40])
+            except ValueError:
+                continue
+            if len(sha1_hash) != cls.RECORD_SIZE:
+                continue
+            chunk.append(sha1_hash)
+            if len(chunk) >= cls.SORT_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @classmethod
+    def _MergeRuns(cls, run_paths: list[str], target) -> int:
+        # Merges sorted runs into the open target file, duplicate hashes are written once.
+        # The runs are deleted afterwards, so a merge pass needs little additional disk space.
+        runs = [open(run_path, "rb") for run_path in run_paths]
+        written = 0
+        try:
+            previous = None
+            for sha1_hash in heapq.merge(*(cls._ReadRecords(run) for run in runs)):
+                if sha1_hash != previous:
+                    target.write(sha1_hash)
+                    written += 1
+                    previous = sha1_hash
+        finally:
+            for run in runs:
+                run.close()
+        for run_path in run_paths:
+            os.remove(run_path)
+        return written
+
+    @classmethod
+    def _WriteBloomFilter(cls, hashes_path: str, bloom_path: str, count: int):
+        # Writes the Bloom filter for the count hashes of a hash file, the bits are set through a memory map
+        bit_count = max(8, count * cls.BLOOM_BITS_PER_HASH)
+        hash_function_count = max(1, round(cls.BLOOM_BITS_PER_HASH * math.log(2)))
+        offset = cls.BLOOM_HEADER.size
+        with open(bloom_path, "w+b") as bloom_file:
+            bloom_file.write(cls.BLOOM_HEADER.pack(bit_count, hash_function_count))
+            bloom_file.truncate(offset + -(-bit_count // 8))
+            with mmap.mmap(bloom_file.fileno(), 0) as bloom, open(hashes_path, "rb") as hashes:
+                for sha1_hash in cls._ReadRecords(hashes):
+                    for bit in cls._BloomBits(sha1_hash, bit_count, hash_function_count):
+                        bloom[offset + bit // 8] |= 1 << (bit % 8)
+
+    @classmethod
+    def _ReadRecords(cls, file) -> Iterator[bytes]:
+        # Reads the records of a sorted run in blocks
+        while block := file.read(cls.RECORD_SIZE * 4096):
+            for offset in range(0, len(block), cls.RECORD_SIZE):
+                yield block[offset:offset + cls.RECORD_SIZE]
@@ -1,21 +1,159 @@
 # Import the SQLite3 module for interacting with SQLite databases
 import sqlite3
+import binascii
+import re
+import threading
+from base64 import b64decode
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Iterator
+from urllib.parse import quote
 
 # Import application settings (e.g., database path)
 from Backend.ProgramSettings import ProgramSettings  # This should define DATABASE_PATH
 
 
 class DBManager:
+    # Version of the database layout, saved in 'PRAGMA user_version'
+    # 0: Key / Value columns hold base64 TEXT
+    # 1: Key / Value columns hold raw BLOB bytes
+    # 2: Unique index on 'values'.Name
+    # 3: 'values'.KeyGeneration, the data key generation of each value (progress marker of a re-key)
+    # 4: 'values'.Fingerprint, a keyed hash of each password (see Encryption.Fingerprint), indexed
+    # 5: Full-text index values_fts over 'values'.Name, kept in sync by triggers
+    SCHEMA_VERSION = 5
+
+    SEARCH_LIMIT = 20        # Default number of results of tableValues_Search
+    SEARCH_CANDIDATES = 200  # Best matches of a search that are joined with their names and ordered
+    # Version byte of old AES-256-CBC ciphertexts (Encryption.LEGACY_FORMAT_VERSION), added by _MigrateToBlob
+    LEGACY_CIPHERTEXT_HEADER = b"\x01"
+
     def __init__(self):
         """
         Initializes the DBManager.
 
         - Connects to the SQLite database using the path provided in ProgramSettings.
+          Every thread gets its own connections (see connection and read_connection), the database
+          runs in WAL mode, so readers never wait for a writer (also across program instances).
+          An in-memory database (":memory:") uses a single connection shared by all threads.
         - Ensures the required database tables exist by invoking CreateTableIfNotExists().
         """
-        self.connection = sqlite3.connect(ProgramSettings.DATABASE_PATH)
+        self._in_memory = ProgramSettings.DATABASE_PATH == ":memory:"
+        # Connections and transaction depth of the current thread (shared by all threads for an in-memory database)
+        self._local = SimpleNamespace() if self._in_memory else threading.local()
+        self._connections = []  # All opened connections, closed by Close()
+        self._connections_lock = threading.Lock()
+        self.fts_available = False  # False if this SQLite has no FTS5, tableValues_Search then scans the names
         self.CreateTableIfNotExists()
 
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        The connection of the current thread for writes (and reads inside a transaction).
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._Connect(read_only=False)
+            self._local.connection = connection
+        return connection
+
+    @property
+    def read_connection(self) -> sqlite3.Connection:
+        """
+        The read-only connection of the current thread for lookups.
+
+        It reads the last committed state and never waits for a writer. Inside a transaction
+        the write connection is used instead, so the uncommitted writes of the transaction are seen.
+        """
+        if self._in_memory or self._transaction_depth > 0:
+            return self.connection
+        write_connection = getattr(self._local, "connection", None)
+        if write_connection is not None and write_connection.in_transaction:
+            return write_connection
+
+        connection = getattr(self._local, "read_connection", None)
+        if connection is None:
+            connection = self._Connect(read_only=True)
+            self._local.read_connection = connection
+        return connection
+
+    @property
+    def _transaction_depth(self) -> int:
+        # > 0 while the current thread is inside a 'with transaction()' block
+        return getattr(self._local, "transaction_depth", 0)
+
+    @_transaction_depth.setter
+    def _transaction_depth(self, depth: int):
+        self._local.transaction_depth = depth
+
+    def _Connect(self, read_only: bool) -> sqlite3.Connection:
+        """
+        Opens a new connection to the database with the busy timeout and synchronous level from ProgramSettings.
+
+        Parameters:
+            read_only (bool): Open the database read-only (for lookups).
+
+        Returns:
+            sqlite3.Connection: The new connection.
+        """
+        if read_only:
+            connection = sqlite3.connect(f"file:{quote(ProgramSettings.DATABASE_PATH)}?mode=ro", uri=True,
+                                         timeout=ProgramSettings.DB_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        else:
+            connection = sqlite3.connect(ProgramSettings.DATABASE_PATH,
+                                         timeout=ProgramSettings.DB_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+            if not self._in_memory:
+                connection.execute("PRAGMA journal_mode = WAL")  # Saved in the database file
+            connection.execute(f"PRAGMA synchronous = {ProgramSettings.DB_SYNCHRONOUS}")
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    def Close(self):
+        """
+        Closes all connections of all threads. The DBManager must not be used afterwards.
+        """
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups several write operations into a single database transaction.
+
+        All writes inside the 'with' block are committed together when the block
+        ends. If an exception is raised, every write of the block is rolled back.
+        Nested blocks join the outermost transaction.
+
+        Usage:
+            with db.transaction():
+                db.tableValues_SaveValue("SiteA", "...")
+                db.tableValues_SaveValue("SiteB", "...")
+        """
+        if self._transaction_depth == 0 and not self.connection.in_transaction:
+            self.connection.execute("BEGIN")  # Explicit BEGIN, so schema changes are part of the transaction too
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.connection.rollback()
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            self.connection.commit()
+
+    def _commit(self):
+        """
+        Commits the pending changes unless a transaction() block is active.
+        Inside a transaction the commit is done once at the end of the block.
+        """
+        if self._transaction_depth == 0:
+            self.connection.commit()
+
     def CreateTableIfNotExists(self):
         """
         Creates the necessary database tables if they do not exist.
@@ -24,76 +162,306 @@ class DBManager:
         - 'values': Stores (Name, Key) pairs for user data.
         - 'saves': Stores saved data with a Name and Value.
 
-        Also inserts a default user record into 'saves' if it does not already exist.
+        Databases with an older schema version are migrated first (see SCHEMA_VERSION).
+        A new database also gets the default user record in 'saves' (the initial user password,
+        ToolHelper deletes it when the vault gets its data key).
         """
         self.connection.execute("PRAGMA foreign_keys = ON")  # Ensure foreign key support
 
-        # SQL for creating the 'values' table
-        create_values_table = """
-            CREATE TABLE IF NOT EXISTS "values" (
+        schema_version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        cursor = self.connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'values'")
+        tables_exist = cursor.fetchone()[0] > 0
+
+        with self.transaction():
+            if tables_exist and schema_version < 1:
+                self._MigrateToBlob()
+            if tables_exist and schema_version < 2:
+                self._MigrateUniqueNames()
+            if tables_exist and schema_version < 3:
+                self._MigrateKeyGeneration()
+            if tables_exist and schema_version < 4:
+                self._MigrateFingerprint()
+
+            # SQL for creating the 'values' table
+            self.connection.execute(self._CreateValuesTableQuery('"values"'))
+            # Unique index on Name: lookups by name are O(log n) and names cannot be added twice
+            self.connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS ValuesNameIndex ON "values" (Name)')
+            # Index on Fingerprint: reused passwords are found by grouping the index, without reading the table
+            self.connection.execute('CREATE INDEX IF NOT EXISTS ValuesFingerprintIndex ON "values" (Fingerprint)')
+
+            self.fts_available = self._CreateSearchIndex(rebuild=tables_exist and schema_version < 5)
+
+            # SQL for creating the 'saves' table
+            self.connection.execute(self._CreateSavesTableQuery("saves"))
+
+            if not tables_exist:
+                # Insert default 'user' save (Note: no ValueId column in 'saves'; likely an error)
+                self.connection.execute(
+                    'INSERT INTO saves (Name, Value) VALUES (?, ?)',
+                    ("user",
+                     self.LEGACY_CIPHERTEXT_HEADER + b64decode("7ZCsDFCTYGYFYWxADFBAJ1ZtjPZYVWNEVhj1J+++O5I="))
+                )
+
+            self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+        if tables_exist and schema_version < 1:
+            self.connection.execute("VACUUM")  # Give the space freed by the migration back to the file system
+
+    @staticmethod
+    def _CreateValuesTableQuery(table_name: str) -> str:
+        return f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
                 ValueId INTEGER PRIMARY KEY AUTOINCREMENT,
                 Name TEXT NOT NULL,
-                Key TEXT NOT NULL
+                Key BLOB NOT NULL,
+                KeyGeneration INTEGER NOT NULL DEFAULT 0,
+                Fingerprint BLOB
             )
         """
-        self.connection.execute(create_values_table)
 
-        # SQL for creating the 'saves' table
-        create_saves_table = """
-            CREATE TABLE IF NOT EXISTS saves (
+    def _CreateSearchIndex(self, rebuild: bool) -> bool:
+        """
+        Creates the full-text index values_fts over the names (no secrets) of the 'values' table, if it does not exist.
+
+        values_fts is an external content FTS5 table: it stores only the index, the names stay in 'values'.
+        Triggers update the index for every insert, delete and rename, so it is always in sync. Key updates
+        (e.g. a re-key) do not touch the index. Prefix indexes for 2 and 3 characters make short prefix
+        queries as fast as full words. Must run inside a transaction.
+
+        Parameters:
+            rebuild (bool): Index all names again (after a migration changed the 'values' table).
+
+        Returns:
+            bool: True if the index exists, False if this SQLite has no FTS5.
+        """
+        exists = self.connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'values_fts'").fetchone()[0] > 0
+        if not exists:
+            try:
+                self.connection.execute("""
+                    CREATE VIRTUAL TABLE values_fts USING fts5(
+                        Name, content='values', content_rowid='ValueId', prefix='2 3'
+                    )
+                """)
+            except sqlite3.OperationalError:
+                return False  # SQLite was built without FTS5
+            rebuild = True
+        if rebuild:
+            # Index the existing names
+            self.connection.execute("INSERT INTO values_fts (values_fts) VALUES ('rebuild')")
+
+        self.connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS ValuesFtsInsert AFTER INSERT ON "values" BEGIN
+                INSERT INTO values_fts (rowid, Name) VALUES (new.ValueId, new.Name);
+            END
+        """)
+        self.connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS ValuesFtsDelete AFTER DELETE ON "values" BEGIN
+                INSERT INTO values_fts (values_fts, rowid, Name) VALUES ('delete', old.ValueId, old.Name);
+            END
+        """)
+        self.connection.execute("""
+            CREATE TRIGGER IF NOT EXISTS ValuesFtsRename AFTER UPDATE OF Name ON "values" BEGIN
+                INSERT INTO values_fts (values_fts, rowid, Name) VALUES ('delete', old.ValueId, old.Name);
+                INSERT INTO values_fts (rowid, Name) VALUES (new.ValueId, new.Name);
+            END
+        """)
+        return True
+
+    @staticmethod
+    def _CreateSavesTableQuery(table_name: str) -> str:
+        return f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
                 SaveId INTEGER PRIMARY KEY AUTOINCREMENT,
                 Name TEXT NOT NULL,
-                Value TEXT NOT NULL
+                Value BLOB NOT NULL
             )
         """
-        self.connection.execute(create_saves_table)
 
-        # Check if a 'user' save already exists
-        cursor = self.connection.execute("SELECT COUNT(*) FROM saves WHERE Name = ?", ("user",))
-        exists = cursor.fetchone()[0] > 0
+    def _MigrateToBlob(self):
+        """
+        Migrates schema version 0 to 1: the base64 TEXT columns 'values'.Key and saves.Value
+        are rebuilt as BLOB columns holding the decoded raw bytes. Must run inside a transaction.
+
+        All ciphertexts of version 0 databases are AES-256-CBC values (IV + ciphertext), they get
+        LEGACY_CIPHERTEXT_HEADER in front, so they can never be mistaken for a current (GCM) value.
+        """
+        def legacy_ciphertext(value):
+            # Values that are no valid base64 are kept as they are
+            if not isinstance(value, str):
+                return value
+            try:
+                return self.LEGACY_CIPHERTEXT_HEADER + b64decode(value, validate=True)
+            except binascii.Error:
+                return value
+
+        self.connection.create_function("LEGACY_CIPHERTEXT", 1, legacy_ciphertext, deterministic=True)
+
+        self.connection.execute(self._CreateValuesTableQuery("values_new"))
+        self.connection.execute(
+            'INSERT INTO values_new (ValueId, Name, Key) SELECT ValueId, Name, LEGACY_CIPHERTEXT(Key) FROM "values"')
+        self.connection.execute('DROP TABLE "values"')
+        self.connection.execute('ALTER TABLE values_new RENAME TO "values"')
+
+        self.connection.execute(self._CreateSavesTableQuery("saves_new"))
+        self.connection.execute(
+            'INSERT INTO saves_new (SaveId, Name, Value) SELECT SaveId, Name, LEGACY_CIPHERTEXT(Value) FROM saves')
+        self.connection.execute('DROP TABLE saves')
+        self.connection.execute('ALTER TABLE saves_new RENAME TO saves')
+
+    def _MigrateUniqueNames(self):
+        """
+        Migrates schema version 1 to 2: prepares the unique index on 'values'.Name.
+        Names that exist more than once are renamed to "Name (ValueId)", except for the first one,
+        so no value is lost. Must run inside a transaction.
+        """
+        self.connection.execute("""
+            UPDATE "values" SET Name = Name || ' (' || ValueId || ')'
+            WHERE ValueId NOT IN (SELECT MIN(ValueId) FROM "values" GROUP BY Name)
+        """)
 
-        if not exists:
-            # Insert default 'user' save (Note: no ValueId column in 'saves'; likely an error)
-            self.connection.execute(
-                'INSERT INTO saves (Name, Value) VALUES (?, ?)',
-                ("user", "7ZCsDFCTYGYFYWxADFBAJ1ZtjPZYVWNEVhj1J+++O5I=")
-            )
+    def _MigrateKeyGeneration(self):
+        """
+        Migrates schema version 2 to 3: adds the column 'values'.KeyGeneration (0 for all existing values).
+        Must run inside a transaction.
+        """
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info("values")')]
+        if "KeyGeneration" not in columns:  # Tables rebuilt by _MigrateToBlob already have the column
+            self.connection.execute('ALTER TABLE "values" ADD COLUMN KeyGeneration INTEGER NOT NULL DEFAULT 0')
 
-        self.connection.commit()
+    def _MigrateFingerprint(self):
+        """
+        Migrates schema version 3 to 4: adds the column 'values'.Fingerprint (NULL for all existing values,
+        they are filled in by ToolHelper.UpdateFingerprints). Must run inside a transaction.
+        """
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info("values")')]
+        if "Fingerprint" not in columns:  # Tables rebuilt by _MigrateToBlob already have the column
+            self.connection.execute('ALTER TABLE "values" ADD COLUMN Fingerprint BLOB')
 
-    def tableValues_CreateValue(self, name: str, key: str) -> int:
+    def GetDatabaseSize(self) -> int:
+        """
+        Returns the number of bytes used by the database (without free pages),
+        e.g. to compare the size before and after a migration.
+
+        Returns:
+            int: The used size of the database in bytes.
+        """
+        page_size = self.connection.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self.connection.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = self.connection.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - freelist_count) * page_size
+
+    def tableValues_CreateValue(self, name: str, key: bytes, fingerprint: bytes | None = None) -> int:
         """
         Inserts a new record into the 'values' table.
 
         Parameters:
             name (str): The name to associate with the key.
-            key (str): The key to store.
+            key (bytes): The encrypted key to store.
+            fingerprint (bytes | None): The fingerprint of the password, None if it is not known yet.
 
         Returns:
             int: The autogenerated ValueId of the new entry.
         """
-        insert_query = 'INSERT INTO "values" (Name, Key) VALUES (?, ?)'
-        cursor = self.connection.execute(insert_query, (name, key))
-        self.connection.commit()
+        insert_query = 'INSERT INTO "values" (Name, Key, Fingerprint) VALUES (?, ?, ?)'
+        cursor = self.connection.execute(insert_query, (name, key, fingerprint))
+        self._commit()
         return cursor.lastrowid
 
-    def tableValues_SaveValue(self, name: str, key: str) -> bool:
+    def tableValues_CreateValues(self, values: list[tuple[str, bytes]]) -> int:
+        """
+        Inserts several records into the 'values' table in one transaction.
+
+        Parameters:
+            values (list[tuple[str, bytes]]): List of (Name, Key) pairs to insert.
+
+        Returns:
+            int: The number of inserted records.
+        """
+        insert_query = 'INSERT INTO "values" (Name, Key) VALUES (?, ?)'
+        with self.transaction():
+            cursor = self.connection.executemany(insert_query, values)
+        return cursor.rowcount
+
+    def tableValues_TryCreateValue(self, name: str, key: bytes, fingerprint: bytes | None = None) -> bool:
+        """
+        Inserts a new record into the 'values' table if the name does not exist yet.
+        The check and the insert are a single statement.
+
+        Parameters:
+            name (str): The name to associate with the key.
+            key (bytes): The encrypted key to store.
+            fingerprint (bytes | None): The fingerprint of the password, None if it is not known yet.
+
+        Returns:
+            bool: True if the record was inserted, False if the name already exists.
+        """
+        insert_query = 'INSERT INTO "values" (Name, Key, Fingerprint) VALUES (?, ?, ?) ON CONFLICT (Name) DO NOTHING'
+        cursor = self.connection.execute(insert_query, (name, key, fingerprint))
+        self._commit()
+        return cursor.rowcount > 0
+
+    def tableValues_UpsertValue(self, name: str, key: bytes, fingerprint: bytes | None = None):
+        """
+        Inserts a new record into the 'values' table, or updates the key if the name already exists.
+
+        Parameters:
+            name (str): The name to associate with the key.
+            key (bytes): The encrypted key to store.
+            fingerprint (bytes | None): The fingerprint of the password, None if it is not known yet.
+        """
+        upsert_query = ('INSERT INTO "values" (Name, Key, Fingerprint) VALUES (?, ?, ?) '
+                        'ON CONFLICT (Name) DO UPDATE SET Key = excluded.Key, Fingerprint = excluded.Fingerprint')
+        self.connection.execute(upsert_query, (name, key, fingerprint))
+        self._commit()
+
+    def tableValues_UpsertValues(self, values: list[tuple[str, bytes]]):
+        """
+        Inserts or updates several records in the 'values' table in one transaction.
+
+        Parameters:
+            values (list[tuple[str, bytes]]): List of (Name, Key) pairs to insert or update.
+                                              The fingerprints of updated records are reset.
+        """
+        upsert_query = ('INSERT INTO "values" (Name, Key) VALUES (?, ?) '
+                        'ON CONFLICT (Name) DO UPDATE SET Key = excluded.Key, Fingerprint = NULL')
+        with self.transaction():
+            self.connection.executemany(upsert_query, values)
+
+    def tableValues_SaveValue(self, name: str, key: bytes, fingerprint: bytes | None = None) -> bool:
         """
         Updates the key for an existing name in the 'values' table.
 
         Parameters:
             name (str): The name identifying the record to update.
-            key (str): The new key value.
+            key (bytes): The new encrypted key value.
+            fingerprint (bytes | None): The fingerprint of the new password, None if it is not known yet.
 
         Returns:
             bool: True if at least one record was updated, False otherwise.
         """
-        update_query = 'UPDATE "values" SET Key = ? WHERE Name = ?'
-        cursor = self.connection.execute(update_query, (key, name))
-        self.connection.commit()
+        update_query = 'UPDATE "values" SET Key = ?, Fingerprint = ? WHERE Name = ?'
+        cursor = self.connection.execute(update_query, (key, fingerprint, name))
+        self._commit()
         return cursor.rowcount > 0
 
-    def tableValues_GetValue(self, name: str) -> str | None:
+    def tableValues_SaveValues(self, values: list[tuple[str, bytes]]) -> int:
+        """
+        Updates the keys of several existing names in the 'values' table in one transaction.
+
+        Parameters:
+            values (list[tuple[str, bytes]]): List of (Name, Key) pairs with the new keys.
+                                              Their fingerprints are reset.
+
+        Returns:
+            int: The number of updated records.
+        """
+        update_query = 'UPDATE "values" SET Key = ?, Fingerprint = NULL WHERE Name = ?'
+        with self.transaction():
+            cursor = self.connection.executemany(update_query, ((key, name) for name, key in values))
+        return cursor.rowcount
+
+    def tableValues_GetValue(self, name: str) -> bytes | None:
         """
         Retrieves the key associated with a given name from the 'values' table.
 
@@ -101,10 +469,10 @@ class DBManager:
             name (str): The name whose associated key is to be fetched.
 
         Returns:
-            str | None: The associated key, or None if not found.
+            bytes | None: The associated encrypted key, or None if not found.
         """
         query = 'SELECT Key FROM "values" WHERE Name = ?'
-        cursor = self.connection.execute(query, (name,))
+        cursor = self.read_connection.execute(query, (name,))
         row = cursor.fetchone()
         return row[0] if row else None
 
@@ -120,42 +488,219 @@ class DBManager:
         """
         delete_query = 'DELETE FROM "values" WHERE Name = ?'
         cursor = self.connection.execute(delete_query, (name,))
-        self.connection.commit()
+        self._commit()
         return cursor.rowcount > 0
 
-    def tableValues_GetAllValues(self) -> list[tuple[str, str]]:
+    def tableValues_DeleteValues(self, names: list[str]) -> int:
+        """
+        Deletes several records from the 'values' table by name in one transaction.
+
+        Parameters:
+            names (list[str]): The names of the values to delete.
+
+        Returns:
+            int: The number of deleted records.
+        """
+        delete_query = 'DELETE FROM "values" WHERE Name = ?'
+        with self.transaction():
+            cursor = self.connection.executemany(delete_query, ((name,) for name in names))
+        return cursor.rowcount
+
+    def tableValues_GetAllValues(self) -> list[tuple[str, bytes]]:
         """
         Retrieves all (Name, Key) pairs from the 'values' table.
 
         Returns:
-            list[tuple[str, str]]: List of tuples containing Name and Key.
+            list[tuple[str, bytes]]: List of tuples containing Name and Key.
         """
         query = 'SELECT Name, Key FROM "values"'
-        cursor = self.connection.execute(query)
+        cursor = self.read_connection.execute(query)
 
         values_list = []
         for row in cursor:
             values_list.append((row[0], row[1]))  # row[0] = Name, row[1] = Key
         return values_list
 
-    def tableSaves_UpdateSave(self, save_id: int, name: str, value: str) -> bool:
+    def tableValues_GetValueChunks(self, chunk_size: int = 1000, after_value_id: int = 0,
+                                   below_key_generation: int | None = None,
+                                   missing_fingerprint: bool = False) -> Iterator[list[tuple[int, str, bytes]]]:
+        """
+        Yields all records of the 'values' table in chunks, ordered by ValueId.
+
+        Each chunk is read with its own query (keyset pagination on ValueId), so only one chunk
+        is in memory at a time and the records may be updated between two chunks.
+
+        Parameters:
+            chunk_size (int): The maximum number of records per chunk.
+            after_value_id (int): Only records with a bigger ValueId are returned (to continue a previous run).
+            below_key_generation (int | None): If set, only records with a smaller KeyGeneration are returned.
+            missing_fingerprint (bool): If True, only records without a fingerprint are returned.
+
+        Yields:
+            list[tuple[int, str, bytes]]: The next chunk of (ValueId, Name, Key) tuples.
+        """
+        query = ('SELECT ValueId, Name, Key FROM "values" WHERE ValueId > ? AND KeyGeneration < ?'
+                 + (' AND Fingerprint IS NULL' if missing_fingerprint else '') + ' ORDER BY ValueId LIMIT ?')
+        # Without a generation filter, compare with a bound no generation can reach
+        max_key_generation = below_key_generation if below_key_generation is not None else 2 ** 63 - 1
+        while True:
+            chunk = self.read_connection.execute(query, (after_value_id, max_key_generation, chunk_size)).fetchall()
+            if not chunk:
+                return
+            yield chunk
+            after_value_id = chunk[-1][0]
+
+    def tableValues_Count(self, below_key_generation: int | None = None, missing_fingerprint: bool = False) -> int:
+        """
+        Counts the records in the 'values' table.
+
+        Parameters:
+            below_key_generation (int | None): If set, only records with a smaller KeyGeneration are counted.
+            missing_fingerprint (bool): If True, only records without a fingerprint are counted.
+
+        Returns:
+            int: The number of records.
+        """
+        if missing_fingerprint:
+            return self.read_connection.execute('SELECT COUNT(*) FROM "values" WHERE Fingerprint IS NULL').fetchone()[0]
+        if below_key_generation is None:
+            return self.read_connection.execute('SELECT COUNT(*) FROM "values"').fetchone()[0]
+        query = 'SELECT COUNT(*) FROM "values" WHERE KeyGeneration < ?'
+        return self.read_connection.execute(query, (below_key_generation,)).fetchone()[0]
+
+    def tableValues_SaveKeys(self, keys: list[tuple[int, bytes]], key_generation: int) -> int:
+        """
+        Updates the keys of several records by ValueId and marks them with a key generation, in one transaction.
+        Their fingerprints are reset, since they depend on the data key. Records that are already at the
+        key generation are not changed, so a second program finishing the same re-key cannot overwrite
+        a chunk with keys of an older state.
+
+        Parameters:
+            keys (list[tuple[int, bytes]]): List of (ValueId, Key) pairs with the new keys.
+            key_generation (int): The data key generation the new keys are encrypted with.
+
+        Returns:
+            int: The number of updated records (without the records that were already at the key generation).
+        """
+        update_query = ('UPDATE "values" SET Key = ?, KeyGeneration = ?, Fingerprint = NULL '
+                        'WHERE ValueId = ? AND KeyGeneration < ?')
+        with self.transaction():
+            cursor = self.connection.executemany(
+                update_query, ((key, key_generation, value_id, key_generation) for value_id, key in keys))
+        return cursor.rowcount
+
+    def tableValues_SaveFingerprints(self, fingerprints: list[tuple[int, bytes]], only_missing: bool = False) -> int:
+        """
+        Updates the fingerprints of several records by ValueId in one transaction.
+
+        Parameters:
+            fingerprints (list[tuple[int, bytes]]): List of (ValueId, Fingerprint) pairs.
+            only_missing (bool): If True, only records without a fingerprint are updated.
+
+        Returns:
+            int: The number of updated records.
+        """
+        update_query = ('UPDATE "values" SET Fingerprint = ? WHERE ValueId = ?'
+                        + (' AND Fingerprint IS NULL' if only_missing else ''))
+        with self.transaction():
+            cursor = self.connection.executemany(
+                update_query, ((fingerprint, value_id) for value_id, fingerprint in fingerprints))
+        return cursor.rowcount
+
+    def tableValues_GetReusedNames(self) -> list[list[str]]:
+        """
+        Finds the records that share a fingerprint (the same password saved for several names).
+
+        The duplicate fingerprints are found by grouping ValuesFingerprintIndex, so the search
+        is a single pass over the index. Records without a fingerprint are ignored.
+
+        Returns:
+            list[list[str]]: The names of each group of records with the same fingerprint,
+                             ordered by name inside the group.
+        """
+        query = """
+            SELECT Fingerprint, Name FROM "values" WHERE Fingerprint IN (
+                SELECT Fingerprint FROM "values" WHERE Fingerprint IS NOT NULL
+                GROUP BY Fingerprint HAVING COUNT(*) > 1
+            )
+            ORDER BY Fingerprint, Name
+        """
+        groups = []
+        previous_fingerprint = None
+        for fingerprint, name in self.read_connection.execute(query):
+            if fingerprint != previous_fingerprint:
+                groups.append([])
+                previous_fingerprint = fingerprint
+            groups[-1].append(name)
+        return groups
+
+    def tableValues_GetAllNames(self) -> list[str]:
+        """
+        Retrieves all names from the 'values' table, without their keys.
+
+        Returns:
+            list[str]: List of all names.
+        """
+        query = 'SELECT Name FROM "values"'
+        return [row[0] for row in self.read_connection.execute(query)]
+
+    def tableValues_Search(self, query: str, limit: int = SEARCH_LIMIT) -> list[str]:
+        """
+        Searches the names of the 'values' table with the full-text index values_fts.
+
+        The query is split into words (letters and digits), every word matches the words of a name that start
+        with it, e.g. "mail exa" finds "mail.example.com". The results are ranked by relevance (bm25),
+        then by name. The index ranks all matches, only the best SEARCH_CANDIDATES are joined with the
+        'values' table, so a word that is part of many names (e.g. "mail") does not sort the whole vault.
+        Without FTS5 the names are scanned with LIKE instead (every word as a substring, ordered by name).
+
+        Parameters:
+            query (str): The search text entered by the user.
+            limit (int): The maximum number of results.
+
+        Returns:
+            list[str]: The matching names, best match first.
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        if not self.fts_available:
+            patterns = ["%" + re.sub(r"([%_\\])", r"\\\1", word) + "%" for word in words]
+            conditions = " AND ".join(["Name LIKE ? ESCAPE '\\'"] * len(patterns))
+            cursor = self.read_connection.execute(
+                f'SELECT Name FROM "values" WHERE {conditions} ORDER BY Name LIMIT ?', (*patterns, limit))
+            return [row[0] for row in cursor]
+
+        # Every word as a quoted prefix query, so FTS5 operators in the user input have no effect
+        fts_query = " ".join(f'"{word}"*' for word in words)
+        search_query = """
+            SELECT "values".Name FROM (
+                SELECT rowid, rank FROM values_fts WHERE values_fts MATCH ? ORDER BY rank LIMIT ?
+            ) AS candidates
+            JOIN "values" ON "values".ValueId = candidates.rowid
+            ORDER BY candidates.rank, "values".Name LIMIT ?
+        """
+        cursor = self.read_connection.execute(search_query, (fts_query, max(limit, self.SEARCH_CANDIDATES), limit))
+        return [row[0] for row in cursor]
+
+    def tableSaves_UpdateSave(self, save_id: int, name: str, value: bytes) -> bool:
         """
         Updates a save record by its ID.
 
         Parameters:
             save_id (int): The ID of the save to update.
             name (str): The new name for the save.
-            value (str): The new value to store.
+            value (bytes): The new value to store.
 
         Returns:
             bool: True if the update was successful, False otherwise.
         """
         update_query = 'UPDATE saves SET Name = ?, Value = ? WHERE SaveId = ?'
         cursor = self.connection.execute(update_query, (name, value, save_id))
-        self.connection.commit()
+        self._commit()
         return cursor.rowcount > 0
 
-    def tableSaves_GetSave(self, save_id: int) -> str | None:
+    def tableSaves_GetSave(self, save_id: int) -> bytes | None:
         """
         Retrieves the saved value for a given save ID.
 
@@ -163,9 +708,58 @@ class DBManager:
             save_id (int): The ID of the save record.
 
         Returns:
-            str | None: The saved value string, or None if not found.
+            bytes | None: The saved value, or None if not found.
         """
         query = 'SELECT Value FROM saves WHERE SaveId = ?'
-        cursor = self.connection.execute(query, (save_id,))
+        cursor = self.read_connection.execute(query, (save_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def tableSaves_GetSaveByName(self, name: str) -> bytes | None:
+        """
+        Retrieves the saved value for a given save name.
+
+        Parameters:
+            name (str): The name of the save record.
+
+        Returns:
+            bytes | None: The saved value, or None if not found.
+        """
+        query = 'SELECT Value FROM saves WHERE Name = ?'
+        cursor = self.read_connection.execute(query, (name,))
         row = cursor.fetchone()
-        return row[0] if row else None
\ No newline at end of file
+        return row[0] if row else None
+
+    def tableSaves_SetSave(self, name: str, value: bytes) -> bool:
+        """
+        Stores a value under the given save name.
+        Updates the existing record or inserts a new one if the name does not exist yet.
+
+        Parameters:
+            name (str): The name of the save record.
+            value (bytes): The value to store.
+
+        Returns:
+            bool: True if the value was stored, False otherwise.
+        """
+        update_query = 'UPDATE saves SET Value = ? WHERE Name = ?'
+        cursor = self.connection.execute(update_query, (value, name))
+        if cursor.rowcount == 0:
+            insert_query = 'INSERT INTO saves (Name, Value) VALUES (?, ?)'
+            cursor = self.connection.execute(insert_query, (name, value))
+        self._commit()
+        return cursor.rowcount > 0
+
+    def tableSaves_DeleteSave(self, name: str) -> bool:
+        """
+        Deletes a save record by name.
+
+        Parameters:
+            name (str): The name of the save record.
+
+        Returns:
+            bool: True if a record was deleted, False otherwise.
+        """
+        cursor = self.connection.execute('DELETE FROM saves WHERE Name = ?', (name,))
+        self._commit()
+        return cursor.rowcount > 0
@@ -1,98 +1,441 @@
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 from cryptography.hazmat.primitives import hashes
 from base64 import b64encode, b64decode
 from Backend.ProgramSettings import ProgramSettings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import hmac
 import os
+import threading
+import time
 
 class Encryption:
-    def __init__(self):
-        # Generate a 32-byte (256-bit) AES key from a password using PBKDF2
-        # We use a password instead of a randomly generated key so that the key can be consistently recreated when needed.
-        # the password is saved in ProgramSettings.CRYPT_KEY
-
-        # Derive a secure key using PBKDF2 (Password-Based Key Derivation Function 2)
-        # This allows for secure transformation of a password into a fixed-length cryptographic key.
-        self.kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),              # Secure hashing algorithm used in key derivation
-            length=32,                              # Length of the AES key: 32 bytes = 256 bits
-            salt=b"bd5kqV<5/|N?hyY!AK(9[:-eF.3h",   # Fixed 28-string-salt-value ensures the same key is derived each time for this password
-            iterations=100000,                      # Number of iterations increases computation cost to resist brute-force attacks
-            backend=default_backend()               # Default backend provides cryptographic primitives
-        )
-        
-        self.key = self.kdf.derive(ProgramSettings.CRYPT_KEY.encode('utf-8'))  # Derive the AES key from the password and salt using PBKDF2
+    DEFAULT_SALT = b"bd5kqV<5/|N?hyY!AK(9[:-eF.3h"   # Fixed 28-string-salt-value ensures the same key is derived each time for this password
+    DEFAULT_ITERATIONS = 100000                      # Number of iterations increases computation cost to resist brute-force attacks
+    KDF_PBKDF2 = "pbkdf2-sha256"                     # Key derivation functions supported by DeriveKey
+    KDF_SCRYPT = "scrypt"
+    SCRYPT_MIN_N = 2 ** 14                           # Lower / upper bound of the scrypt cost factor (memory: 128 * N * r bytes)
+    SCRYPT_MAX_N = 2 ** 17
+    SCRYPT_R = 8                                     # scrypt block size
+    SCRYPT_P = 1                                     # scrypt parallelization
+    SALT_SIZE = 16                                   # Size of the random per-vault salt in bytes
+    KEY_CACHE_SIZE = 8                               # Max number of derived keys kept in the key cache
+    PARALLEL_MIN_BATCH = 512                         # Batches below this size are not split across threads
+    MAX_WORKERS = os.cpu_count() or 1                # Number of threads used by EncryptMany / DecryptMany
+    FORMAT_VERSION = 2                               # Header byte of the current ciphertext format (AES-256-GCM)
+    LEGACY_FORMAT_VERSION = 1                        # Header byte of old AES-256-CBC values, added by DBManager._MigrateToBlob
+    NONCE_SIZE = 12                                  # Size of the AES-GCM nonce in bytes
+    TAG_SIZE = 16                                    # Size of the AES-GCM authentication tag in bytes
+    FINGERPRINT_SIZE = 16                            # Size of a password fingerprint (truncated HMAC-SHA256) in bytes
 
-    # Encrypt function
-    def Encrypt(self, message: str) -> str:
+    # Cache of derived keys: (sha256(password), algorithm, salt, cost parameters) -> key, least recently used first
+    _key_cache = OrderedDict()
+    _key_cache_lock = threading.Lock()
+
+    def __init__(self, key: str | bytes | None = None):
+        """
+        Initializes the Encryption with an AES key.
+
+        Args:
+            key (str | bytes | None): Either a crypt key (password) the AES key is derived from,
+                                      or a raw 32-byte AES key (e.g. the random data key of the vault).
+                                      Defaults to the password saved in ProgramSettings.CRYPT_KEY.
+        """
+        if key is None:
+            key = ProgramSettings.CRYPT_KEY
+        if isinstance(key, str):
+            key = self.DeriveKey(key)
+        self.key = key
+
+    @property
+    def key(self) -> bytes:
+        return self._key
+
+    @key.setter
+    def key(self, key: bytes):
+        # Prepare the AES key material once, it is reused by every Encrypt / Decrypt call
+        self._key = key
+        self._aesgcm = AESGCM(key)
+        self._algorithm = algorithms.AES(key)  # Only used for old AES-CBC values
+        # Separate HMAC key for Fingerprint, so the AES key itself is never used for two purposes
+        self._fingerprint_key = hmac.digest(key, b"password-fingerprint", "sha256")
+
+    @classmethod
+    def DeriveKey(cls, password: str, salt: bytes = DEFAULT_SALT, iterations: int = DEFAULT_ITERATIONS,
+                  algorithm: str = KDF_PBKDF2, n: int = SCRYPT_MIN_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> bytes:
         """
-        Encrypts a UTF-8 string using AES-256 in CBC mode with PKCS7 padding.
+        Derives a 32-byte (256-bit) AES key from a password using PBKDF2 or scrypt.
 
-        The function derives a 256-bit AES key from a predefined password and salt using PBKDF2,
-        then uses a randomly generated IV (Initialization Vector) for each encryption to ensure 
-        ciphertext uniqueness. The IV and ciphertext are combined and base64 encoded for easy storage or transmission.
+        We use a password instead of a randomly generated key so that the key can be consistently recreated when needed.
+        Derived keys are kept in a small key cache, so the expensive derivation only runs once per
+        (password, algorithm, salt, cost parameters). The least recently used key is evicted when the cache is full.
+        The returned key is a copy: evicting or clearing the cache does not remove it from the caller
+        (or from an Encryption using it, see ClearKeyCache).
+        The parameters can be passed as dict from CalibrateKdf: DeriveKey(password, **kdf_params)
 
         Args:
-            message (str): The plaintext message to encrypt.
+            password (str): The password to derive the key from.
+            salt (bytes): The salt for the derivation.
+            iterations (int): The number of PBKDF2 iterations (only used for KDF_PBKDF2).
+            algorithm (str): The key derivation function, KDF_PBKDF2 or KDF_SCRYPT.
+            n (int): The scrypt cost factor, a power of 2 (only used for KDF_SCRYPT).
+            r (int): The scrypt block size (only used for KDF_SCRYPT).
+            p (int): The scrypt parallelization (only used for KDF_SCRYPT).
 
         Returns:
-            str: The base64-encoded string containing the IV and ciphertext.
+            bytes: The derived 32-byte key.
         """
-        
-        # Convert string to bytes, since encryption operates on bytes, not text
-        data = message.encode('utf-8')
 
-        # Pad the data to be a multiple of 16 bytes (AES block size is 128 bits or 16 bytes)
-        padder = padding.PKCS7(128).padder()  # PKCS7 padding is standard for block ciphers
-        padded_data = padder.update(data) + padder.finalize()  # Apply padding to the message
+        cache_key = cls._KeyCacheKey(password, salt, iterations, algorithm, n, r, p)
+        with cls._key_cache_lock:
+            cached_key = cls._key_cache.get(cache_key)
+            if cached_key is not None:
+                cls._key_cache.move_to_end(cache_key)
+                return bytes(cached_key)
 
-        # Generate a random 16-byte IV (Initialization Vector)
-        # IV adds randomness to encryption to prevent repeated patterns
-        iv = os.urandom(16)
+        key = cls._RunKdf(password.encode('utf-8'), salt, iterations, algorithm, n, r, p)
 
-        # Create AES cipher in CBC (Cipher Block Chaining) mode
-        cipher = Cipher(algorithms.AES(self.key), modes.CBC(iv), backend=default_backend())
-        encryptor = cipher.encryptor()
+        with cls._key_cache_lock:
+            cls._key_cache[cache_key] = bytearray(key)
+            cls._key_cache.move_to_end(cache_key)
+            while len(cls._key_cache) > cls.KEY_CACHE_SIZE:
+                _, evicted_key = cls._key_cache.popitem(last=False)
+                cls._Zeroize(evicted_key)
+        return key
 
-        # Encrypt the padded data
-        ciphertext = encryptor.update(padded_data) + encryptor.finalize()
+    @classmethod
+    def CalibrateKdf(cls, target_seconds: float, algorithm: str = KDF_SCRYPT) -> dict:
+        """
+        Benchmarks the key derivation on this computer and chooses the cost parameters
+        so one derivation takes about target_seconds. A new random salt is generated.
 
-        # Return the IV + ciphertext, base64 encoded for transmission/storage as text
-        return b64encode(iv + ciphertext).decode('utf-8')
+        The cost never goes below DEFAULT_ITERATIONS (PBKDF2) or SCRYPT_MIN_N (scrypt),
+        so slow computers are not weaker than before. scrypt is limited to SCRYPT_MAX_N to bound the memory use.
 
-    # Decrypt function
-    def Decrypt(self, encryptedMessage: str) -> str:
+        Args:
+            target_seconds (float): The wanted duration of one key derivation (e.g. 0.3 for 300 ms).
+            algorithm (str): The key derivation function, KDF_PBKDF2 or KDF_SCRYPT.
+
+        Returns:
+            dict: The KDF parameters (algorithm, salt and cost), to be passed to DeriveKey(password, **kdf_params).
+        """
+
+        salt = os.urandom(cls.SALT_SIZE)
+        if algorithm == cls.KDF_SCRYPT:
+            # The duration of scrypt grows linear with N, N must be a power of 2
+            elapsed = cls._TimeKdf(salt, cls.DEFAULT_ITERATIONS, algorithm, cls.SCRYPT_MIN_N)
+            n = cls.SCRYPT_MIN_N
+            while n < cls.SCRYPT_MAX_N and elapsed * (n * 2) / cls.SCRYPT_MIN_N <= target_seconds:
+                n *= 2
+            return {"algorithm": algorithm, "salt": salt, "n": n, "r": cls.SCRYPT_R, "p": cls.SCRYPT_P}
+
+        if algorithm == cls.KDF_PBKDF2:
+            # The duration of PBKDF2 grows linear with the iterations
+            probe_iterations = 10000
+            elapsed = cls._TimeKdf(salt, probe_iterations, algorithm, cls.SCRYPT_MIN_N)
+            iterations = round(probe_iterations * target_seconds / elapsed, -3)
+            return {"algorithm": algorithm, "salt": salt, "iterations": max(cls.DEFAULT_ITERATIONS, iterations)}
+
+        raise ValueError(f"Unknown key derivation function: {algorithm}")
+
+    @classmethod
+    def _TimeKdf(cls, salt: bytes, iterations: int, algorithm: str, n: int) -> float:
+        # Duration of one key derivation in seconds
+        start = time.perf_counter()
+        cls._RunKdf(b"calibration", salt, iterations, algorithm, n, cls.SCRYPT_R, cls.SCRYPT_P)
+        return max(time.perf_counter() - start, 1e-6)
+
+    @classmethod
+    def _RunKdf(cls, password: bytes, salt: bytes, iterations: int, algorithm: str, n: int, r: int, p: int) -> bytes:
+        if algorithm == cls.KDF_SCRYPT:
+            # scrypt is memory-hard, which makes brute-force attacks on GPUs expensive
+            return Scrypt(salt=salt, length=32, n=n, r=r, p=p, backend=default_backend()).derive(password)
+
+        if algorithm == cls.KDF_PBKDF2:
+            # Derive a secure key using PBKDF2 (Password-Based Key Derivation Function 2)
+            # This allows for secure transformation of a password into a fixed-length cryptographic key.
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),              # Secure hashing algorithm used in key derivation
+                length=32,                              # Length of the AES key: 32 bytes = 256 bits
+                salt=salt,
+                iterations=iterations,
+                backend=default_backend()               # Default backend provides cryptographic primitives
+            )
+            return kdf.derive(password)
+
+        raise ValueError(f"Unknown key derivation function: {algorithm}")
+
+    @classmethod
+    def EvictKey(cls, password: str, salt: bytes = DEFAULT_SALT, iterations: int = DEFAULT_ITERATIONS,
+                 algorithm: str = KDF_PBKDF2, n: int = SCRYPT_MIN_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> bool:
+        """
+        Removes the derived key of a password from the key cache, so it is not handed out again.
+        The copy in the cache is overwritten with zeros (copies held elsewhere are not, see ClearKeyCache).
+
+        Args:
+            password (str): The password the key was derived from.
+            salt, iterations, algorithm, n, r, p: The KDF parameters of the derivation (see DeriveKey).
+
+        Returns:
+            bool: True if a cached key was removed, False otherwise.
+        """
+        with cls._key_cache_lock:
+            evicted_key = cls._key_cache.pop(cls._KeyCacheKey(password, salt, iterations, algorithm, n, r, p), None)
+        if evicted_key is None:
+            return False
+        cls._Zeroize(evicted_key)
+        return True
+
+    @classmethod
+    def ClearKeyCache(cls):
+        """
+        Removes all derived keys from the key cache (e.g. on logout), so they are not handed out again.
+
+        Only the copies in the cache are overwritten with zeros. Copies returned by DeriveKey, the keys of
+        Encryption instances and the key schedules inside 'cryptography' / OpenSSL objects are not: Python
+        gives no control over them, they are freed when the last reference is dropped. To get rid of a key,
+        drop (or re-key, see SetKey) the Encryption instances that use it.
+        """
+        with cls._key_cache_lock:
+            for cached_key in cls._key_cache.values():
+                cls._Zeroize(cached_key)
+            cls._key_cache.clear()
+
+    @classmethod
+    def _KeyCacheKey(cls, password: str, salt: bytes, iterations: int, algorithm: str, n: int, r: int, p: int) -> tuple:
+        # Only a hash of the password is kept as cache key, never the password itself
+        password_hash = hashlib.sha256(password.encode('utf-8')).digest()
+        if algorithm == cls.KDF_SCRYPT:
+            return password_hash, algorithm, salt, n, r, p
+        return password_hash, algorithm, salt, iterations
+
+    @staticmethod
+    def _Zeroize(key: bytearray):
+        # Overwrite the cached copy of the key in place, so this copy does not stay in memory after it was dropped
+        for i in range(len(key)):
+            key[i] = 0
+
+    @staticmethod
+    def GenerateKey() -> bytes:
+        """
+        Generates a random 32-byte (256-bit) AES key, used as data key of the vault.
+
+        Returns:
+            bytes: The random key.
+        """
+        return os.urandom(32)
+
+    def SetKey(self, key: bytes):
+        """
+        Replaces the AES key used by Encrypt and Decrypt.
+
+        Args:
+            key (bytes): The new 32-byte key.
+        """
+        self.key = key
+
+    def WrapKey(self, key: bytes) -> bytes:
+        """
+        Encrypts another AES key with the key of this instance (envelope encryption).
+
+        Args:
+            key (bytes): The key to wrap.
+
+        Returns:
+            bytes: The wrapped key, ready to store in the database.
+        """
+        return self.Encrypt(b64encode(key).decode('utf-8'))
+
+    def UnwrapKey(self, wrappedKey: bytes | str) -> bytes:
+        """
+        Decrypts a key that was wrapped with WrapKey.
+
+        Args:
+            wrappedKey (bytes | str): The wrapped key.
+
+        Returns:
+            bytes: The unwrapped key.
+        """
+        return b64decode(self.Decrypt(wrappedKey))
+
+    def Fingerprint(self, message: str) -> bytes:
+        """
+        Computes a keyed fingerprint (HMAC-SHA256) of a message, e.g. to find reused passwords.
+
+        Equal messages give equal fingerprints under the same key, so fingerprints can be compared
+        and grouped in the database without decrypting anything. Without the key they reveal nothing
+        about the message (unlike a plain hash, they cannot be looked up in breach lists).
+
+        Args:
+            message (str): The plaintext message.
+
+        Returns:
+            bytes: The FINGERPRINT_SIZE-byte fingerprint.
+        """
+        return hmac.digest(self._fingerprint_key, message.encode('utf-8'), "sha256")[:self.FINGERPRINT_SIZE]
+
+    # Encrypt function
+    def Encrypt(self, message: str) -> bytes:
+        """
+        Encrypts a UTF-8 string using AES-256 in GCM mode.
+
+        Args:
+            message (str): The plaintext message to encrypt.
+
+        Returns:
+            bytes: The raw encrypted message (see EncryptBytes), ready to store in a BLOB column.
         """
-        Decrypts a base64-encoded string that was encrypted with AES-256 in CBC mode.
+        return self.EncryptBytes(message.encode('utf-8'))
 
-        This function expects the input to contain the concatenated IV and ciphertext,
-        base64-encoded. It decodes the input, extracts the IV, decrypts the ciphertext,
-        and removes PKCS7 padding to return the original plaintext.
+    # Decrypt function
+    def Decrypt(self, encryptedMessage: bytes | str) -> str:
+        """
+        Decrypts a message that was encrypted with Encrypt.
 
         Args:
-            encryptedMessage (str): The base64-encoded encrypted message containing IV and ciphertext.
+            encryptedMessage (bytes | str): The raw encrypted message. Base64 strings
+                                            (the text format used by older versions) are also accepted,
+                                            they always hold an old AES-256-CBC value without version byte.
 
         Returns:
             str: The decrypted plaintext message.
+
+        Raises:
+            cryptography.exceptions.InvalidTag: If the message was changed or the key is wrong.
         """
-        
-        # Decode the base64-encoded input to raw bytes
-        raw_data = b64decode(encryptedMessage)
+        if isinstance(encryptedMessage, str):
+            return self._DecryptLegacy(b64decode(encryptedMessage)).decode('utf-8')
+        return self.DecryptBytes(encryptedMessage).decode('utf-8')
+
+    def EncryptBytes(self, data: bytes) -> bytes:
+        """
+        Encrypts raw bytes using AES-256 in GCM mode.
+
+        A randomly generated nonce is used for each encryption to ensure ciphertext uniqueness.
+        GCM needs no padding and adds an authentication tag, so any change of the ciphertext is detected.
+        The result has the format:
+        version byte (FORMAT_VERSION) + nonce + ciphertext + tag
+
+        Args:
+            data (bytes): The plaintext bytes to encrypt.
+
+        Returns:
+            bytes: The version, nonce, ciphertext and tag.
+        """
+
+        # Generate a random 12-byte nonce, it must never be reused with the same key
+        nonce = os.urandom(self.NONCE_SIZE)
+        header = bytes([self.FORMAT_VERSION])
+
+        # Encrypt the data, the header is authenticated as associated data
+        return header + nonce + self._aesgcm.encrypt(nonce, data, header)
+
+    def DecryptBytes(self, raw_data: bytes) -> bytes:
+        """
+        Decrypts raw bytes that were encrypted with EncryptBytes.
+
+        The format is chosen by the version byte at the start. Values with LEGACY_FORMAT_VERSION were
+        encrypted with AES-256 in CBC mode by older versions (the version byte was added by the database
+        migration) and are still decrypted. They are upgraded to the current format the next time they are written.
+        A FORMAT_VERSION value is only ever decrypted with GCM, so a changed value is always rejected.
+
+        Args:
+            raw_data (bytes): The encrypted bytes.
+
+        Returns:
+            bytes: The decrypted plaintext bytes.
+
+        Raises:
+            cryptography.exceptions.InvalidTag: If the data was changed (including its version byte) or the key is wrong.
+        """
+
+        version = raw_data[:1]
+        if version == bytes([self.FORMAT_VERSION]):
+            if len(raw_data) < 1 + self.NONCE_SIZE + self.TAG_SIZE:
+                raise InvalidTag()
+            nonce = raw_data[1:1 + self.NONCE_SIZE]
+            return self._aesgcm.decrypt(nonce, raw_data[1 + self.NONCE_SIZE:], version)
+
+        if version == bytes([self.LEGACY_FORMAT_VERSION]):
+            return self._DecryptLegacy(raw_data[1:])
+
+        raise InvalidTag()  # Unknown version byte
+
+    def IsCurrentFormat(self, encryptedMessage: bytes | str) -> bool:
+        """
+        Checks if an encrypted message already uses the current format (FORMAT_VERSION).
+
+        Args:
+            encryptedMessage (bytes | str): The encrypted message.
+
+        Returns:
+            bool: True if the message is raw bytes starting with the current version byte, False for old values.
+        """
+        return isinstance(encryptedMessage, bytes) and encryptedMessage[:1] == bytes([self.FORMAT_VERSION])
+
+    def _DecryptLegacy(self, raw_data: bytes) -> bytes:
+        # Decrypt an old value: 16-byte IV + AES-256-CBC ciphertext with PKCS7 padding
 
         # Extract IV (first 16 bytes) and ciphertext (remaining bytes)
         iv = raw_data[:16]  # IV must be used exactly as it was during encryption
         ciphertext = raw_data[16:]  # The actual encrypted content
 
         # Create AES cipher in CBC mode using the same key and extracted IV
-        cipher = Cipher(algorithms.AES(self.key), modes.CBC(iv), backend=default_backend())
+        cipher = Cipher(self._algorithm, modes.CBC(iv), backend=default_backend())
         decryptor = cipher.decryptor()
 
         # Decrypt the ciphertext and then remove the padding
         padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
         unpadder = padding.PKCS7(128).unpadder()  # Remove the padding after decryption
-        plaintext = unpadder.update(padded_plaintext) + unpadder.finalize()
+        return unpadder.update(padded_plaintext) + unpadder.finalize()
+
+    def EncryptMany(self, messages: list[str]) -> list[bytes]:
+        """
+        Encrypts several messages with Encrypt.
+
+        Large batches are split into chunks that are encrypted in parallel threads
+        (OpenSSL releases the GIL while encrypting).
+
+        Args:
+            messages (list[str]): The plaintext messages to encrypt.
+
+        Returns:
+            list[bytes]: The encrypted messages, in the same order.
+        """
+        return self._MapParallel(self.Encrypt, messages)
+
+    def DecryptMany(self, encryptedMessages: list[bytes]) -> list[str]:
+        """
+        Decrypts several messages with Decrypt.
+
+        Large batches are split into chunks that are decrypted in parallel threads
+        (OpenSSL releases the GIL while decrypting).
+
+        Args:
+            encryptedMessages (list[bytes]): The encrypted messages.
+
+        Returns:
+            list[str]: The decrypted plaintext messages, in the same order.
+        """
+        return self._MapParallel(self.Decrypt, encryptedMessages)
+
+    def _MapParallel(self, function, items: list) -> list:
+        # Small batches: the thread overhead would be bigger than the gain
+        items = list(items)
+        workers = min(self.MAX_WORKERS, len(items) // self.PARALLEL_MIN_BATCH)
+        if workers <= 1:
+            return [function(item) for item in items]
 
-        # Decode bytes back to UTF-8 string and return
-        return plaintext.decode('utf-8')
\ No newline at end of file
+        # One chunk per worker keeps the per-task overhead low
+        chunk_size = -(-len(items) // workers)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda chunk: [function(item) for item in chunk], chunks)
+            return [result for chunk_result in results for result in chunk_result]
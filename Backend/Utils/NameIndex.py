@@ -0,0 +1,134 @@
+import bisect
+from typing import Iterable
+
+
+class NameIndex:
+    """
+    In-memory sorted index of the names (sites) of the vault, for the password list and its search box.
+
+    The names are kept sorted case-insensitively, so a name is added or removed with a binary search
+    (and one list insert / delete) instead of sorting the list again, and a prefix lookup is a binary search.
+    Substring searches scan the names once. While the user is typing, the query usually grows,
+    so each search only scans the matches of the previous query.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Builds the index.
+
+        Args:
+            names (Iterable[str]): The initial names.
+        """
+        entries = sorted((name.casefold(), name) for name in names)
+        self._keys = [key for key, _ in entries]   # Case-folded names, sorted
+        self._names = [name for _, name in entries]  # Names in the same order
+        self._last_query = None
+        self._last_matches = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return self.IndexOf(name) is not None
+
+    def __getitem__(self, index: int) -> str:
+        return self._names[index]
+
+    def IndexOf(self, name: str) -> int | None:
+        """
+        Returns the position of a name in the sorted order.
+
+        Args:
+            name (str): The name.
+
+        Returns:
+            int | None: The position, or None if the name is not in the index.
+        """
+        key = name.casefold()
+        index = bisect.bisect_left(self._keys, key)
+        while index < len(self._keys) and self._keys[index] == key:
+            if self._names[index] == name:
+                return index
+            index += 1
+        return None
+
+    def Add(self, name: str) -> int:
+        """
+        Adds a name.
+
+        Args:
+            name (str): The name.
+
+        Returns:
+            int: The position of the new name in the sorted order.
+        """
+        key = name.casefold()
+        index = bisect.bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self._names.insert(index, name)
+        self._last_query = self._last_matches = None
+        return index
+
+    def Remove(self, name: str) -> int | None:
+        """
+        Removes a name.
+
+        Args:
+            name (str): The name.
+
+        Returns:
+            int | None: The former position of the name, or None if the name is not in the index.
+        """
+        index = self.IndexOf(name)
+        if index is not None:
+            del self._keys[index]
+            del self._names[index]
+            self._last_query = self._last_matches = None
+        return index
+
+    def FindPrefix(self, prefix: str) -> list[str]:
+        """
+        Returns the names that start with a prefix (case-insensitive), in sorted order.
+
+        Args:
+            prefix (str): The prefix.
+
+        Returns:
+            list[str]: The matching names.
+        """
+        start, end = self._PrefixRange(prefix.casefold())
+        return self._names[start:end]
+
+    def Find(self, query: str) -> list[str]:
+        """
+        Returns the names that contain a query (case-insensitive). Names that start with the query come first,
+        then the other matches, each part in sorted order. An empty query returns all names.
+
+        Args:
+            query (str): The search text.
+
+        Returns:
+            list[str]: The matching names.
+        """
+        query = query.casefold()
+        if not query:
+            return list(self._names)
+
+        # Matches of a longer query are a subset of the matches of the previous one
+        if self._last_query is not None and self._last_query in query:
+            candidates = self._last_matches
+        else:
+            candidates = range(len(self._keys))
+        keys = self._keys
+        matches = [index for index in candidates if query in keys[index]]
+        self._last_query, self._last_matches = query, matches
+
+        start, end = self._PrefixRange(query)
+        names = self._names
+        return names[start:end] + [names[index] for index in matches if not start <= index < end]
+
+    def _PrefixRange(self, key_prefix: str) -> tuple[int, int]:
+        # Positions of the keys that start with key_prefix: all keys between key_prefix and key_prefix + max char
+        start = bisect.bisect_left(self._keys, key_prefix)
+        end = bisect.bisect_left(self._keys, key_prefix + "\U0010ffff", start)
+        return start, end
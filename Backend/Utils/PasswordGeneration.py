@@ -1,22 +1,221 @@
-import string
+import math
+import os
 import secrets
+import string
+import threading
+from typing import NamedTuple
+
+from Backend.Utils.Wordlist import Wordlist
+from Backend.ProgramSettings import ProgramSettings
+
+
+class PasswordPolicy(NamedTuple):
+    """
+    Rules for generated passwords.
+
+    character_classes (tuple[str, ...]): Every generated password contains at least one character of each class.
+                                         The alphabet of the password is the union of all classes.
+    excluded (str): Characters that are never used, e.g. ambiguous ones like "Il1O0".
+    """
+    character_classes: tuple[str, ...] = (string.ascii_uppercase, string.ascii_lowercase,
+                                          string.digits, string.punctuation)
+    excluded: str = ""
+
+
+class Passphrase(NamedTuple):
+    """
+    Result of PasswordGeneration.GeneratePassphrase.
+
+    passphrase (str): The generated passphrase.
+    entropy_bits (float): The entropy of the passphrase in bits, for an attacker who knows the word list and settings.
+    weak (bool): True if entropy_bits is below PasswordGeneration.MIN_PASSPHRASE_ENTROPY_BITS
+                 (too few words were requested for the word list).
+    """
+    passphrase: str
+    entropy_bits: float
+    weak: bool
+
+
+class _CharacterStream:
+    """
+    Unbiased random characters of an alphabet (at most 256 single-byte characters).
+
+    Random bytes are read from os.urandom in one block per request (plus a small margin for the rejected bytes)
+    and mapped to the alphabet with one bytes.translate call:
+    a byte b becomes alphabet[b % len(alphabet)], bytes above the largest multiple of len(alphabet)
+    are rejected (deleted), since they would make the first characters more likely.
+    """
+
+    def __init__(self, alphabet: bytes):
+        limit = 256 - 256 % len(alphabet)
+        self._table = bytes(alphabet[byte % len(alphabet)] for byte in range(256))
+        self._rejected = bytes(range(limit, 256))
+        self._acceptance = limit / 256
+        self._buffer = b""
+
+    def Take(self, count: int) -> bytes:
+        # Returns count random characters of the alphabet
+        while len(self._buffer) < count:
+            missing = count - len(self._buffer)
+            block = os.urandom(int(missing / self._acceptance * 1.1) + 16)
+            self._buffer += block.translate(self._table, self._rejected)
+        result, self._buffer = self._buffer[:count], self._buffer[count:]
+        return result
+
+
 class PasswordGeneration:
     """
     A class used to generate secure random passwords.
     """
+
+    DEFAULT_POLICY = PasswordPolicy()  # Uppercase and lowercase letters, digits and punctuation
+    PASSPHRASE_WORDS = 6               # Minimum default number of words of a passphrase
+    MIN_PASSPHRASE_ENTROPY_BITS = 77   # Entropy of the default passphrase (6 words of the EFF list: 77.5 bits)
+
+    # Capitalization of the words of a passphrase
+    CAPITALIZE_NONE = "none"      # all words lowercase
+    CAPITALIZE_WORDS = "words"    # every word starts with an uppercase letter
+    CAPITALIZE_RANDOM = "random"  # every word is randomly capitalized or not (one more bit of entropy per word)
+
+    # Word list of GeneratePassphrase, opened on first use and shared by all calls
+    _wordlist = None
+    _wordlist_lock = threading.Lock()
+
     @staticmethod
-    def Generate(length):
+    def Generate(length: int, policy: PasswordPolicy = DEFAULT_POLICY) -> str:
         """
-        Generate a secure random password containing letters, digits, and punctuation.
+        Generate a secure random password containing letters, digits, and punctuation
+        (at least one character of each class of the policy).
+
         Parameters:
         length (int): The desired length of the generated password.
+        policy (PasswordPolicy): The character classes and excluded characters.
+
         Returns:
         str: A randomly generated password string of the specified length.
         """
-        # Define the character pool: uppercase, lowercase letters, digits and punctuation
-        characters = string.ascii_letters + string.digits + string.punctuation
-        
-        # Use secrets.choice for cryptographically secure random selection
-        password = ''.join(secrets.choice(characters) for _ in range(length))
-        
-        return password
\ No newline at end of file
+        return PasswordGeneration.GenerateMany(1, length, policy)[0]
+
+    @staticmethod
+    def GenerateMany(count: int, length: int, policy: PasswordPolicy = DEFAULT_POLICY) -> list[str]:
+        """
+        Generate many secure random passwords at once, e.g. to replace every password of a vault.
+
+        Each password gets one random character of every character class at random distinct positions,
+        all other positions get random characters of the whole alphabet. This is the same as shuffling
+        the class characters into the password, so every class is contained by construction and no password
+        has to be generated again. The randomness is read from os.urandom in large blocks and mapped to the
+        characters by rejection sampling (see _CharacterStream), so every character is equally likely.
+
+        Parameters:
+        count (int): The number of passwords.
+        length (int): The length of each password.
+        policy (PasswordPolicy): The character classes and excluded characters.
+
+        Returns:
+        list[str]: The generated passwords.
+
+        Raises:
+        ValueError: If the policy has an empty class (after the exclusions), characters that are not
+                    single bytes (latin-1), or more classes than the length.
+        """
+        classes = [PasswordGeneration._ToAlphabet(character_class, policy.excluded)
+                   for character_class in policy.character_classes]
+        if not classes or not all(classes):
+            raise ValueError("Every character class of the policy needs at least one character")
+        if length < len(classes):
+            raise ValueError(f"A password with {len(classes)} character classes needs at least "
+                             f"{len(classes)} characters")
+        alphabet = bytes(dict.fromkeys(b"".join(classes)))  # Union of the classes, every character once
+
+        # One character per class and password, in the order of the classes
+        class_characters = [_CharacterStream(character_class).Take(count) for character_class in classes]
+        # Distinct positions of the class characters: the first steps of a Fisher-Yates shuffle
+        position_draws = [PasswordGeneration._RandomBelow(length - i, count) for i in range(len(classes))]
+        characters = _CharacterStream(alphabet).Take(count * length)
+
+        passwords = []
+        for index in range(count):
+            password = bytearray(characters[index * length:(index + 1) * length])
+            positions = list(range(length))
+            for class_index in range(len(classes)):
+                swap = class_index + position_draws[class_index][index]
+                positions[class_index], positions[swap] = positions[swap], positions[class_index]
+                password[positions[class_index]] = class_characters[class_index][index]
+            passwords.append(password.decode("latin-1"))
+        return passwords
+
+    @staticmethod
+    def GeneratePassphrase(word_count: int | None = None, separator: str = "-",
+                           capitalization: str = CAPITALIZE_NONE, wordlist: Wordlist | None = None) -> Passphrase:
+        """
+        Generate a diceware passphrase: random words of a word list, joined by a separator.
+
+        Every word is read from the memory-mapped word list by a random index (secrets.randbelow),
+        so a passphrase costs a few microseconds and the list is never loaded.
+
+        Parameters:
+        word_count (int | None): The number of words. Defaults to PASSPHRASE_WORDS, or more if needed to reach
+                                 MIN_PASSPHRASE_ENTROPY_BITS with the word list (e.g. 10 words of the small bundled list).
+        separator (str): The string between the words.
+        capitalization (str): CAPITALIZE_NONE, CAPITALIZE_WORDS or CAPITALIZE_RANDOM.
+        wordlist (Wordlist | None): The word list, defaults to ProgramSettings.PASSPHRASE_WORDLIST_PATH
+                                    (or the small bundled list if that file does not exist).
+
+        Returns:
+        Passphrase: The passphrase and its entropy (word_count * log2(number of words), plus one bit
+                    per word for CAPITALIZE_RANDOM). With an empty separator, words can run together,
+                    so the entropy is an upper bound. It is marked as weak if a given word_count is too small
+                    for MIN_PASSPHRASE_ENTROPY_BITS.
+        """
+        if capitalization not in (PasswordGeneration.CAPITALIZE_NONE, PasswordGeneration.CAPITALIZE_WORDS,
+                                  PasswordGeneration.CAPITALIZE_RANDOM):
+            raise ValueError(f"Unknown capitalization: {capitalization}")
+        if wordlist is None:
+            wordlist = PasswordGeneration._GetWordlist()
+        if len(wordlist) == 0:
+            raise ValueError("The word list is empty")
+
+        entropy_per_word = wordlist.entropy_per_word
+        if capitalization == PasswordGeneration.CAPITALIZE_RANDOM:
+            entropy_per_word += 1
+        if word_count is None:
+            minimum_words = math.ceil(PasswordGeneration.MIN_PASSPHRASE_ENTROPY_BITS / entropy_per_word) \
+                if entropy_per_word > 0 else PasswordGeneration.PASSPHRASE_WORDS
+            word_count = max(PasswordGeneration.PASSPHRASE_WORDS, minimum_words)
+
+        words = []
+        for _ in range(word_count):
+            word = wordlist.GetWord(secrets.randbelow(len(wordlist)))
+            if capitalization == PasswordGeneration.CAPITALIZE_WORDS or \
+                    (capitalization == PasswordGeneration.CAPITALIZE_RANDOM and secrets.randbits(1)):
+                word = word[:1].upper() + word[1:]
+            words.append(word)
+
+        entropy_bits = word_count * entropy_per_word
+        return Passphrase(separator.join(words), entropy_bits,
+                          entropy_bits < PasswordGeneration.MIN_PASSPHRASE_ENTROPY_BITS)
+
+    @staticmethod
+    def _GetWordlist() -> Wordlist:
+        # Opens the word list on first use, so the program starts without touching it
+        with PasswordGeneration._wordlist_lock:
+            if PasswordGeneration._wordlist is None:
+                PasswordGeneration._wordlist = Wordlist.OpenIfExists(ProgramSettings.PASSPHRASE_WORDLIST_PATH)
+            return PasswordGeneration._wordlist
+
+    @staticmethod
+    def _ToAlphabet(characters: str, excluded: str) -> bytes:
+        # The characters without the excluded ones, every character once, as single bytes
+        try:
+            return bytes(dict.fromkeys(character for character in characters.encode("latin-1")
+                                       if chr(character) not in excluded))
+        except UnicodeEncodeError:
+            raise ValueError("Only single-byte (latin-1) characters are supported") from None
+
+    @staticmethod
+    def _RandomBelow(bound: int, count: int) -> list[int]:
+        # count unbiased random numbers in range(bound)
+        if bound <= 256:
+            return list(_CharacterStream(bytes(range(bound))).Take(count))
+        return [secrets.randbelow(bound) for _ in range(count)]
@@ -1,14 +1,79 @@
-import re                       # Import the regular expressions module
-from tkinter import messagebox  # Import messagebox for GUI notifications
+import string
+from typing import Iterable, NamedTuple
+
+from Backend.Utils.BreachedPasswords import BreachedPasswords
+from Backend.Utils.StrengthEstimator import StrengthEstimator
+
+
+class PasswordReport(NamedTuple):
+    """
+    Result of PasswordSafety.Analyze.
+
+    failed_rules (list[str]): The rules the password does not meet (PasswordSafety.RULE_*), in check order.
+    score (int): Strength of the password from 0 (empty) to 100 (long and all character classes).
+    guesses (float): Estimated number of guesses to find the password (see StrengthEstimator).
+    """
+    failed_rules: list[str]
+    score: int
+    guesses: float
+
+    @property
+    def is_safe(self) -> bool:
+        return not self.failed_rules
+
 
 class PasswordSafety:
     DEFAULT_INFO_HEAD = "Warnung"
     DEFAULT_INFO = "Dein Passwort ist nicht sicher genug!\n\n"
 
-    def Check(self, password: str) -> bool:
+    MIN_LENGTH = 8        # Minimum length of a safe password
+    SCORE_LENGTH = 16     # Passwords of this length get the full length score
+    MIN_STRENGTH_SCORE = 2         # Minimum StrengthEstimator score of a safe password (about 10^6 guesses)
+    PASSPHRASE_STRENGTH_SCORE = 3  # From this StrengthEstimator score on, the character classes are not required
+
+    # Rules of a safe password, in the order they are checked
+    RULE_LENGTH = "length"
+    RULE_UPPERCASE = "uppercase"
+    RULE_LOWERCASE = "lowercase"
+    RULE_DIGIT = "digit"
+    RULE_SPECIAL = "special"
+    RULE_GUESSABLE = "guessable"  # Dictionary words, keyboard walks, repeats, sequences or dates
+    RULE_BREACHED = "breached"  # Only checked with a list of breached passwords
+
+    # Character classes (uppercase, lowercase, digit, special) with the rule that requires them
+    CHARACTER_CLASSES = (
+        (RULE_UPPERCASE, frozenset(string.ascii_uppercase)),
+        (RULE_LOWERCASE, frozenset(string.ascii_lowercase)),
+        (RULE_DIGIT, frozenset(string.digits)),
+        (RULE_SPECIAL, frozenset("!@#$%^&*()_+-=[]{};:'\"\\|,.<>/?")),
+    )
+
+    # Warning shown by Check for each rule
+    RULE_MESSAGES = {
+        RULE_LENGTH: "Passwort zu kurz (mind. 8 Zeichen).",
+        RULE_UPPERCASE: "Mindestens ein Großbuchstabe fehlt.",
+        RULE_LOWERCASE: "Mindestens ein Kleinbuchstabe fehlt.",
+        RULE_DIGIT: "Mindestens eine Zahl fehlt.",
+        RULE_SPECIAL: "Mindestens ein Sonderzeichen fehlt.",
+        RULE_GUESSABLE: "Das Passwort ist leicht zu erraten (Wörter, Tastaturmuster, Wiederholungen oder Daten).",
+        RULE_BREACHED: "Das Passwort ist aus einem Datenleck bekannt.",
+    }
+
+    def __init__(self, breached_passwords: BreachedPasswords | None = None):
+        """
+        Initializes the PasswordSafety.
+
+        Parameters:
+        breached_passwords (BreachedPasswords | None): Optional list of breached passwords,
+                                                       passwords in this list fail RULE_BREACHED.
+        """
+        self.breached_passwords = breached_passwords
+        self.strength_estimator = StrengthEstimator()
+
+    def Analyze(self, password: str) -> PasswordReport:
         """
         Evaluates the strength of a given password based on common security criteria.
-        Also prints a messagebox (tkinter)
+        Does not show anything, so it can be used off the UI thread and for many passwords (see CheckMany).
 
         A strong password must meet all of the following requirements:
         - Minimum length of 8 characters
@@ -16,6 +81,56 @@ class PasswordSafety:
         - Contains at least one lowercase letter (a-z)
         - Contains at least one digit (0-9)
         - Contains at least one special character (e.g., !, @, #, etc.)
+        - Is not easy to guess (StrengthEstimator score of at least MIN_STRENGTH_SCORE)
+        - Is not in the list of breached passwords (only if one was passed in)
+
+        The character classes are not required for passwords that are hard to guess anyway (e.g. long passphrases
+        with a StrengthEstimator score of at least PASSPHRASE_STRENGTH_SCORE).
+        The characters are read once (into a set), every character class is then checked against this set.
+        The score gives up to 40 points for the length (full at SCORE_LENGTH characters)
+        and 15 points for each character class. A breached password always has the score 0.
+
+        Parameters:
+        password (str): The password string to be evaluated.
+
+        Returns:
+        PasswordReport: All failed rules and the score of the password.
+        """
+
+        estimate = self.strength_estimator.Estimate(password)
+        characters = set(password)
+        failed_rules = [self.RULE_LENGTH] if len(password) < self.MIN_LENGTH else []
+        score = 40 * min(len(password), self.SCORE_LENGTH) // self.SCORE_LENGTH
+        for rule, character_class in self.CHARACTER_CLASSES:
+            if not characters.isdisjoint(character_class):
+                score += 15
+            elif estimate.score < self.PASSPHRASE_STRENGTH_SCORE:
+                failed_rules.append(rule)
+        if estimate.score < self.MIN_STRENGTH_SCORE:
+            failed_rules.append(self.RULE_GUESSABLE)
+        if self.breached_passwords is not None and self.breached_passwords.Contains(password):
+            failed_rules.append(self.RULE_BREACHED)
+            score = 0
+        return PasswordReport(failed_rules, score, estimate.guesses)
+
+    def CheckMany(self, passwords: Iterable[str]) -> list[PasswordReport]:
+        """
+        Analyzes many passwords, e.g. all passwords of the vault:
+        passwordSafety.CheckMany(password for _, password in toolHelper.IterDecryptedPWList())
+
+        Parameters:
+        passwords (Iterable[str]): The passwords to be evaluated.
+
+        Returns:
+        list[PasswordReport]: The report of each password, in the same order.
+        """
+        return [self.Analyze(password) for password in passwords]
+
+    def Check(self, password: str) -> bool:
+        """
+        Evaluates the strength of a given password with Analyze (GUI adapter).
+        Also prints a messagebox (tkinter, only imported when a warning is shown, so the backend runs without Tk)
+        for the first failed rule.
 
         Parameters:
         password (str): The password string to be evaluated.
@@ -23,31 +138,13 @@ class PasswordSafety:
         Returns:
         bool: True if the password is strong, False otherwise.
         """
-        
-        # Check for minimum length
-        if len(password) < 8:
-            messagebox.showwarning(self.DEFAULT_INFO_HEAD, f"{self.DEFAULT_INFO} Passwort zu kurz (mind. 8 Zeichen).")
-            return False
-
-        # Check for at least one uppercase letter
-        if not re.search(r"[A-Z]", password):
-            messagebox.showwarning(self.DEFAULT_INFO_HEAD, f"{self.DEFAULT_INFO} Mindestens ein Großbuchstabe fehlt.")
-            return False
-
-        # Check for at least one lowercase letter
-        if not re.search(r"[a-z]", password):
-            messagebox.showwarning(self.DEFAULT_INFO_HEAD, f"{self.DEFAULT_INFO} Mindestens ein Kleinbuchstabe fehlt.")
-            return False
-
-        # Check for at least one digit
-        if not re.search(r"[0-9]", password):
-            messagebox.showwarning(self.DEFAULT_INFO_HEAD, f"{self.DEFAULT_INFO} Mindestens eine Zahl fehlt.")
-            return False
-
-        # Check for at least one special character
-        if not re.search(r"[!@#$%^&*()_+\-=\[\]{};:'\"\\|,.<>/?]", password):
-            messagebox.showwarning(self.DEFAULT_INFO_HEAD, f"{self.DEFAULT_INFO} Mindestens ein Sonderzeichen fehlt.")
-            return False
-        
-        # All checks passed; password is strong
-        return True
\ No newline at end of file
+
+        report = self.Analyze(password)
+        if not report.is_safe:
+            self._Warn(f"{self.DEFAULT_INFO} {self.RULE_MESSAGES[report.failed_rules[0]]}")
+        return report.is_safe
+
+    def _Warn(self, message: str):
+        # Import messagebox for GUI notifications only when it is needed
+        from tkinter import messagebox
+        messagebox.showwarning(self.DEFAULT_INFO_HEAD, message)
@@ -0,0 +1,153 @@
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Iterable
+
+
+class PasswordSimilarity:
+    """
+    Finds groups of similar passwords (near-duplicates like "Sommer2023!" and "sommer2024!") in a vault.
+
+    Comparing every pair of passwords would be O(n^2). Instead every password is normalized and split
+    into character n-grams, and a MinHash signature of the n-grams is computed. The signature is cut
+    into bands (locality-sensitive hashing): passwords that share a band land in the same bucket,
+    only passwords within a bucket are compared. For passwords with a Jaccard similarity around the
+    threshold, the chance to share a band is high, for dissimilar passwords it is low, so the search
+    is close to O(n). Candidates are confirmed with the exact Jaccard similarity of their n-grams.
+
+    The normalized passwords and their signatures are only kept in memory while FindGroups runs, nothing is saved.
+    """
+
+    NGRAM_SIZE = 3          # Length of the character n-grams
+    SIGNATURE_SIZE = 24     # Number of MinHash values per password
+    BAND_SIZE = 3           # MinHash values per LSH band (SIGNATURE_SIZE / BAND_SIZE bands)
+    DEFAULT_THRESHOLD = 0.5  # Minimum Jaccard similarity of the n-grams of two similar passwords
+    _PRIME = 2 ** 61 - 1    # Modulus of the MinHash hash functions
+    _SEED = 0x5EED          # Fixed seed, so the hash functions are the same in every run
+
+    # Substitutions undone by Normalize (only symbols and digits between letters, see Normalize)
+    L33T_TABLE = str.maketrans({"@": "a", "$": "s", "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t"})
+    _L33T_PATTERN = re.compile(r"[@$]|(?<=[^\W\d_])[013457](?=[^\W\d_])")
+    _DIGITS_PATTERN = re.compile(r"\d+")
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        """
+        Initializes the MinHash functions.
+
+        Args:
+            threshold (float): Minimum Jaccard similarity (0 to 1) of the n-grams of two similar passwords.
+        """
+        self.threshold = threshold
+        rng = random.Random(self._SEED)
+        self._hash_functions = [(rng.randrange(1, self._PRIME), rng.randrange(self._PRIME))
+                                for _ in range(self.SIGNATURE_SIZE)]
+
+    @classmethod
+    def Normalize(cls, password: str) -> str:
+        """
+        Normalizes a password, so variants of the same base password become equal:
+        - case is ignored
+        - l33t substitutions are undone ("P@ssw0rd" -> "password"), digits only between letters,
+          so trailing numbers are kept as numbers
+        - every run of digits becomes "0" ("sommer2023" and "sommer2024" -> "sommer0")
+
+        Args:
+            password (str): The password.
+
+        Returns:
+            str: The normalized password.
+        """
+        password = password.casefold()
+        password = cls._L33T_PATTERN.sub(lambda match: match.group().translate(cls.L33T_TABLE), password)
+        return cls._DIGITS_PATTERN.sub("0", password)
+
+    @classmethod
+    def GetNgrams(cls, password: str) -> frozenset[str]:
+        """
+        Returns the character n-grams of the normalized password. The password is padded at both ends,
+        so the start and end count more and short passwords still have n-grams.
+
+        Args:
+            password (str): The password.
+
+        Returns:
+            frozenset[str]: The n-grams.
+        """
+        return cls._GetFormNgrams(cls.Normalize(password))
+
+    def GetSignature(self, ngrams: frozenset[str]) -> tuple[int, ...]:
+        """
+        Computes the MinHash signature of a set of n-grams. Two signatures agree in each position with
+        the probability of the Jaccard similarity of their n-gram sets.
+
+        Args:
+            ngrams (frozenset[str]): The n-grams (see GetNgrams).
+
+        Returns:
+            tuple[int, ...]: SIGNATURE_SIZE MinHash values.
+        """
+        hashes = [zlib.crc32(ngram.encode("utf-8")) for ngram in ngrams]
+        return tuple(min((a * h + b) % self._PRIME for h in hashes) for a, b in self._hash_functions)
+
+    def FindGroups(self, passwords: Iterable[tuple[str, str]]) -> list[list[str]]:
+        """
+        Finds the groups of similar passwords.
+
+        Passwords with the same normalized form are grouped directly, every distinct normalized form
+        is hashed once. Similarity is transitive inside a group: if A is similar to B and B to C,
+        all three are one group.
+
+        Args:
+            passwords (Iterable[tuple[str, str]]): (name, password) pairs, e.g. ToolHelper.IterDecryptedPWList().
+
+        Returns:
+            list[list[str]]: The names of each group with at least two passwords, ordered by name
+                             inside the group and by the first name of the groups.
+        """
+        # Names per normalized password, the passwords themselves are not kept
+        names_by_form = defaultdict(list)
+        for name, password in passwords:
+            names_by_form[self.Normalize(password)].append(name)
+        forms = list(names_by_form)
+
+        # Union-find over the normalized forms
+        parents = list(range(len(forms)))
+
+        def find(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        # Bucket the forms by the bands of their signature
+        ngram_sets = [self._GetFormNgrams(form) for form in forms]
+        buckets = defaultdict(list)
+        for index, ngrams in enumerate(ngram_sets):
+            signature = self.GetSignature(ngrams)
+            for start in range(0, self.SIGNATURE_SIZE, self.BAND_SIZE):
+                buckets[(start, signature[start:start + self.BAND_SIZE])].append(index)
+
+        # Confirm the candidates of each bucket with the exact similarity
+        for bucket in buckets.values():
+            for i, first in enumerate(bucket):
+                for second in bucket[i + 1:]:
+                    root_first, root_second = find(first), find(second)
+                    if root_first != root_second and \
+                            self._Jaccard(ngram_sets[first], ngram_sets[second]) >= self.threshold:
+                        parents[root_second] = root_first
+
+        groups = defaultdict(list)
+        for index, form in enumerate(forms):
+            groups[find(index)].extend(names_by_form[form])
+        return sorted((sorted(names) for names in groups.values() if len(names) > 1), key=lambda names: names[0])
+
+    @classmethod
+    def _GetFormNgrams(cls, form: str) -> frozenset[str]:
+        # Same as GetNgrams, for a password that is already normalized
+        padded = f"\x02{form}\x03"
+        return frozenset(padded[i:i + cls.NGRAM_SIZE] for i in range(max(1, len(padded) - cls.NGRAM_SIZE + 1)))
+
+    @staticmethod
+    def _Jaccard(first: frozenset, second: frozenset) -> float:
+        return len(first & second) / len(first | second)
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PlaintextCache:
+    """
+    A small cache for decrypted passwords.
+
+    Holds at most max_size entries (least recently used entries are evicted first)
+    and every entry expires ttl_seconds after it was added, so decrypted passwords
+    do not stay in memory for the whole session.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int): The maximum number of cached entries.
+            ttl_seconds (float): The time in seconds after which an entry expires.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # name -> (expires_at, plaintext), least recently used first
+        self._lock = threading.Lock()
+
+    def Get(self, name: str) -> str | None:
+        """
+        Returns the cached plaintext for a name.
+
+        Args:
+            name (str): The name of the entry.
+
+        Returns:
+            str | None: The plaintext, or None if it is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return entry[1]
+
+    def Put(self, name: str, plaintext: str):
+        """
+        Adds or replaces the cached plaintext for a name.
+
+        Args:
+            name (str): The name of the entry.
+            plaintext (str): The decrypted value.
+        """
+        with self._lock:
+            self._entries[name] = (time.monotonic() + self.ttl_seconds, plaintext)
+            self._entries.move_to_end(name)
+            self._RemoveExpired()
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def Remove(self, name: str):
+        """
+        Removes the cached plaintext for a name (e.g. after it was changed or deleted).
+
+        Args:
+            name (str): The name of the entry.
+        """
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def Clear(self):
+        """
+        Removes all cached plaintexts (e.g. on logout).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._RemoveExpired()
+            return len(self._entries)
+
+    def _RemoveExpired(self):
+        now = time.monotonic()
+        for name in [name for name, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[name]
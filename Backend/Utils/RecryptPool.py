@@ -0,0 +1,98 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+from Backend.Utils.Encryption import Encryption
+
+# Encryptions of the current worker process (old key, new key), created once by _InitWorker
+_worker_encryptions = None
+
+
+def _InitWorker(crypt_key_old: str | bytes, crypt_key_new: str | bytes):
+    # Runs once per worker process, so a crypt key (password) is only derived once per worker
+    global _worker_encryptions
+    _worker_encryptions = (Encryption(crypt_key_old), Encryption(crypt_key_new))
+
+
+def _RecryptKeys(keys: list[bytes]) -> list[bytes]:
+    old_encryption, new_encryption = _worker_encryptions
+    return [new_encryption.EncryptBytes(old_encryption.DecryptBytes(key)) for key in keys]
+
+
+class RecryptPool:
+    """
+    Re-encrypts chunks of values from an old key to a new key in worker processes.
+
+    The chunks are shards of the 'values' table (ValueId ranges, see DBManager.tableValues_GetValueChunks).
+    They are read and written by the calling thread (single writer), only the crypto runs in the workers.
+    Starting the processes takes some time, so the pool only pays off for very large vaults.
+
+    Usage:
+        with RecryptPool(old_key, new_key) as pool:
+            for chunk, encrypted_keys in pool.RecryptChunks(chunks):
+                ...  # Write the encrypted keys of the chunk
+    """
+
+    def __init__(self, crypt_key_old: str | bytes, crypt_key_new: str | bytes, processes: int | None = None):
+        """
+        Initializes the pool, the worker processes are started on first use.
+
+        Args:
+            crypt_key_old (str | bytes): The crypt key (password) or raw key the values are encrypted with.
+            crypt_key_new (str | bytes): The crypt key (password) or raw key to encrypt the values with.
+            processes (int | None): The number of worker processes, None for one per CPU core.
+                                    0 re-encrypts in the calling process (Encryption.EncryptMany threads).
+        """
+        self.crypt_key_old = crypt_key_old
+        self.crypt_key_new = crypt_key_new
+        self.processes = processes if processes is not None else os.cpu_count() or 1
+        self._executor = None
+
+    def __enter__(self) -> "RecryptPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+
+    def Close(self):
+        """
+        Stops the worker processes. Chunks that were not started yet are dropped.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def RecryptChunks(self, chunks: Iterable[list[tuple[int, str, bytes]]]
+                      ) -> Iterator[tuple[list[tuple[int, str, bytes]], list[bytes]]]:
+        """
+        Re-encrypts the keys of each chunk.
+
+        A few chunks per worker are in flight at a time, so the memory stays constant
+        while the workers never wait for the writer.
+
+        Args:
+            chunks (Iterable[list[tuple[int, str, bytes]]]): Chunks of (ValueId, Name, Key) tuples.
+
+        Yields:
+            tuple[list[tuple[int, str, bytes]], list[bytes]]: Each chunk with its re-encrypted keys, in the given order.
+        """
+        if self.processes == 0:
+            old_encryption = Encryption(self.crypt_key_old)
+            new_encryption = Encryption(self.crypt_key_new)
+            for chunk in chunks:
+                yield chunk, new_encryption.EncryptMany(old_encryption.DecryptMany([key for _, _, key in chunk]))
+            return
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_InitWorker,
+                                                 initargs=(self.crypt_key_old, self.crypt_key_new))
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, self._executor.submit(_RecryptKeys, [key for _, _, key in chunk])))
+            if len(pending) >= 2 * self.processes:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
@@ -0,0 +1,322 @@
+import datetime
+import math
+import os
+import re
+import threading
+from typing import NamedTuple
+
+
+class PatternMatch(NamedTuple):
+    """
+    A part of a password that was recognized by StrengthEstimator.
+
+    pattern (str): The kind of pattern: "dictionary", "keyboard", "repeat", "sequence", "date" or "bruteforce".
+    token (str): The matched part of the password.
+    start (int), end (int): The position of the token in the password (password[start:end]).
+    guesses (float): The estimated number of guesses to find the token.
+    """
+    pattern: str
+    token: str
+    start: int
+    end: int
+    guesses: float
+
+
+class StrengthEstimate(NamedTuple):
+    """
+    Result of StrengthEstimator.Estimate.
+
+    guesses (float): The estimated number of guesses an attacker needs to find the password.
+    score (int): 0 (too guessable) to 4 (very unguessable), see StrengthEstimator.SCORE_GUESSES.
+    sequence (list[PatternMatch]): The patterns of the cheapest way to guess the password, in order.
+    """
+    guesses: float
+    score: int
+    sequence: list[PatternMatch]
+
+    @property
+    def guesses_log10(self) -> float:
+        return math.log10(self.guesses)
+
+
+class StrengthEstimator:
+    """
+    Estimates how many guesses an attacker needs for a password, similar to zxcvbn.
+
+    The password is searched for patterns an attacker would try first: dictionary words
+    (also reversed, capitalized and with l33t substitutions), keyboard walks, repeats, sequences
+    and dates. Parts without a pattern are counted as bruteforce. The estimate is the cheapest
+    combination of patterns that covers the whole password. Characters after MAX_PATTERN_LENGTH
+    are always bruteforce, so very long input does not make the (partly quadratic) search slow.
+
+    The dictionaries (ranked word lists in DICTIONARY_DIRECTORY, most common word first) are loaded
+    into a trie on first use, the trie is shared by all instances and calls.
+    """
+
+    DICTIONARY_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Dictionaries")
+    DICTIONARY_FILES = ("passwords.txt", "words.txt")
+    BRUTEFORCE_CARDINALITY = 10        # Guesses per character that is not part of a pattern
+    MIN_PATTERN_LENGTH = 3             # Keyboard walks, repeats and sequences need at least this many characters
+    MAX_PATTERN_LENGTH = 100           # Patterns are only searched in this many first characters (like zxcvbn)
+    MIN_YEAR_SPACE = 20                # Years around the current year that are guessed for dates
+    SCORE_GUESSES = (1e3, 1e6, 1e8, 1e10)  # Guesses needed for score 1, 2, 3 and 4
+
+    # Characters an attacker substitutes for letters
+    L33T_TABLE = {"4": "a", "@": "a", "8": "b", "(": "c", "3": "e", "6": "g", "9": "g", "1": "il", "!": "i",
+                  "|": "il", "0": "o", "$": "s", "5": "s", "7": "t", "+": "t", "2": "z"}
+    # Keyboard layouts for keyboard walks (rows without shift)
+    KEYBOARD_LAYOUTS = (
+        ("1234567890ß", "qwertzuiopü", "asdfghjklöä", "yxcvbnm,.-"),  # German QWERTZ
+        ("1234567890-", "qwertyuiop[", "asdfghjkl;'", "zxcvbnm,./"),  # US QWERTY
+    )
+
+    # Trie of all dictionary words: nested dicts, the key None holds the rank of the word ending there
+    _trie = None
+    _trie_lock = threading.Lock()
+    _keyboard_graphs = None
+
+    def Estimate(self, password: str) -> StrengthEstimate:
+        """
+        Estimates the guesses needed for a password.
+
+        Args:
+            password (str): The password to estimate.
+
+        Returns:
+            StrengthEstimate: The estimated guesses, the score and the recognized patterns.
+        """
+        searched = password[:self.MAX_PATTERN_LENGTH]
+        matches = (self._DictionaryMatches(searched) + self._KeyboardMatches(searched)
+                   + self._RepeatMatches(searched) + self._SequenceMatches(searched) + self._DateMatches(searched))
+        matches_by_end = {}
+        for match in matches:
+            matches_by_end.setdefault(match.end, []).append(match)
+
+        # Cheapest cover of password[:end]: (guesses, last match), bruteforce one character at a time otherwise
+        best = [(1.0, None)]
+        for end in range(1, len(password) + 1):
+            candidates = [(best[end - 1][0] * self.BRUTEFORCE_CARDINALITY,
+                           PatternMatch("bruteforce", password[end - 1], end - 1, end, self.BRUTEFORCE_CARDINALITY))]
+            candidates += [(best[match.start][0] * match.guesses, match) for match in matches_by_end.get(end, [])]
+            best.append(min(candidates, key=lambda candidate: candidate[0]))
+
+        sequence = []
+        end = len(password)
+        while end > 0:
+            match = best[end][1]
+            sequence.append(match)
+            end = match.start
+        sequence.reverse()
+        sequence = self._MergeBruteforce(sequence)
+
+        guesses = best[-1][0]
+        score = sum(guesses >= threshold for threshold in self.SCORE_GUESSES)
+        return StrengthEstimate(guesses, score, sequence)
+
+    @classmethod
+    def _GetTrie(cls) -> dict:
+        # Loads the dictionaries once, the lock keeps concurrent first calls from loading them twice
+        if cls._trie is None:
+            with cls._trie_lock:
+                if cls._trie is None:
+                    trie = {}
+                    for file_name in cls.DICTIONARY_FILES:
+                        with open(os.path.join(cls.DICTIONARY_DIRECTORY, file_name), encoding="utf-8") as file:
+                            for rank, word in enumerate((line.strip().lower() for line in file), start=1):
+                                node = trie
+                                for character in word:
+                                    node = node.setdefault(character, {})
+                                node[None] = min(node.get(None, rank), rank)  # Best rank of all dictionaries
+                    cls._trie = trie
+        return cls._trie
+
+    def _DictionaryMatches(self, password: str) -> list[PatternMatch]:
+        matches = []
+        lowered = password.lower()
+        for token, reverse in ((lowered, False), (lowered[::-1], True)):
+            for start, end, rank, l33t_count in self._TrieMatches(token):
+                if reverse:
+                    start, end = len(password) - end, len(password) - start
+                original = password[start:end]
+                guesses = rank * self._UppercaseVariations(original) * (2 ** l33t_count) * (2 if reverse else 1)
+                matches.append(PatternMatch("dictionary", original, start, end, max(guesses, 1)))
+        return matches
+
+    def _TrieMatches(self, token: str) -> list[tuple[int, int, int, int]]:
+        # All dictionary words in token as (start, end, rank, number of l33t substitutions)
+        trie = self._GetTrie()
+        matches = []
+        for start in range(len(token)):
+            # Depth-first walk, a l33t character can stand for its own letter or the substituted ones
+            stack = [(trie, start, 0)]
+            while stack:
+                node, position, l33t_count = stack.pop()
+                if None in node and position > start:
+                    matches.append((start, position, node[None], l33t_count))
+                if position == len(token):
+                    continue
+                character = token[position]
+                if character in node:
+                    stack.append((node[character], position + 1, l33t_count))
+                for letter in self.L33T_TABLE.get(character, ""):
+                    if letter in node:
+                        stack.append((node[letter], position + 1, l33t_count + 1))
+        return matches
+
+    @staticmethod
+    def _UppercaseVariations(token: str) -> int:
+        # Common capitalizations (all lower, all upper, first letter) cost little, others the number of ways
+        uppercase = sum(character.isupper() for character in token)
+        lowercase = sum(character.islower() for character in token)
+        if uppercase == 0 or lowercase == 0 or (uppercase == 1 and token[0].isupper()):
+            return 1 if uppercase == 0 else 2
+        return sum(math.comb(uppercase + lowercase, i) for i in range(1, min(uppercase, lowercase) + 1))
+
+    @classmethod
+    def _GetKeyboardGraphs(cls) -> list[tuple[dict, float]]:
+        # Neighbor keys of every key per layout, and the average number of neighbors
+        if cls._keyboard_graphs is None:
+            graphs = []
+            for rows in cls.KEYBOARD_LAYOUTS:
+                positions = {key: (row, column) for row, keys in enumerate(rows) for column, key in enumerate(keys)}
+                graph = {}
+                for key, (row, column) in positions.items():
+                    # Rows are shifted by half a key: the neighbors above are column and column + 1
+                    offsets = ((0, -1), (0, 1), (-1, 0), (-1, 1), (1, -1), (1, 0))
+                    graph[key] = {rows[row + d_row][column + d_column] for d_row, d_column in offsets
+                                  if 0 <= row + d_row < len(rows) and 0 <= column + d_column < len(rows[row + d_row])}
+                graphs.append((graph, sum(len(neighbors) for neighbors in graph.values()) / len(graph)))
+            cls._keyboard_graphs = graphs
+        return cls._keyboard_graphs
+
+    def _KeyboardMatches(self, password: str) -> list[PatternMatch]:
+        matches = []
+        lowered = password.lower()
+        for graph, average_degree in self._GetKeyboardGraphs():
+            start = 0
+            for end in range(1, len(lowered) + 1):
+                if end < len(lowered) and lowered[end] in graph.get(lowered[end - 1], ()):
+                    continue
+                # Maximal walk password[start:end]: any key to start, then one of the neighbors per key
+                if end - start >= self.MIN_PATTERN_LENGTH:
+                    guesses = len(graph) * average_degree * (end - start - 1)
+                    matches.append(PatternMatch("keyboard", password[start:end], start, end, guesses))
+                start = end
+        return matches
+
+    def _RepeatMatches(self, password: str) -> list[PatternMatch]:
+        # Repeated characters or strings (aaa, abcabc): the guesses of the repeated part times the repetitions
+        matches = []
+        for repeat in re.finditer(r"(.+?)\1+", password):
+            if repeat.end() - repeat.start() < self.MIN_PATTERN_LENGTH:
+                continue
+            base = repeat.group(1)
+            base_guesses = self.Estimate(base).guesses if len(base) > 1 else self._Cardinality(base)
+            repetitions = (repeat.end() - repeat.start()) // len(base)
+            matches.append(PatternMatch("repeat", repeat.group(0), repeat.start(), repeat.end(),
+                                        base_guesses * repetitions))
+        return matches
+
+    def _SequenceMatches(self, password: str) -> list[PatternMatch]:
+        # Runs with the same step of +1 or -1 in one character class (abc, 4321)
+        matches = []
+        start = 0
+        while start < len(password) - 1:
+            step = ord(password[start + 1]) - ord(password[start])
+            end = start + 1
+            while (end < len(password) and ord(password[end]) - ord(password[end - 1]) == step
+                   and self._CharacterClass(password[end]) == self._CharacterClass(password[start])):
+                end += 1
+            if step in (1, -1) and end - start >= self.MIN_PATTERN_LENGTH and self._CharacterClass(password[start]):
+                token = password[start:end]
+                # Obvious starts (a, z, 0, 1, 9) are tried first
+                base = 4 if token[0] in "aAzZ019" else self._Cardinality(token[0])
+                matches.append(PatternMatch("sequence", token, start, end, base * len(token) * (2 if step < 0 else 1)))
+            start = max(end - 1, start + 1)
+        return matches
+
+    def _DateMatches(self, password: str) -> list[PatternMatch]:
+        # Dates with separators (24.12.1990), without separators (19901224, 241290) and single years (1990)
+        matches = []
+        current_year = datetime.date.today().year
+        for date in re.finditer(r"(?<!\d)(\d{1,4})([./\-_ ])(\d{1,2})\2(\d{1,4})(?!\d)", password):
+            first, _, middle, last = date.groups()
+            year = self._ParseDate([(first, middle, last), (middle, first, last), (last, middle, first)], current_year)
+            if year is not None:
+                guesses = 4 * 365 * max(abs(year - current_year), self.MIN_YEAR_SPACE)
+                matches.append(PatternMatch("date", date.group(0), date.start(), date.end(), guesses))
+
+        for digits in re.finditer(r"\d{4,}", password):
+            for start in range(digits.start(), digits.end() - 3):
+                for end in range(start + 4, min(start + 8, digits.end()) + 1):
+                    year = self._ParseDate(self._SplitDate(password[start:end]), current_year)
+                    if year is not None:
+                        guesses = 365 * max(abs(year - current_year), self.MIN_YEAR_SPACE)
+                        matches.append(PatternMatch("date", password[start:end], start, end, guesses))
+
+        for year in re.finditer(r"(?<!\d)(19\d\d|20\d\d)(?!\d)", password):
+            guesses = max(abs(int(year.group(0)) - current_year), self.MIN_YEAR_SPACE)
+            matches.append(PatternMatch("date", year.group(0), year.start(), year.end(), guesses))
+        return matches
+
+    @staticmethod
+    def _SplitDate(digits: str) -> list[tuple[str, str, str]]:
+        # All ways to read a digit string as (day, month, year), the year (2 or 4 digits) first or last
+        splits = []
+        for year_length in (4, 2):
+            for year, rest in ((digits[:year_length], digits[year_length:]),
+                               (digits[-year_length:], digits[:-year_length])):
+                for split in range(1, len(rest)):
+                    first, second = rest[:split], rest[split:]
+                    splits += [(first, second, year), (second, first, year)]
+        return splits
+
+    def _ParseDate(self, candidates: list[tuple[str, str, str]], current_year: int) -> int | None:
+        # Returns the year of the first valid (day, month, year) candidate, None if there is none
+        for day, month, year in candidates:
+            year = self._FullYear(year, current_year)
+            if year is not None and len(day) <= 2 and len(month) <= 2 and 1 <= int(month) <= 12 and 1 <= int(day) <= 31:
+                return year
+        return None
+
+    @staticmethod
+    def _FullYear(year: str, current_year: int) -> int | None:
+        # Two-digit years are taken from the last or the current century, other lengths are no year
+        if len(year) == 4 and 1900 <= int(year) <= current_year + 20:
+            return int(year)
+        if len(year) == 2:
+            return 1900 + int(year) if 1900 + int(year) > current_year - 80 else 2000 + int(year)
+        return None
+
+    @staticmethod
+    def _CharacterClass(character: str) -> str | None:
+        # Character class for sequences, None for characters without order (symbols)
+        if "0" <= character <= "9":
+            return "digit"
+        if "a" <= character <= "z":
+            return "lower"
+        if "A" <= character <= "Z":
+            return "upper"
+        return None
+
+    @staticmethod
+    def _Cardinality(character: str) -> int:
+        # Size of the character class of a character
+        if character.isdigit():
+            return 10
+        if character.islower() or character.isupper():
+            return 26
+        return 33
+
+    @staticmethod
+    def _MergeBruteforce(sequence: list[PatternMatch]) -> list[PatternMatch]:
+        # Joins neighboring single bruteforce characters into one match
+        merged = []
+        for match in sequence:
+            if merged and match.pattern == "bruteforce" and merged[-1].pattern == "bruteforce":
+                last = merged[-1]
+                merged[-1] = PatternMatch("bruteforce", last.token + match.token, last.start, match.end,
+                                          last.guesses * match.guesses)
+            else:
+                merged.append(match)
+        return merged
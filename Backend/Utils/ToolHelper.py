@@ -1,7 +1,32 @@
+import json
+import os
+import threading
+from typing import Callable, Iterator
+
+from cryptography.exceptions import InvalidTag
+
 from Backend.Utils.DBManager import DBManager
 from Backend.Utils.Encryption import Encryption
+from Backend.Utils.PasswordSimilarity import PasswordSimilarity
+from Backend.Utils.PlaintextCache import PlaintextCache
+from Backend.Utils.RecryptPool import RecryptPool
 from Backend.ProgramSettings import ProgramSettings
 
+class OperationCancelled(Exception):
+    """
+    Raised when a long running operation was cancelled with its cancel event.
+    Changes of the operation in the database are rolled back, a re-key of the data key
+    keeps its committed chunks and continues on the next unlock.
+    """
+
+
+class DataKeyChanged(Exception):
+    """
+    Raised when another program (e.g. cli.py rekey) replaced the data key since the vault was unlocked.
+    The vault is locked when it is raised, nothing was written with the old data key.
+    """
+
+
 # Class to handle helping functions
 class ToolHelper:
     """
@@ -9,6 +34,16 @@ class ToolHelper:
     "A class to store functions"
     """
 
+    # Name of the 'saves' record of old vaults holding the user password (encrypted with the default crypt key).
+    # It is deleted when the vault is migrated to the data key, afterwards the wrapped data key authenticates the user.
+    USER_SAVE_NAME = "user"
+    DATA_KEY_SAVE_NAME = "data_key"  # Name of the 'saves' record holding the wrapped data key of the vault
+    KDF_SAVE_NAME = "kdf"            # Name of the 'saves' record holding the KDF parameters for the user password
+    # Name of the 'saves' record holding the wrapped previous data key while a re-key is not finished
+    PREVIOUS_DATA_KEY_SAVE_NAME = "data_key_previous"
+    KEY_GENERATION_SAVE_NAME = "key_generation"  # Name of the 'saves' record holding the generation of the data key
+    CHUNK_SIZE = 4096                # Values per step of long operations (progress report and cancel check)
+
     def __init__(self, db: DBManager, encryption: Encryption):
         """
         Initializes the ToolHelper with references to the database manager and encryption handler.
@@ -16,86 +51,657 @@ class ToolHelper:
         Args:
             db (DBManager): The database manager instance for performing database operations.
             encryption (Encryption): The encryption instance for encrypting and decrypting values.
+                                     It must hold the default crypt key when passed in, and is
+                                     switched to the data key of the vault on unlock.
         """
 
         self.db = db
         self.encryption = encryption
+        # Keep the default crypt key for the 'saves' table, since self.encryption gets the data key on unlock
+        self.saves_encryption = Encryption(encryption.key)
+        # Passwords are decrypted on demand, recently used ones are kept for a short time
+        self.plaintext_cache = PlaintextCache(ProgramSettings.PLAINTEXT_CACHE_SIZE,
+                                              ProgramSettings.PLAINTEXT_CACHE_TTL_SECONDS)
+        self._upgrade_after_value_id = 0  # Position of the UpgradeValues sweep
+        self.key_generation = None  # Generation of the data key in self.encryption, None while locked
 
-    def UpdateUserPassword(self, new_user_password: str) -> bool:
+    def CheckUserPassword(self, password: str) -> bool:
         """
-        Updates the user's password and re-encrypts all saved values using the new password.
+        Checks the given password by unwrapping the data key of the vault with it.
 
-        This method:
-        1. Sets the encryption key to the default to read the existing password.
-        2. Encrypts the new user password and updates it in the 'saves' table.
-        3. Decrypts the old password and re-encrypts all saved values using the new password.
+        The user password itself is not saved: a key derived from a wrong password fails the
+        authentication (GCM tag) of the wrapped data key. Old vaults that were not migrated
+        to the data key yet are checked against their saved user password.
 
         Args:
-            new_user_password (str): The new password provided by the user.
+            password (str): The password entered by the user.
+
+        Returns:
+            bool: True if the password is correct, False otherwise.
+        """
+
+        wrapped_data_key = self.db.tableSaves_GetSaveByName(self.DATA_KEY_SAVE_NAME)
+        if wrapped_data_key is None:
+            db_user_password = self.saves_encryption.Decrypt(self.db.tableSaves_GetSaveByName(self.USER_SAVE_NAME))
+            return password == db_user_password
+
+        try:
+            self._GetUserEncryption(password).UnwrapKey(wrapped_data_key)
+        except InvalidTag:
+            return False
+        return True
+
+    def Unlock(self, user_password: str, progress: Callable[[int, int], None] | None = None,
+               cancel_event: threading.Event | None = None) -> bool:
+        """
+        Unlocks the vault with the user password.
+
+        On success, self.encryption is switched to the data key of the vault,
+        so all values can be encrypted and decrypted with it.
+
+        Args:
+            user_password (str): The password entered by the user.
+            progress, cancel_event: See RotateDataKey, only used if a re-key of the data key is not finished
+                                    (old vaults are migrated with a re-key).
+
+        Returns:
+            bool: True if the password is correct and the vault is unlocked, False otherwise.
+        """
+
+        if not self.CheckUserPassword(user_password):
+            return False
+
+        data_key = self.GetDataKey(user_password, progress, cancel_event)
+        if self.db.tableSaves_GetSaveByName(self.KDF_SAVE_NAME) is None:
+            # Data key is still wrapped with the old fixed KDF parameters, wrap it with calibrated ones
+            self.WrapDataKey(user_password, data_key)
+        self.plaintext_cache.Clear()
+        self.encryption.SetKey(data_key)
+        self.key_generation = self.GetKeyGeneration()
+        return True
+
+    def Lock(self):
+        """
+        Locks the vault again (e.g. on logout).
+
+        Drops all decrypted passwords and the derived keys of the key cache, and switches
+        self.encryption back to the default crypt key, so it no longer references the data key.
+        Python strings and keys cannot be wiped reliably, the dropped copies are only freed
+        (see Encryption.ClearKeyCache).
+        """
+
+        self.plaintext_cache.Clear()
+        Encryption.ClearKeyCache()
+        self.encryption.SetKey(self.saves_encryption.key)
+        self.key_generation = None
+
+    def IsDataKeyCurrent(self) -> bool:
+        """
+        Checks if the data key of the unlocked vault is still the data key saved in the database.
+        Another program (e.g. cli.py rekey) may have replaced it since the unlock.
+
+        Returns:
+            bool: False if the data key was replaced, True otherwise (also while the vault is locked).
+        """
+
+        return self.key_generation is None or self.key_generation == self.GetKeyGeneration()
+
+    def _CheckDataKey(self):
+        # Called before values are read or written with self.encryption. Inside a transaction, the check
+        # and the following writes see the same state, a concurrent re-key makes the write fail instead.
+        if not self.IsDataKeyCurrent():
+            self.Lock()
+            raise DataKeyChanged()
+
+    def GetDataKey(self, user_password: str, progress: Callable[[int, int], None] | None = None,
+                   cancel_event: threading.Event | None = None) -> bytes:
+        """
+        Returns the random data key that encrypts all values of the vault.
+
+        The data key is saved in the 'saves' table, wrapped by a key derived from the user password
+        with the KDF parameters of the vault (see GetKdfParams). Vaults created before the data key
+        existed have their values encrypted directly with the key of self.encryption. These vaults
+        are migrated once with a re-key to a new data key (see RotateDataKey).
+        A re-key that was interrupted is finished first.
+
+        Args:
+            user_password (str): The current (correct) user password.
+            progress, cancel_event: See RotateDataKey, only used if a re-key is not finished.
+
+        Returns:
+            bytes: The data key of the vault.
+        """
+
+        # Checked in the transaction, so two programs cannot both migrate the vault
+        with self.db.transaction():
+            if self.db.tableSaves_GetSaveByName(self.DATA_KEY_SAVE_NAME) is None:
+                # Migrate old vault to the data key layout
+                self._StartRekey(user_password, self.encryption.key)
+                # The wrapped data key authenticates the user from now on, the reversible copy must not stay
+                self.db.tableSaves_DeleteSave(self.USER_SAVE_NAME)
+        self._ResumeRekey(user_password, progress, cancel_event)
+
+        return self._GetUserEncryption(user_password).UnwrapKey(
+            self.db.tableSaves_GetSaveByName(self.DATA_KEY_SAVE_NAME))
+
+    def RotateDataKey(self, user_password: str, progress: Callable[[int, int], None] | None = None,
+                      cancel_event: threading.Event | None = None) -> bool:
+        """
+        Replaces the data key of the vault by a new random key and re-encrypts all values with it.
+
+        The re-key is crash-safe: the values are re-encrypted in chunks, each chunk is committed
+        together with the new key generation of its values. Until all values are done, the previous
+        data key is kept in the 'saves' table (wrapped like the data key). An interrupted re-key
+        (crash or cancel_event) continues with the remaining values on the next unlock.
+
+        Args:
+            user_password (str): The current (correct) user password.
+            progress (Callable[[int, int], None] | None): Called with (done, total) after each chunk of values.
+                                                         May be called from a background thread.
+            cancel_event (threading.Event | None): When set, the operation stops with OperationCancelled.
+                                                   A re-key keeps the chunks committed before the cancel,
+                                                   the other operations change nothing.
+
+        Returns:
+            bool: True if all values were re-encrypted with the new data key.
+        """
+
+        old_data_key = self.GetDataKey(user_password, progress, cancel_event)
+        self._StartRekey(user_password, old_data_key)
+        data_key = self.GetDataKey(user_password, progress, cancel_event)
+
+        # Ensure the vault stays unlocked with the new data key
+        self.plaintext_cache.Clear()
+        self.encryption.SetKey(data_key)
+        self.key_generation = self.GetKeyGeneration()
+        return True
+
+    def GetKeyGeneration(self) -> int:
+        """
+        Returns the generation of the data key, it is increased by every re-key.
+        Values with a smaller KeyGeneration are still encrypted with the previous data key.
+
+        Returns:
+            int: The generation of the current data key (0 for vaults that were never re-keyed).
+        """
+
+        key_generation = self._GetTextSave(self.KEY_GENERATION_SAVE_NAME)
+        return int(key_generation) if key_generation is not None else 0
+
+    def IsRekeyPending(self) -> bool:
+        """
+        Checks if a re-key of the data key was started and is not finished yet.
+
+        Returns:
+            bool: True if some values may still be encrypted with the previous data key.
+        """
+
+        return self.db.tableSaves_GetSaveByName(self.PREVIOUS_DATA_KEY_SAVE_NAME) is not None
+
+    def _GetUserEncryption(self, user_password: str) -> Encryption:
+        # Encryption with the key derived from the user password, it wraps the data keys
+        return Encryption(Encryption.DeriveKey(user_password, **self.GetKdfParams()))
+
+    def _StartRekey(self, user_password: str, old_data_key: bytes):
+        # Saves a new data key with the next generation and keeps the old one until all values are re-encrypted.
+        # Values written outside of a re-key keep KeyGeneration 0. This is fine, since a re-key only
+        # starts when all values are encrypted with the current data key.
+        data_key = Encryption.GenerateKey()
+        with self.db.transaction():
+            # Read in the transaction, so a concurrent re-key fails instead of dropping the key of the other one
+            wrapped_data_key = self.db.tableSaves_GetSaveByName(self.DATA_KEY_SAVE_NAME)
+            if wrapped_data_key is not None and \
+                    self._GetUserEncryption(user_password).UnwrapKey(wrapped_data_key) != old_data_key:
+                raise DataKeyChanged()
+            key_generation = self.GetKeyGeneration() + 1
+            self.WrapDataKey(user_password, data_key)
+            self.db.tableSaves_SetSave(self.PREVIOUS_DATA_KEY_SAVE_NAME,
+                                       self._GetUserEncryption(user_password).WrapKey(old_data_key))
+            self._SetTextSave(self.KEY_GENERATION_SAVE_NAME, str(key_generation))
+
+    def _ResumeRekey(self, user_password: str, progress: Callable[[int, int], None] | None,
+                     cancel_event: threading.Event | None):
+        # Re-encrypts the values that are not yet at the current key generation, one committed chunk at a time
+        wrapped_old_data_key = self.db.tableSaves_GetSaveByName(self.PREVIOUS_DATA_KEY_SAVE_NAME)
+        if wrapped_old_data_key is None:
+            return
+
+        user_encryption = self._GetUserEncryption(user_password)
+        old_data_key = user_encryption.UnwrapKey(wrapped_old_data_key)
+        data_key = user_encryption.UnwrapKey(self.db.tableSaves_GetSaveByName(self.DATA_KEY_SAVE_NAME))
+        key_generation = self.GetKeyGeneration()
+
+        total = self.db.tableValues_Count()
+        remaining = self.db.tableValues_Count(below_key_generation=key_generation)
+        done = total - remaining
+        chunks = self.db.tableValues_GetValueChunks(self._GetRecryptChunkSize(remaining),
+                                                    below_key_generation=key_generation)
+        with RecryptPool(old_data_key, data_key, self._GetRecryptProcesses(remaining)) as pool:
+            for chunk, encrypted_keys in pool.RecryptChunks(chunks):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise OperationCancelled()
+                # Commit the chunk with its key generation, an interrupted re-key continues after it
+                self.db.tableValues_SaveKeys(
+                    [(value_id, key) for (value_id, _, _), key in zip(chunk, encrypted_keys)], key_generation)
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, total)
+
+        self.db.tableSaves_DeleteSave(self.PREVIOUS_DATA_KEY_SAVE_NAME)
+
+    def GetKdfParams(self) -> dict:
+        """
+        Returns the KDF parameters (algorithm, salt and cost) used to derive the key from the user password.
+
+        Vaults without saved KDF parameters use the old fixed parameters
+        (PBKDF2 with Encryption.DEFAULT_SALT and Encryption.DEFAULT_ITERATIONS).
 
         Returns:
-            bool: True if password update and re-encryption process completed, False otherwise.
+            dict: The KDF parameters, to be passed to Encryption.DeriveKey(password, **kdf_params).
+        """
+
+        saved_kdf_params = self._GetTextSave(self.KDF_SAVE_NAME)
+        if saved_kdf_params is None:
+            return {"algorithm": Encryption.KDF_PBKDF2, "salt": Encryption.DEFAULT_SALT,
+                    "iterations": Encryption.DEFAULT_ITERATIONS}
+
+        kdf_params = json.loads(saved_kdf_params)
+        kdf_params["salt"] = bytes.fromhex(kdf_params["salt"])
+        return kdf_params
+
+    def _GetTextSave(self, name: str) -> str | None:
+        # Text records of the 'saves' table (JSON, numbers) are saved as UTF-8 encoded BLOBs like all other records.
+        # Records written as TEXT by older versions are returned as they are.
+        value = self.db.tableSaves_GetSaveByName(name)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def _SetTextSave(self, name: str, text: str):
+        self.db.tableSaves_SetSave(name, text.encode('utf-8'))
+
+    def WrapDataKey(self, user_password: str, data_key: bytes, recalibrate: bool = False):
+        """
+        Wraps the data key with a key derived from the user password and saves it.
+
+        The saved KDF parameters of the vault are kept (e.g. for a re-key), so the key derivation
+        runs at most once and the key is usually taken from the key cache. Only when recalibrate is set
+        (password change) or the vault has no saved KDF parameters yet (new or old vault), the KDF is
+        calibrated for this computer (see ProgramSettings.KDF_ALGORITHM and ProgramSettings.KDF_TARGET_SECONDS)
+        and gets a new random salt. The new KDF parameters are saved together with the wrapped data key.
+
+        Args:
+            user_password (str): The user password to wrap the data key with.
+            data_key (bytes): The data key of the vault.
+            recalibrate (bool): Calibrate the KDF and use a new salt even if KDF parameters are saved.
         """
 
-        # Set crypt_key to default (default is used for 'saved' table in db)
-        ProgramSettings.CRYPT_KEY = ProgramSettings.DEFAULT_CRYPT_KEY
-        # Encrypt new user password
-        new_user_password_encrypted = self.encryption.Encrypt(new_user_password)
-        # Get old user password from database
-        old_user_password_encrypted = self.db.tableSaves_GetSave(1)
-        # Decrypt old user password
-        old_user_password = self.encryption.Decrypt(old_user_password_encrypted)
-        # Update new user password in database with encrypted password
-        self.db.tableSaves_UpdateSave(1, "user", new_user_password_encrypted)
-        # Recrypt all values in database table 'values' with new user password
-        return self.RecryptValues(old_user_password, new_user_password)
+        calibrate = recalibrate or self._GetTextSave(self.KDF_SAVE_NAME) is None
+        if calibrate:
+            kdf_params = Encryption.CalibrateKdf(ProgramSettings.KDF_TARGET_SECONDS, ProgramSettings.KDF_ALGORITHM)
+        else:
+            kdf_params = self.GetKdfParams()
+        user_encryption = Encryption(Encryption.DeriveKey(user_password, **kdf_params))
+
+        with self.db.transaction():
+            self.db.tableSaves_SetSave(self.DATA_KEY_SAVE_NAME, user_encryption.WrapKey(data_key))
+            if calibrate:
+                self._SetTextSave(self.KDF_SAVE_NAME, json.dumps({**kdf_params, "salt": kdf_params["salt"].hex()}))
 
-    def RecryptValues(self, crypt_key_old, crypt_key_new) -> bool:
+    def UpdateUserPassword(self, current_user_password: str, new_user_password: str,
+                           progress: Callable[[int, int], None] | None = None,
+                           cancel_event: threading.Event | None = None) -> bool:
         """
-        Re-encrypts all values in the database using a new encryption key.
+        Updates the user's password.
+
+        The values are encrypted with the data key of the vault, so only the data key
+        has to be wrapped again with the new password. The costs do not depend on the number of values.
 
         This method:
-        1. Decrypts each stored value using the old password.
-        2. Re-encrypts it using the new password.
-        3. Updates the encrypted value back in the database.
+        1. Checks the current user password (see CheckUserPassword).
+        2. Unwraps the data key with the current password (finishes a re-key and migrates old vaults once).
+        3. Saves the data key wrapped with the new password.
 
         Args:
-            crypt_key_old (str): The current password used to decrypt values.
-            crypt_key_new (str): The new password to encrypt values with.
+            current_user_password (str): The current password of the user.
+            new_user_password (str): The new password provided by the user.
+            progress, cancel_event: See RotateDataKey, only used if a re-key is not finished.
 
         Returns:
-            bool: True if all values were successfully re-encrypted, False otherwise.
+            bool: True if password update process completed, False if the current password is wrong.
         """
 
-        all_values = self.db.tableValues_GetAllValues()
-        for name, key in all_values:
-            # Decrypt key with old crypt key
-            ProgramSettings.CRYPT_KEY = crypt_key_old
-            decrypted_key = self.encryption.Decrypt(key)
+        if not self.CheckUserPassword(current_user_password):
+            return False
+
+        # Outside of the transaction, so a re-key keeps its committed chunks
+        data_key = self.GetDataKey(current_user_password, progress, cancel_event)
 
-            # Encrypt key with new crypt key
-            ProgramSettings.CRYPT_KEY = crypt_key_new
-            encrypted_key = self.encryption.Encrypt(decrypted_key)
+        # Wrap the data key with the new user password (new salt and calibrated KDF parameters),
+        # in one transaction, so a failure leaves the vault untouched
+        self.WrapDataKey(new_user_password, data_key, recalibrate=True)
 
-            # Update value in db
-            self.db.tableValues_SaveValue(name, encrypted_key)
-        # Ensure crypt key is set to new user password
-        ProgramSettings.CRYPT_KEY = crypt_key_new
+        # Ensure the vault stays unlocked with the new user password
+        self.encryption.SetKey(data_key)
+        self.key_generation = self.GetKeyGeneration()
         return True
-    
-    def GetDecryptedPWList(self) -> list[tuple]:
+
+    def _GetRecryptProcesses(self, value_count: int) -> int:
+        # Worker processes for re-encrypting value_count values, 0 (threads only) for smaller vaults
+        if value_count < ProgramSettings.RECRYPT_PROCESS_MIN_VALUES:
+            return 0
+        return ProgramSettings.RECRYPT_PROCESSES if ProgramSettings.RECRYPT_PROCESSES is not None else os.cpu_count() or 1
+
+    def _GetRecryptChunkSize(self, value_count: int) -> int:
+        # Chunks are big enough to keep all threads of EncryptMany / DecryptMany busy
+        if self._GetRecryptProcesses(value_count) > 0:
+            return self.CHUNK_SIZE
+        return max(self.CHUNK_SIZE, Encryption.PARALLEL_MIN_BATCH * Encryption.MAX_WORKERS)
+
+    def UpgradeValues(self, max_values: int = 200) -> int:
+        """
+        Re-encrypts values that are still in an old encryption format with the current format.
+
+        Old values are also upgraded on their next write, so this sweep is optional.
+        It only handles max_values values per call, so it can run in small steps in the background.
+
+        Args:
+            max_values (int): The maximum number of values to upgrade in this call.
+
+        Returns:
+            int: The number of upgraded values. 0 means all values use the current format.
+        """
+
+        # Continue where the last call stopped, so a whole sweep reads every value only once
+        old_values = []
+        for chunk in self.db.tableValues_GetValueChunks(self.CHUNK_SIZE, self._upgrade_after_value_id):
+            for value_id, name, key in chunk:
+                if not self.encryption.IsCurrentFormat(key):
+                    old_values.append((name, key))
+                self._upgrade_after_value_id = value_id
+                if len(old_values) >= max_values:
+                    break
+            if len(old_values) >= max_values:
+                break
+        else:
+            self._upgrade_after_value_id = 0  # End of the table reached, the next sweep starts from the beginning
+
+        if not old_values:
+            return 0
+
+        names = [name for name, _ in old_values]
+        with self.db.transaction():
+            self._CheckDataKey()
+            decrypted_keys = self.encryption.DecryptMany([key for _, key in old_values])
+            encrypted_keys = self.encryption.EncryptMany(decrypted_keys)
+            self.db.tableValues_SaveValues(list(zip(names, encrypted_keys)))
+        return len(old_values)
+
+    def GetNames(self) -> list[str]:
+        """
+        Returns the names (sites) of all saved passwords, without decrypting anything.
+
+        Returns:
+            list[str]: The names of all saved passwords.
+        """
+        return self.db.tableValues_GetAllNames()
+
+    def SearchNames(self, query: str, limit: int = DBManager.SEARCH_LIMIT) -> list[str]:
+        """
+        Searches the names (sites) of the saved passwords with the full-text index, without decrypting anything.
+
+        Args:
+            query (str): The search text, every word matches the start of a word of a name.
+            limit (int): The maximum number of results.
+
+        Returns:
+            list[str]: The matching names, best match first (see DBManager.tableValues_Search).
+        """
+        return self.db.tableValues_Search(query, limit)
+
+    def GetDecryptedPassword(self, name: str) -> str | None:
+        """
+        Decrypts the password saved for a name.
+        Recently decrypted passwords are taken from the plaintext cache.
+
+        Args:
+            name (str): The name (site) of the password.
+
+        Returns:
+            str | None: The decrypted password, or None if the name does not exist.
+        """
+
+        password = self.plaintext_cache.Get(name)
+        if password is not None:
+            return password
+
+        self._CheckDataKey()
+        encrypted_password = self.db.tableValues_GetValue(name)
+        if encrypted_password is None:
+            return None
+        password = self.encryption.Decrypt(encrypted_password)
+        self.plaintext_cache.Put(name, password)
+        return password
+
+    def AddPassword(self, name: str, password: str) -> bool:
+        """
+        Encrypts and saves a password for a new name.
+
+        Args:
+            name (str): The name (site) of the password.
+            password (str): The password to save.
+
+        Returns:
+            bool: True if the password was added, False if the name already exists.
+        """
+
+        with self.db.transaction():
+            self._CheckDataKey()
+            return self.db.tableValues_TryCreateValue(name, self.encryption.Encrypt(password),
+                                                      self.encryption.Fingerprint(password))
+
+    def SetPassword(self, name: str, password: str):
+        """
+        Encrypts and saves a password, adds the name if it does not exist yet.
+
+        Args:
+            name (str): The name (site) of the password.
+            password (str): The password to save.
+        """
+
+        self.plaintext_cache.Remove(name)
+        with self.db.transaction():
+            self._CheckDataKey()
+            self.db.tableValues_UpsertValue(name, self.encryption.Encrypt(password),
+                                            self.encryption.Fingerprint(password))
+
+    def SavePassword(self, name: str, password: str) -> bool:
+        """
+        Encrypts and saves a new password for an existing name.
+
+        Args:
+            name (str): The name (site) of the password.
+            password (str): The new password.
+
+        Returns:
+            bool: True if the password was changed, False otherwise.
+        """
+
+        self.plaintext_cache.Remove(name)
+        with self.db.transaction():
+            self._CheckDataKey()
+            return self.db.tableValues_SaveValue(name, self.encryption.Encrypt(password),
+                                                 self.encryption.Fingerprint(password))
+
+    def DeletePassword(self, name: str) -> bool:
+        """
+        Deletes the password saved for a name.
+
+        Args:
+            name (str): The name (site) of the password.
+
+        Returns:
+            bool: True if the password was deleted, False otherwise.
+        """
+
+        self.plaintext_cache.Remove(name)
+        return self.db.tableValues_DeleteValue(name)
+
+    def ImportPasswords(self, passwords: list[tuple[str, str]], progress: Callable[[int, int], None] | None = None,
+                        cancel_event: threading.Event | None = None) -> int:
+        """
+        Encrypts and saves many passwords (e.g. from an import file), existing names are overwritten.
+
+        The passwords are encrypted chunk by chunk with EncryptMany, all in a single transaction.
+        If anything fails, no password is saved.
+
+        Args:
+            passwords (list[tuple[str, str]]): List of (name, password) pairs.
+            progress, cancel_event: See RotateDataKey.
+
+        Returns:
+            int: The number of saved passwords.
+        """
+
+        chunk_size = max(self.CHUNK_SIZE, Encryption.PARALLEL_MIN_BATCH * Encryption.MAX_WORKERS)
+        with self.db.transaction():
+            self._CheckDataKey()
+            for start in range(0, len(passwords), chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise OperationCancelled()
+                chunk = passwords[start:start + chunk_size]
+                encrypted_keys = self.encryption.EncryptMany([password for _, password in chunk])
+                self.db.tableValues_UpsertValues([(name, key) for (name, _), key in zip(chunk, encrypted_keys)])
+                if progress is not None:
+                    progress(start + len(chunk), len(passwords))
+        self.plaintext_cache.Clear()
+        return len(passwords)
+
+    def UpdateFingerprints(self, progress: Callable[[int, int], None] | None = None,
+                           cancel_event: threading.Event | None = None) -> int:
+        """
+        Computes the missing fingerprints (see Encryption.Fingerprint) of the saved passwords.
+
+        Passwords written by AddPassword / SetPassword / SavePassword get their fingerprint right away.
+        Values of older vaults, imported values and values re-encrypted with a new data key
+        (the fingerprints depend on it) have none, they are decrypted once here.
+        Every chunk is committed on its own, a cancelled run continues with the remaining values.
+
+        Args:
+            progress, cancel_event: See RotateDataKey.
+
+        Returns:
+            int: The number of computed fingerprints.
+        """
+
+        self._CheckDataKey()
+        total = self.db.tableValues_Count(missing_fingerprint=True)
+        done = 0
+        chunk_size = max(self.CHUNK_SIZE, Encryption.PARALLEL_MIN_BATCH * Encryption.MAX_WORKERS)
+        for chunk in self.db.tableValues_GetValueChunks(chunk_size, missing_fingerprint=True):
+            if cancel_event is not None and cancel_event.is_set():
+                raise OperationCancelled()
+            decrypted_keys = self.encryption.DecryptMany([key for _, _, key in chunk])
+            with self.db.transaction():
+                self._CheckDataKey()  # The fingerprints depend on the data key, none of a replaced one is saved
+                self.db.tableValues_SaveFingerprints(
+                    [(value_id, self.encryption.Fingerprint(password))
+                     for (value_id, _, _), password in zip(chunk, decrypted_keys)])
+            done += len(chunk)
+            if progress is not None:
+                progress(done, total)
+        return done
+
+    def FindReusedPasswords(self, progress: Callable[[int, int], None] | None = None,
+                            cancel_event: threading.Event | None = None) -> list[list[str]]:
+        """
+        Finds the passwords that are saved for more than one name.
+
+        Only missing fingerprints are computed (see UpdateFingerprints), the reuse itself is found
+        by grouping the fingerprint index in the database, without decrypting anything.
+
+        Args:
+            progress, cancel_event: See RotateDataKey, only used for missing fingerprints.
+
+        Returns:
+            list[list[str]]: The names of each group of names with the same password.
+        """
+
+        self.UpdateFingerprints(progress, cancel_event)
+        return self.db.tableValues_GetReusedNames()
+
+    def FindSimilarPasswords(self, threshold: float = PasswordSimilarity.DEFAULT_THRESHOLD,
+                             progress: Callable[[int, int], None] | None = None,
+                             cancel_event: threading.Event | None = None) -> list[list[str]]:
+        """
+        Finds groups of similar passwords (e.g. "Sommer2023!" and "sommer2024!"), see PasswordSimilarity.
+        Exactly reused passwords are part of the groups too.
+        All passwords are decrypted chunk by chunk, only their normalized forms are kept while searching.
+
+        Args:
+            threshold (float): Minimum similarity (0 to 1) of two similar passwords.
+            progress, cancel_event: See RotateDataKey.
+
+        Returns:
+            list[list[str]]: The names of each group of similar passwords.
+        """
+
+        return PasswordSimilarity(threshold).FindGroups(self.IterDecryptedPWList(progress, cancel_event))
+
+    def GetDecryptedPWList(self, progress: Callable[[int, int], None] | None = None,
+                           cancel_event: threading.Event | None = None) -> list[tuple]:
         """
         Retrieves all stored (site, encrypted_password) pairs from the database,
         decrypts each password using the current encryption key, and returns
         a list of (site, decrypted_password) tuples.
+        Use IterDecryptedPWList to process large vaults in constant memory.
+
+        Args:
+            progress, cancel_event: See RotateDataKey.
 
         Returns:
             list[tuple]: A list of tuples where each tuple contains:
                 - site (str): The site name.
                 - decrypted_password (str): The decrypted password for that site.
         """
-        encrypted_value_list = self.db.tableValues_GetAllValues()
-        return [
-            (name, self.encryption.Decrypt(key))
-            for name, key in encrypted_value_list
-        ]
\ No newline at end of file
+        return list(self.IterDecryptedPWList(progress, cancel_event))
+
+    def IterDecryptedPWList(self, progress: Callable[[int, int], None] | None = None,
+                            cancel_event: threading.Event | None = None,
+                            save_fingerprints: bool = False) -> Iterator[tuple[str, str]]:
+        """
+        Yields all (site, decrypted_password) pairs, reading and decrypting the values chunk by chunk,
+        so only one chunk is in memory at a time (e.g. for export or audit of large vaults).
+
+        Args:
+            progress, cancel_event: See RotateDataKey.
+            save_fingerprints (bool): Also save the missing fingerprints of the decrypted passwords
+                                      (see UpdateFingerprints), so a following FindReusedPasswords
+                                      does not decrypt anything.
+
+        Yields:
+            tuple[str, str]: The site name and the decrypted password for that site.
+        """
+        self._CheckDataKey()
+        for chunk in self._IterValueChunks(progress, cancel_event):
+            decrypted_keys = self.encryption.DecryptMany([key for _, _, key in chunk])
+            if save_fingerprints:
+                with self.db.transaction():
+                    self._CheckDataKey()
+                    self.db.tableValues_SaveFingerprints(
+                        [(value_id, self.encryption.Fingerprint(password))
+                         for (value_id, _, _), password in zip(chunk, decrypted_keys)], only_missing=True)
+            yield from zip((name for _, name, _ in chunk), decrypted_keys)
+
+    def _IterValueChunks(self, progress: Callable[[int, int], None] | None,
+                         cancel_event: threading.Event | None) -> Iterator[list[tuple[int, str, bytes]]]:
+        # Read the values chunk by chunk, report the progress and check the cancel event between the chunks.
+        # Chunks are big enough to keep all threads of EncryptMany / DecryptMany busy.
+        chunk_size = max(self.CHUNK_SIZE, Encryption.PARALLEL_MIN_BATCH * Encryption.MAX_WORKERS)
+        total = self.db.tableValues_Count() if progress is not None else 0
+        done = 0
+        for chunk in self.db.tableValues_GetValueChunks(chunk_size):
+            if cancel_event is not None and cancel_event.is_set():
+                raise OperationCancelled()
+            yield chunk
+            done += len(chunk)
+            if progress is not None:
+                progress(done, total)
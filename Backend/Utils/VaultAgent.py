@@ -0,0 +1,204 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from Backend.Utils.DBManager import DBManager
+from Backend.Utils.ToolHelper import ToolHelper, DataKeyChanged
+from Backend.Utils.VaultAgentClient import FRAME_HEADER, MAX_FRAME_SIZE, VaultAgentError, EncodeFrame
+from Backend.ProgramSettings import ProgramSettings
+
+
+async def _ReadFrame(reader: asyncio.StreamReader) -> dict | None:
+    # Returns None when the client closed the connection
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise VaultAgentError("frame too large")
+    return json.loads(await reader.readexactly(size))
+
+
+class VaultAgent:
+    """
+    Long running agent that keeps the vault unlocked for other local programs (e.g. scripts).
+
+    The vault is unlocked once with the user password, afterwards the data key stays in memory,
+    so lookups do not run the key derivation again. Clients talk to the agent over a Unix domain
+    socket (only accessible by the current user) with length prefixed JSON frames, see VaultAgentClient
+    (a separate module, so clients do not import the backend).
+    Several clients are served concurrently. The vault is locked again after
+    idle_lock_seconds without requests, or when another program replaced the data key (e.g. cli.py rekey).
+
+    Operations: "unlock" (password), "lock", "get" (name), "list", "search" (query, limit), "add" (name, password),
+    "ping".
+    """
+
+    def __init__(self, toolHelper: ToolHelper, socket_path: str = ProgramSettings.AGENT_SOCKET_PATH,
+                 idle_lock_seconds: float = ProgramSettings.AGENT_IDLE_LOCK_SECONDS):
+        """
+        Initializes the agent, the vault starts locked.
+
+        Args:
+            toolHelper (ToolHelper): The ToolHelper of the vault, its encryption is switched on unlock / lock.
+            socket_path (str): The path of the Unix domain socket.
+            idle_lock_seconds (float): The time without requests after which the vault is locked again.
+        """
+        self.toolHelper = toolHelper
+        self.socket_path = socket_path
+        self.idle_lock_seconds = idle_lock_seconds
+        self.unlocked = False
+        self._state_lock = threading.Lock()  # Serializes unlock, lock and writes of the requests
+        self.ready = threading.Event()  # Set when the socket accepts clients
+        # Vault operations block (SQLite, crypto), they run on these threads instead of the event loop
+        self._executor = ThreadPoolExecutor(max_workers=ProgramSettings.ASYNC_DB_READ_THREADS,
+                                            thread_name_prefix="VaultAgent")
+        self._active_requests = 0
+        self._idle_timer = None
+        self._loop = None
+        self._stop_event = None
+
+    def Run(self):
+        """
+        Runs the agent until Stop() is called (or the process is terminated).
+        """
+        asyncio.run(self.Serve())
+
+    def Stop(self):
+        """
+        Stops the agent, may be called from any thread.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    async def Serve(self):
+        """
+        Serves clients on the Unix domain socket until Stop() is called.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("The vault agent needs Unix domain sockets")
+
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # Left over by an agent that was killed
+
+        # Create the socket file without permissions for other users
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._HandleClient, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+
+        try:
+            async with server:
+                self.ready.set()
+                await self._stop_event.wait()
+        finally:
+            self._CancelIdleTimer()
+            self._executor.shutdown(wait=True)
+            if self.unlocked:
+                self._Lock()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self.ready.clear()
+
+    async def _HandleClient(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Answers the requests of one client until it closes the connection
+        try:
+            while (request := await _ReadFrame(reader)) is not None:
+                writer.write(EncodeFrame(await self._HandleRequest(request)))
+                await writer.drain()
+        except (ConnectionError, VaultAgentError, ValueError):
+            pass  # Broken or invalid frame: drop the client
+        finally:
+            writer.close()
+
+    async def _HandleRequest(self, request: dict) -> dict:
+        self._active_requests += 1
+        self._CancelIdleTimer()
+        try:
+            result = await self._loop.run_in_executor(self._executor, self._Execute, request)
+            return {"ok": True, "result": result}
+        except VaultAgentError as error:
+            return {"ok": False, "error": str(error)}
+        except Exception as error:
+            return {"ok": False, "error": f"{type(error).__name__}: {error}"}
+        finally:
+            self._active_requests -= 1
+            if self.unlocked and self._active_requests == 0:
+                self._idle_timer = self._loop.call_later(self.idle_lock_seconds, self._OnIdle)
+
+    def _Execute(self, request: dict):
+        # Runs one request on an executor thread
+        operation = request.get("op")
+        if operation == "ping":
+            return self._IsUnlocked()
+        if operation == "unlock":
+            return self._Unlock(request["password"])
+        if operation == "lock":
+            self._LockVault()
+            return True
+        if operation not in ("get", "list", "search", "add"):
+            raise VaultAgentError(f"unknown operation: {operation}")
+
+        if not self._IsUnlocked():
+            raise VaultAgentError("locked")
+        try:
+            if operation == "get":
+                return self.toolHelper.GetDecryptedPassword(request["name"])
+            if operation == "list":
+                return self.toolHelper.GetNames()
+            if operation == "search":
+                return self.toolHelper.SearchNames(request["query"], request.get("limit", DBManager.SEARCH_LIMIT))
+            with self._state_lock:
+                # The vault may have been locked since the check above, never write with the default key
+                if not self.unlocked:
+                    raise VaultAgentError("locked")
+                return self.toolHelper.AddPassword(request["name"], request["password"])
+        except DataKeyChanged:
+            self._LockVault()
+            raise VaultAgentError("locked")
+
+    def _Unlock(self, user_password: str) -> bool:
+        with self._state_lock:
+            if self.unlocked and self.toolHelper.IsDataKeyCurrent():
+                # Already unlocked, the password is checked anyway, so a wrong one is never accepted
+                return self.toolHelper.CheckUserPassword(user_password)
+            if self.unlocked:
+                self._Lock()  # The data key was replaced by another program, unlock with the new one
+            self.unlocked = self.toolHelper.Unlock(user_password)
+            return self.unlocked
+
+    def _IsUnlocked(self) -> bool:
+        # Locks the vault if another program replaced the data key since the unlock,
+        # values must not be read or written with the old one
+        with self._state_lock:
+            if self.unlocked and not self.toolHelper.IsDataKeyCurrent():
+                self._Lock()
+            return self.unlocked
+
+    def _LockVault(self):
+        with self._state_lock:
+            self._Lock()
+
+    def _Lock(self):
+        # The caller holds self._state_lock (or the executor is shut down)
+        self.unlocked = False
+        self.toolHelper.Lock()
+
+    def _OnIdle(self):
+        # Idle timer of the event loop: lock the vault if no request arrived in the meantime.
+        # The lock waits for running unlocks, so it runs on the executor instead of blocking the event loop.
+        self._idle_timer = None
+        if self.unlocked and self._active_requests == 0:
+            self._executor.submit(self._LockVault)
+
+    def _CancelIdleTimer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
@@ -0,0 +1,119 @@
+import json
+import socket
+import struct
+
+from Backend.ProgramSettings import ProgramSettings
+
+# Frame of the agent protocol: 4-byte big-endian payload length, followed by the JSON payload (UTF-8)
+# Request:  {"op": "get", "name": "SiteA"}
+# Response: {"ok": true, "result": "MySecret123!"} or {"ok": false, "error": "locked"}
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 1024 * 1024
+
+
+class VaultAgentError(Exception):
+    """
+    Raised by VaultAgentClient when the agent answers a request with an error.
+    """
+
+
+def EncodeFrame(message: dict) -> bytes:
+    """
+    Encodes a request or response as frame of the agent protocol.
+    """
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class VaultAgentClient:
+    """
+    Client of a VaultAgent, keeps one connection to the agent.
+
+    Usage:
+        with VaultAgentClient() as client:
+            password = client.Get("SiteA")
+    """
+
+    def __init__(self, socket_path: str = ProgramSettings.AGENT_SOCKET_PATH):
+        """
+        Connects to the agent.
+
+        Args:
+            socket_path (str): The path of the Unix domain socket of the agent.
+        """
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        self._file = self._socket.makefile("rb")
+
+    def __enter__(self) -> "VaultAgentClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+
+    def Close(self):
+        """
+        Closes the connection to the agent.
+        """
+        self._file.close()
+        self._socket.close()
+
+    def Request(self, operation: str, **arguments):
+        """
+        Sends a request to the agent and waits for the response.
+
+        Args:
+            operation (str): The operation, see VaultAgent.
+            **arguments: The arguments of the operation (e.g. name, password).
+
+        Returns:
+            The result of the operation.
+
+        Raises:
+            VaultAgentError: If the agent answered with an error (e.g. "locked").
+        """
+        self._socket.sendall(EncodeFrame({"op": operation, **arguments}))
+        header = self._file.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise VaultAgentError("connection closed by the agent")
+        (size,) = FRAME_HEADER.unpack(header)
+        response = json.loads(self._file.read(size))
+        if not response["ok"]:
+            raise VaultAgentError(response["error"])
+        return response["result"]
+
+    def Unlock(self, user_password: str) -> bool:
+        """
+        Unlocks the vault in the agent. Returns True if the password is correct.
+        """
+        return self.Request("unlock", password=user_password)
+
+    def Lock(self):
+        """
+        Locks the vault in the agent.
+        """
+        self.Request("lock")
+
+    def Get(self, name: str) -> str | None:
+        """
+        Returns the decrypted password for a name, or None if the name does not exist.
+        """
+        return self.Request("get", name=name)
+
+    def List(self) -> list[str]:
+        """
+        Returns the names of all saved passwords.
+        """
+        return self.Request("list")
+
+    def Search(self, query: str, limit: int = 20) -> list[str]:
+        """
+        Returns the names that match a search text, best match first (see DBManager.tableValues_Search).
+        """
+        return self.Request("search", query=query, limit=limit)
+
+    def Add(self, name: str, password: str) -> bool:
+        """
+        Adds a password for a new name. Returns False if the name already exists.
+        """
+        return self.Request("add", name=name, password=password)
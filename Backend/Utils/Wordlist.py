@@ -0,0 +1,117 @@
+import math
+import mmap
+import os
+import struct
+
+
+class Wordlist:
+    """
+    A word list for passphrases (e.g. the EFF large word list for diceware), read from a memory-mapped binary file.
+
+    The list is converted once (see Convert) into an offset-indexed file: the number of words, the offsets
+    of the words and the UTF-8 bytes of all words. A word is read by its index with two offset lookups,
+    so the list is never parsed into a Python list and opening it costs nothing but the mmap.
+
+    Usage:
+        Wordlist.Convert("eff_large_wordlist.txt", "passphrase_words.bin")
+        with Wordlist("passphrase_words.bin") as wordlist:
+            wordlist.GetWord(0)  # "abacus"
+    """
+
+    BUNDLED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Dictionaries", "passphrase_words.bin")
+    HEADER = struct.Struct("<I")  # Number of words, followed by number of words + 1 offsets and the words
+    OFFSET = struct.Struct("<I")  # Offset of a word, from the start of the words
+
+    def __init__(self, path: str):
+        """
+        Opens a word list file created by Convert.
+
+        Args:
+            path (str): The path of the word list file.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (self.count,) = self.HEADER.unpack_from(self._data)
+        self._words_offset = self.HEADER.size + (self.count + 1) * self.OFFSET.size
+
+    @classmethod
+    def OpenIfExists(cls, path: str | None) -> "Wordlist":
+        """
+        Opens a word list file if it exists (e.g. ProgramSettings.PASSPHRASE_WORDLIST_PATH),
+        otherwise the small word list that comes with the program (BUNDLED_PATH).
+
+        Returns:
+            Wordlist: The opened word list.
+        """
+        return cls(path if path is not None and os.path.exists(path) else cls.BUNDLED_PATH)
+
+    def __enter__(self) -> "Wordlist":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def Close(self):
+        """
+        Closes the memory-mapped file.
+        """
+        self._data.close()
+        self.count = 0
+
+    @property
+    def entropy_per_word(self) -> float:
+        """
+        The entropy of one randomly chosen word in bits (log2 of the number of words).
+        """
+        return math.log2(self.count) if self.count > 0 else 0.0
+
+    def GetWord(self, index: int) -> str:
+        """
+        Returns the word at an index.
+
+        Args:
+            index (int): The index of the word, 0 <= index < count.
+
+        Returns:
+            str: The word.
+        """
+        if not 0 <= index < self.count:
+            raise IndexError("word index out of range")
+        position = self.HEADER.size + index * self.OFFSET.size
+        (start,) = self.OFFSET.unpack_from(self._data, position)
+        (end,) = self.OFFSET.unpack_from(self._data, position + self.OFFSET.size)
+        return self._data[self._words_offset + start:self._words_offset + end].decode("utf-8")
+
+    @classmethod
+    def Convert(cls, source_path: str, target_path: str) -> int:
+        """
+        Converts a text word list into a word list file. Every line holds one word, optionally after
+        the dice numbers and a tab or space (like the EFF word lists). Empty lines and duplicate words are skipped.
+
+        Args:
+            source_path (str): The path of the text word list.
+            target_path (str): The path of the word list file to create.
+
+        Returns:
+            int: The number of words in the word list file.
+        """
+        words = {}
+        with open(source_path, "r", encoding="utf-8") as source:
+            for line in source:
+                fields = line.split()
+                if fields:
+                    words[fields[-1]] = None
+
+        encoded_words = [word.encode("utf-8") for word in words]
+        offsets = [0]
+        for encoded_word in encoded_words:
+            offsets.append(offsets[-1] + len(encoded_word))
+        with open(target_path, "wb") as target:
+            target.write(cls.HEADER.pack(len(encoded_words)))
+            target.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            target.write(b"".join(encoded_words))
+        return len(encoded_words)
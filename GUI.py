@@ -1,10 +1,13 @@
+import threading
 import tkinter as tk
-from tkinter import messagebox
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import font as tkfont
+from tkinter import messagebox, ttk
 
 from Backend.Utils.DBManager import DBManager
 from Backend.Utils.Encryption import Encryption
-from Backend.ProgramSettings import ProgramSettings
-from Backend.Utils.ToolHelper import ToolHelper
+from Backend.Utils.NameIndex import NameIndex
+from Backend.Utils.ToolHelper import ToolHelper, OperationCancelled, DataKeyChanged
 from Backend.Utils.PasswordSafety import PasswordSafety
 from Backend.Utils.PasswordGeneration import PasswordGeneration
 
@@ -26,12 +29,154 @@ def center_window(window, width=300, height=180):
     window.geometry(f"{width}x{height}+{x}+{y}")
 
 
+class VirtualListbox(tk.Frame):
+    """
+    A listbox with a scrollbar that only renders the visible rows.
+
+    The items stay in a Python list, the tk.Listbox only holds the rows of the visible window and is
+    filled again when the window moves (scrolling, resizing, changed items). So the cost of an update
+    does not depend on the number of items. The scrollbar shows the position in the whole list.
+    """
+
+    WHEEL_ROWS = 3  # Rows scrolled per mouse wheel step
+
+    def __init__(self, master, format_row, **kwargs):
+        """
+        Create the listbox.
+
+        Args:
+            master (tk.Widget): The parent widget.
+            format_row: Function format_row(item) that returns the text of the row of an item.
+        """
+        super().__init__(master, **kwargs)
+        self.format_row = format_row
+        self.items = []        # All items of the list, the rows show items[first:first + visible rows]
+        self.first = 0         # Index of the first visible item
+        self.selection = None  # Index of the selected item
+
+        self.scrollbar = tk.Scrollbar(self, orient='vertical', command=self.on_scrollbar)
+        self.listbox = tk.Listbox(self, activestyle='none', exportselection=False)
+        self.scrollbar.pack(side='right', fill='y')
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.row_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+
+        self.listbox.bind('<Configure>', lambda event: self.render())
+        self.listbox.bind('<<ListboxSelect>>', self.on_select)
+        self.listbox.bind('<MouseWheel>', lambda event: self.scroll(-self.WHEEL_ROWS if event.delta > 0
+                                                                    else self.WHEEL_ROWS))
+        self.listbox.bind('<Button-4>', lambda event: self.scroll(-self.WHEEL_ROWS))  # Mouse wheel on X11
+        self.listbox.bind('<Button-5>', lambda event: self.scroll(self.WHEEL_ROWS))
+        self.listbox.bind('<Up>', lambda event: self.move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self.move_selection(1))
+
+    def bind_rows(self, sequence, function):
+        """
+        Bind an event of the rows (e.g. '<Double-Button-1>').
+        """
+        self.listbox.bind(sequence, function)
+
+    def set_items(self, items):
+        """
+        Show other items (e.g. the result of a search), starting at the top.
+        """
+        self.items = items
+        self.first = 0
+        self.selection = None
+        self.render()
+
+    def insert(self, index, item):
+        """
+        Insert one item at an index.
+        """
+        self.items.insert(index, item)
+        if self.selection is not None and self.selection >= index:
+            self.selection += 1
+        self.render()
+
+    def delete(self, index):
+        """
+        Delete the item at an index.
+        """
+        del self.items[index]
+        if self.selection == index:
+            self.selection = None
+        elif self.selection is not None and self.selection > index:
+            self.selection -= 1
+        self.render()
+
+    def get_selected(self):
+        """
+        Return the selected item, or None.
+        """
+        return self.items[self.selection] if self.selection is not None else None
+
+    def visible_rows(self):
+        return max(1, self.listbox.winfo_height() // self.row_height)
+
+    def render(self):
+        """
+        Fill the listbox with the rows of the visible window and update the scrollbar.
+        """
+        rows = self.visible_rows()
+        self.first = max(0, min(self.first, len(self.items) - rows))
+        window = self.items[self.first:self.first + rows + 1]  # One more row for a partly visible last row
+
+        self.listbox.delete(0, tk.END)
+        if window:
+            self.listbox.insert(0, *(self.format_row(item) for item in window))
+        if self.selection is not None and self.first <= self.selection < self.first + len(window):
+            self.listbox.selection_set(self.selection - self.first)
+
+        if self.items:
+            self.scrollbar.set(self.first / len(self.items), min(1.0, (self.first + rows) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll(self, rows):
+        self.first += rows
+        self.render()
+        return "break"  # The listbox must not scroll its own rows
+
+    def on_scrollbar(self, action, value, unit=None):
+        # Scrollbar command: ("moveto", fraction) or ("scroll", count, "units" / "pages")
+        if action == "moveto":
+            self.first = int(float(value) * len(self.items))
+        elif unit == "pages":
+            self.first += int(value) * self.visible_rows()
+        else:
+            self.first += int(value)
+        self.render()
+
+    def on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selection = self.first + selection[0]
+
+    def move_selection(self, step):
+        # Keyboard navigation, scrolls the selected item into the visible window
+        if not self.items:
+            return "break"
+        if self.selection is None:
+            self.selection = self.first
+        else:
+            self.selection = max(0, min(self.selection + step, len(self.items) - 1))
+        rows = self.visible_rows()
+        if self.selection < self.first:
+            self.first = self.selection
+        elif self.selection >= self.first + rows:
+            self.first = self.selection - rows + 1
+        self.render()
+        return "break"
+
+
 class GUI:
     """
     Main GUI class for the password manager.
     Manages all user interactions and windows.
     """
 
+    POLL_INTERVAL_MS = 50  # How often the result of a background task is checked
+
     def __init__(self, dbManager: DBManager, encryption: Encryption, toolHelper: ToolHelper,
                  passwordSafety: PasswordSafety, passwordGeneration: PasswordGeneration):
         """
@@ -47,9 +192,15 @@ class GUI:
         self.root = tk.Tk()
         self.root.title("Passwort Manager")
         center_window(self.root, 350, 200)
-        self.password_list = []
+        self.root.report_callback_exception = self.report_callback_exception
+        self.name_index = NameIndex()  # Sorted names of all saved passwords, the passwords are decrypted on demand
+        self.password_list = None      # VirtualListbox of the main page
+        self.search_var = None         # Text of the search box of the main page
+        self.executor = ThreadPoolExecutor(max_workers=1)  # Runs long tasks, so the GUI stays responsive
+        self.busy = False                                   # True while a background task is running
         self.show_login_page()
         self.root.mainloop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
     def show_login_page(self):
         """
@@ -76,6 +227,87 @@ class GUI:
         login_btn = tk.Button(button_frame, text="Login", command=self.login_clicked)
         login_btn.pack(side="left", padx=5)
 
+    def run_in_background(self, parent, title, task, on_done):
+        """
+        Run a long task in the background executor, so the GUI stays responsive.
+        Shows a progress window with a cancel button. The result is passed back to the
+        Tk main loop by polling with root.after.
+
+        Args:
+            parent (tk.Tk or tk.Toplevel): The window the progress window belongs to.
+            title (str): Title of the progress window.
+            task: Function task(progress, cancel_event) that runs in the worker thread.
+                  It may call progress(done, total) and should stop when cancel_event is set.
+            on_done: Function on_done(result) that is called on the Tk main loop with the result of the task.
+        """
+        cancel_event = threading.Event()
+        progress_state = [0, 0]  # done, total; written by the worker thread, read by poll()
+
+        def progress(done, total):
+            progress_state[:] = [done, total]
+
+        progress_window = tk.Toplevel(parent)
+        progress_window.title(title)
+        center_window(progress_window, 300, 120)
+        progress_window.transient(parent)
+        progress_window.protocol("WM_DELETE_WINDOW", cancel_event.set)
+
+        label = tk.Label(progress_window, text="Bitte warten...")
+        label.pack(pady=(15, 5))
+        progress_bar = ttk.Progressbar(progress_window, mode="indeterminate", length=250)
+        progress_bar.pack()
+        progress_bar.start()
+        cancel_button = tk.Button(progress_window, text="Abbrechen", command=cancel_event.set, width=10)
+        cancel_button.pack(pady=10)
+        progress_window.grab_set()  # Block other input until the task is done
+
+        self.busy = True
+        future = self.executor.submit(task, progress, cancel_event)
+
+        def poll():
+            done, total = progress_state
+            if total:
+                if str(progress_bar.cget("mode")) != "determinate":
+                    progress_bar.stop()
+                    progress_bar.config(mode="determinate", maximum=total)
+                progress_bar.config(value=done)
+
+            if not future.done():
+                self.root.after(self.POLL_INTERVAL_MS, poll)
+                return
+
+            self.busy = False
+            progress_window.grab_release()
+            progress_window.destroy()
+            try:
+                result = future.result()
+            except OperationCancelled:
+                return
+            except DataKeyChanged:
+                raise  # See report_callback_exception
+            except Exception as error:
+                messagebox.showerror("Fehler", f"Der Vorgang ist fehlgeschlagen:\n{error}")
+                return
+            on_done(result)
+
+        self.root.after(self.POLL_INTERVAL_MS, poll)
+
+    def report_callback_exception(self, exc_type, exc_value, exc_traceback):
+        """
+        Handle exceptions raised in Tk callbacks.
+        If another program replaced the data key (e.g. cli.py rekey), the vault was locked:
+        close the windows of the session and return to the login page.
+        """
+        if not isinstance(exc_value, DataKeyChanged):
+            tk.Tk.report_callback_exception(self.root, exc_type, exc_value, exc_traceback)
+            return
+        for window in self.root.winfo_children():
+            if isinstance(window, tk.Toplevel):
+                window.destroy()
+        self.root.deiconify()
+        messagebox.showwarning("Abgemeldet", "Der Schlüssel des Tresors wurde von einem anderen Programm geändert.\n"
+                                             "Bitte erneut anmelden.")
+
     def toggle_password(self):
         """
         Toggle password visibility in the entry field.
@@ -91,14 +323,31 @@ class GUI:
         if password == "":
             messagebox.showwarning("Warnung", "Bitte Passwort eingeben.")
         else:
-            db_user_password = self.db.tableSaves_GetSave(1)
-            db_user_password = self.encryption.Decrypt(db_user_password)
-            if password == db_user_password:
-                ProgramSettings.CRYPT_KEY = db_user_password
-                self.password_list = self.toolHelper.GetDecryptedPWList()
+            def unlock(progress, cancel_event):
+                # Runs in the worker thread: key derivation (and migration of old vaults)
+                if not self.toolHelper.Unlock(password, progress, cancel_event):
+                    return None
+                return self.toolHelper.GetNames()
+
+            def unlocked(site_list):
+                if site_list is None:
+                    messagebox.showwarning("Falsches Passwort", "Das eingegebene Passwort ist nicht korrekt!")
+                    return
+                self.name_index = NameIndex(site_list)
                 self.show_main_page()
-            else:
-                messagebox.showwarning("Falsches Passwort", "Das eingegebene Passwort ist nicht korrekt!")
+                self.root.after_idle(self.upgrade_values)
+
+            self.run_in_background(self.root, "Anmelden", unlock, unlocked)
+
+    def upgrade_values(self):
+        """
+        Upgrade values in an old encryption format in small steps while the GUI is idle.
+        """
+        if self.busy:
+            # The database is used by a background task, try again later
+            self.root.after(self.POLL_INTERVAL_MS, self.upgrade_values)
+        elif self.toolHelper.UpgradeValues() > 0:
+            self.root.after_idle(self.upgrade_values)
 
     def show_main_page(self):
         """
@@ -137,27 +386,28 @@ class GUI:
                                     width=10)
         generate_button.grid(row=1, column=4, sticky="w", padx=5, pady=(5, 0))
 
-        plus_button = tk.Button(add_frame, text="+",
-                                command=lambda: self.add_password(site_entry, pw_entry,
-                                                                  lambda: self.update_password_list(self.listbox)),
+        plus_button = tk.Button(add_frame, text="+", command=lambda: self.add_password(site_entry, pw_entry),
                                 width=3)
         plus_button.grid(row=0, column=5, padx=5)
 
-        # Listbox with scrollbar
+        # Search box and list with scrollbar (only the visible rows are rendered)
         content_frame = tk.Frame(main_page)
         content_frame.pack(fill='both', expand=True, padx=10, pady=(0, 10))
 
-        list_frame = tk.Frame(content_frame)
-        list_frame.pack(fill='both', expand=True)
+        search_frame = tk.Frame(content_frame)
+        search_frame.pack(fill='x', pady=(0, 5))
+        search_label = tk.Label(search_frame, text="Suche:")
+        search_label.pack(side='left')
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side='left', fill='x', expand=True, padx=5)
+        self.search_var.trace_add("write", lambda *args: self.update_password_list())
 
-        scrollbar = tk.Scrollbar(list_frame, orient='vertical')
-        self.listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.listbox.yview)
-        scrollbar.pack(side='right', fill='y')
-        self.listbox.pack(side='left', fill='both', expand=True)
+        self.password_list = VirtualListbox(content_frame, lambda site: f"Seite: {site}   |   Passwort: ********")
+        self.password_list.pack(fill='both', expand=True)
 
-        self.update_password_list(self.listbox)
-        self.listbox.bind('<Double-Button-1>', lambda event: self.on_listbox_double_click(self.listbox, main_page))
+        self.update_password_list()
+        self.password_list.bind_rows('<Double-Button-1>', lambda event: self.on_listbox_double_click(main_page))
 
         # Bottom buttons
         buttons_frame = tk.Frame(content_frame)
@@ -238,27 +488,25 @@ class GUI:
             new_password = new_entry.get()
             confirm = confirm_entry.get()
 
-            db_user_password = self.db.tableSaves_GetSave(1)
-            db_user_password = self.encryption.Decrypt(db_user_password)
-
-            if current_password != db_user_password:
-                messagebox.showwarning("Fehler", "Aktuelles Passwort ist falsch.")
-                return
-            if not new_password or not confirm:
+            if not current_password or not new_password or not confirm:
                 messagebox.showwarning("Fehler", "Bitte alle Felder ausfüllen.")
                 return
             if new_password != confirm:
                 messagebox.showwarning("Fehler", "Neue Passwörter stimmen nicht überein.")
                 return
 
-            if self.toolHelper.UpdateUserPassword(new_password):
-                self.password_list = self.toolHelper.GetDecryptedPWList()
-                self.update_password_list(self.listbox)
+            def password_changed(success):
+                # The current password is checked by UpdateUserPassword in the worker thread (key derivation)
+                if not success:
+                    messagebox.showwarning("Fehler", "Aktuelles Passwort ist falsch.")
+                    return
                 messagebox.showinfo("Erfolg", "Passwort wurde geändert.")
-            else:
-                messagebox.showerror("Fehler", "Das Passwort konnte nicht geändert werden!")
+                change_pw_page.destroy()
 
-            change_pw_page.destroy()
+            self.run_in_background(change_pw_page, "Passwort ändern",
+                                   lambda progress, cancel_event: self.toolHelper.UpdateUserPassword(
+                                       current_password, new_password, progress, cancel_event),
+                                   password_changed)
 
         def cancel():
             change_pw_page.destroy()
@@ -276,17 +524,20 @@ class GUI:
         Logout and return to the login page.
         """
         if messagebox.askyesno("Abmelden", "Wirklich abmelden?"):
+            self.toolHelper.Lock()
             main_page.destroy()
             self.root.deiconify()
 
     def on_main_page_close(self, main_page):
         """
         Handle closing of main window.
+        Locks the vault like logout, so no decrypted password and no data key stays in memory.
         """
+        self.toolHelper.Lock()
         main_page.destroy()
         self.root.deiconify()
 
-    def add_password(self, site_entry, pw_entry, update_password_list):
+    def add_password(self, site_entry, pw_entry):
         """
         Add a new password to the list and database.
         """
@@ -300,36 +551,50 @@ class GUI:
         if not self.passwordSafety.Check(pw):
             return
 
-        if self.db.tableValues_GetValue(site) != "":
+        if not self.toolHelper.AddPassword(site, pw):
             messagebox.showwarning("Fehler", "Dieses Feld existiert bereits!")
             return
 
-        password_encrypted = self.encryption.Encrypt(pw)
-        self.db.tableValues_CreateValue(site, password_encrypted)
-
-        self.password_list.append((site, pw))
-        update_password_list()
+        index = self.name_index.Add(site)
+        if self.search_var.get():
+            self.update_password_list()  # The new site may or may not match the search
+        else:
+            self.password_list.insert(index, site)  # Without a search the list is the whole index
         site_entry.delete(0, tk.END)
         pw_entry.delete(0, tk.END)
 
-    def update_password_list(self, listbox):
+    def update_password_list(self):
+        """
+        Show the sites that match the search box in the password list (all sites for an empty search).
+        """
+        self.password_list.set_items(self.name_index.Find(self.search_var.get()))
+
+    def remove_from_password_list(self, site):
         """
-        Update the password list shown in the listbox.
+        Remove a deleted site from the name index and the password list.
         """
-        listbox.delete(0, tk.END)
-        for site, pw in self.password_list:
-            listbox.insert(tk.END, f"Seite: {site}   |   Passwort: {'*' * len(pw)}")
+        self.name_index.Remove(site)
+        index = self.password_list.selection
+        if index is not None and self.password_list.items[index] == site:
+            self.password_list.delete(index)  # Only the deleted row changes
+        else:
+            self.update_password_list()
 
-    def on_listbox_double_click(self, listbox, main_page):
+    def on_listbox_double_click(self, main_page):
         """
         Handle double click on a listbox item to edit/delete password.
         """
-        selection = listbox.curselection()
-        if not selection:
+        site = self.password_list.get_selected()
+        if site is None:
+            return
+
+        pw = self.toolHelper.GetDecryptedPassword(site)  # Only the opened password is decrypted
+        if pw is None:
+            # Deleted by another program (e.g. cli.py or the vault agent) since the list was loaded
+            self.remove_from_password_list(site)
+            messagebox.showwarning("Fehler", "Der Eintrag existiert nicht mehr.")
             return
 
-        index = selection[0]
-        site, pw = self.password_list[index]
         edit_window = tk.Toplevel(main_page)
         edit_window.title("Passwort bearbeiten")
         center_window(edit_window, 400, 250)
@@ -386,20 +651,15 @@ class GUI:
                 messagebox.showwarning("Fehler", "Bitte Passwort angeben.")
                 return
 
-            if self.db.tableValues_SaveValue(site, self.encryption.Encrypt(new_pw)):
-                self.password_list[index] = (site, new_pw)
-                self.update_password_list(listbox)
+            if self.toolHelper.SavePassword(site, new_pw):
                 messagebox.showinfo("Erfolg", "Die Änderung wurde erfolgreich gespeichert")
             else:
                 messagebox.showerror("Fehler", "Die Änderung konnte nicht gespeichert werden")
             edit_window.destroy()
 
         def delete_entry():
-            site = self.password_list[index][0]
-
-            if self.db.tableValues_DeleteValue(site):
-                del self.password_list[index]
-                self.update_password_list(listbox)
+            if self.toolHelper.DeletePassword(site):
+                self.remove_from_password_list(site)
                 messagebox.showinfo("Erfolg", "Der Eintrag wurde erfolgreich gelöscht.")
             else:
                 messagebox.showerror("Fehler", "Der Eintrag konnte nicht gelöscht werden!")
@@ -0,0 +1,14 @@
+from Backend.Utils.DBManager import DBManager
+from Backend.Utils.Encryption import Encryption
+from Backend.Utils.ToolHelper import ToolHelper
+from Backend.Utils.VaultAgent import VaultAgent
+from Backend.ProgramSettings import ProgramSettings
+
+# Runs the vault agent, clients unlock it once and then read passwords without the key derivation
+# (see VaultAgentClient)
+if __name__ == "__main__":
+    db = DBManager()
+    encryption = Encryption(ProgramSettings.DEFAULT_CRYPT_KEY)     # Encryption starts with the default crypt key
+    toolHelper = ToolHelper(db, encryption)
+    print(f"Vault agent listening on {ProgramSettings.AGENT_SOCKET_PATH}")
+    VaultAgent(toolHelper).Run()
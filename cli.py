@@ -0,0 +1,335 @@
+import argparse
+import csv
+import getpass
+import os
+import sys
+
+from Backend.ProgramSettings import ProgramSettings
+
+# Command line interface of the password manager, it does not need Tk.
+# Only light modules are imported at start, the backend (and with it 'cryptography') is imported
+# by the commands that need it. A lookup through the vault agent (agent.py) does not import it at all.
+#
+#   python cli.py get SITE | add SITE [--generate LENGTH | --passphrase [WORDS]] | list | search QUERY | rekey
+#                 | audit [--similar] | import FILE | export FILE | import-breaches FILE | import-wordlist FILE
+
+
+class CliError(Exception):
+    """
+    Raised by the commands for errors that are shown to the user (exit code 1).
+    """
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs a command of the command line interface.
+
+    Args:
+        argv (list[str] | None): The command line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        int: The exit code.
+    """
+    args = _CreateParser().parse_args(argv)
+    if args.db is not None:
+        ProgramSettings.DATABASE_PATH = args.db
+    if args.socket is not None:
+        ProgramSettings.AGENT_SOCKET_PATH = args.socket
+
+    try:
+        return args.command(args)
+    except CliError as error:
+        print(error, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+def _CreateParser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Passwort Manager (Kommandozeile)")
+    parser.add_argument("--db", help="Pfad der Datenbank (Standard: ProgramSettings.DATABASE_PATH)")
+    parser.add_argument("--socket", help="Socket des Vault-Agenten (Standard: ProgramSettings.AGENT_SOCKET_PATH)")
+    parser.add_argument("--no-agent", action="store_true", help="Den Vault-Agenten nicht verwenden")
+    commands = parser.add_subparsers(required=True, metavar="COMMAND")
+
+    get_parser = commands.add_parser("get", help="Passwort einer Seite ausgeben")
+    get_parser.add_argument("name", help="Seite")
+    get_parser.set_defaults(command=_CommandGet)
+
+    add_parser = commands.add_parser("add", help="Passwort für eine neue Seite speichern")
+    add_parser.add_argument("name", help="Seite")
+    generate_group = add_parser.add_mutually_exclusive_group()
+    generate_group.add_argument("--generate", type=int, metavar="LENGTH", help="Passwort mit dieser Länge generieren")
+    generate_group.add_argument("--passphrase", type=int, nargs="?", const=0, metavar="WORDS",
+                                help="Passphrase mit dieser Anzahl Wörter generieren "
+                                     "(ohne Anzahl: genug Wörter für eine sichere Passphrase)")
+    add_parser.set_defaults(command=_CommandAdd)
+
+    list_parser = commands.add_parser("list", help="Alle Seiten ausgeben")
+    list_parser.set_defaults(command=_CommandList)
+
+    search_parser = commands.add_parser("search", help="Seiten suchen (Wortanfänge, beste Treffer zuerst)")
+    search_parser.add_argument("query", help="Suchtext")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximale Anzahl Treffer (Standard: 20)")
+    search_parser.set_defaults(command=_CommandSearch)
+
+    rekey_parser = commands.add_parser("rekey", help="Alle Passwörter mit einem neuen Schlüssel verschlüsseln")
+    rekey_parser.set_defaults(command=_CommandRekey)
+
+    import_parser = commands.add_parser("import", help="Passwörter aus einer CSV-Datei (name,password) importieren")
+    import_parser.add_argument("file", help="CSV-Datei, '-' für stdin")
+    import_parser.set_defaults(command=_CommandImport)
+
+    audit_parser = commands.add_parser("audit", help="Alle Passwörter auf Sicherheit und Mehrfachverwendung prüfen")
+    audit_parser.add_argument("--similar", action="store_true", help="Auch ähnliche Passwörter suchen")
+    audit_parser.set_defaults(command=_CommandAudit)
+
+    breaches_parser = commands.add_parser("import-breaches",
+                                          help="Liste geleakter SHA-1-Hashes (HIBP-Format) für audit konvertieren")
+    breaches_parser.add_argument("file", help="Textdatei mit einem SHA-1-Hash pro Zeile (HASH:ANZAHL)")
+    breaches_parser.set_defaults(command=_CommandImportBreaches)
+
+    wordlist_parser = commands.add_parser("import-wordlist",
+                                          help="Wortliste (z.B. EFF) für Passphrasen konvertieren")
+    wordlist_parser.add_argument("file", help="Textdatei mit einem Wort pro Zeile (optional nach den Würfelzahlen)")
+    wordlist_parser.set_defaults(command=_CommandImportWordlist)
+
+    export_parser = commands.add_parser("export", help="Alle Passwörter unverschlüsselt als CSV-Datei exportieren")
+    export_parser.add_argument("file", help="CSV-Datei, '-' für stdout")
+    export_parser.set_defaults(command=_CommandExport)
+    return parser
+
+
+def _CommandGet(args: argparse.Namespace) -> int:
+    handled, password = _RequestAgent(args, "get", name=args.name)
+    if not handled:
+        password = _OpenVault().GetDecryptedPassword(args.name)
+    if password is None:
+        raise CliError(f"Seite nicht gefunden: {args.name}")
+    print(password)
+    return 0
+
+
+def _CommandAdd(args: argparse.Namespace) -> int:
+    generated = args.generate is not None or args.passphrase is not None
+    if generated:
+        from Backend.Utils.PasswordGeneration import PasswordGeneration
+        try:
+            if args.generate is not None:
+                password = PasswordGeneration.Generate(args.generate)
+            else:
+                password, entropy_bits, weak = PasswordGeneration.GeneratePassphrase(args.passphrase or None)
+                print(f"Entropie: {entropy_bits:.1f} Bit", file=sys.stderr)
+                if weak:
+                    print(f"Warnung: Weniger als {PasswordGeneration.MIN_PASSPHRASE_ENTROPY_BITS} Bit, mehr Wörter "
+                          "verwenden oder eine größere Wortliste importieren (import-wordlist).", file=sys.stderr)
+        except ValueError as error:
+            raise CliError(str(error))
+    else:
+        password = getpass.getpass("Neues Passwort: ")
+        if password != getpass.getpass("Neues Passwort bestätigen: "):
+            raise CliError("Neue Passwörter stimmen nicht überein.")
+    if not password:
+        raise CliError("Bitte Passwort angeben.")
+
+    handled, added = _RequestAgent(args, "add", name=args.name, password=password)
+    if not handled:
+        added = _OpenVault().AddPassword(args.name, password)
+    if not added:
+        raise CliError("Dieses Feld existiert bereits!")
+    if generated:
+        print(password)
+    return 0
+
+
+def _CommandList(args: argparse.Namespace) -> int:
+    handled, names = _RequestAgent(args, "list")
+    if not handled:
+        names = _OpenVault().GetNames()
+    for name in sorted(names, key=str.casefold):
+        print(name)
+    return 0
+
+
+def _CommandSearch(args: argparse.Namespace) -> int:
+    handled, names = _RequestAgent(args, "search", query=args.query, limit=args.limit)
+    if not handled:
+        names = _OpenVault().SearchNames(args.query, args.limit)
+    for name in names:
+        print(name)
+    return 0 if names else 1
+
+
+def _CommandRekey(args: argparse.Namespace) -> int:
+    from Backend.Utils.ToolHelper import DataKeyChanged
+
+    user_password = _ReadUserPassword()
+    toolHelper = _OpenVault(user_password)
+    # A running agent must not use the old data key anymore. Other sessions (GUI) notice the new
+    # key generation themselves and are locked before they read or write a value.
+    _LockAgent()
+    try:
+        toolHelper.RotateDataKey(user_password, _PrintProgress)
+    except DataKeyChanged:
+        raise CliError("Der Schlüssel wurde gleichzeitig von einem anderen Programm geändert.")
+    print("Alle Passwörter wurden neu verschlüsselt.", file=sys.stderr)
+    return 0
+
+
+def _CommandImport(args: argparse.Namespace) -> int:
+    with _OpenFile(args.file, "r") as file:
+        reader = csv.DictReader(file)
+        if reader.fieldnames is None or not {"name", "password"} <= set(reader.fieldnames):
+            raise CliError(f"{args.file}: Die CSV-Datei braucht die Spalten 'name' und 'password'.")
+        passwords = []
+        for row in reader:
+            if row["name"] is None or row["password"] is None:
+                raise CliError(f"{args.file}, Zeile {reader.line_num}: Seite oder Passwort fehlt.")
+            passwords.append((row["name"], row["password"]))
+    count = _OpenVault().ImportPasswords(passwords, _PrintProgress)
+    print(f"{count} Passwörter importiert.", file=sys.stderr)
+    return 0
+
+
+def _CommandAudit(args: argparse.Namespace) -> int:
+    from Backend.Utils.BreachedPasswords import BreachedPasswords
+    from Backend.Utils.PasswordSafety import PasswordSafety
+    from Backend.Utils.PasswordSimilarity import PasswordSimilarity
+
+    toolHelper = _OpenVault()
+    passwordSafety = PasswordSafety(BreachedPasswords.OpenIfExists(ProgramSettings.BREACHED_PASSWORDS_PATH))
+    unsafe_count = 0
+
+    def analyzed_passwords():
+        # The vault is decrypted once: every password is analyzed and printed right away, none is kept.
+        # The missing fingerprints are saved on the way, so the reuse check below decrypts nothing.
+        nonlocal unsafe_count
+        for name, password in toolHelper.IterDecryptedPWList(save_fingerprints=True):
+            report = passwordSafety.Analyze(password)
+            if not report.is_safe:
+                unsafe_count += 1
+                messages = " ".join(PasswordSafety.RULE_MESSAGES[rule] for rule in report.failed_rules)
+                print(f"{name}: {report.score}/100 {messages}")
+            yield name, password
+
+    if args.similar:
+        # Only the normalized forms of the passwords are kept while searching
+        similar = PasswordSimilarity().FindGroups(analyzed_passwords())
+    else:
+        similar = []
+        for _ in analyzed_passwords():
+            pass
+
+    reused = toolHelper.FindReusedPasswords()
+    for group in reused:
+        print(f"Mehrfach verwendet: {', '.join(group)}")
+    for group in similar:
+        print(f"Ähnlich: {', '.join(group)}")
+    return 0 if unsafe_count == 0 and not reused and not similar else 1
+
+
+def _CommandImportBreaches(args: argparse.Namespace) -> int:
+    from Backend.Utils.BreachedPasswords import BreachedPasswords
+
+    count = BreachedPasswords.Convert(args.file, ProgramSettings.BREACHED_PASSWORDS_PATH)
+    print(f"{count} Hashes nach {ProgramSettings.BREACHED_PASSWORDS_PATH} konvertiert.", file=sys.stderr)
+    return 0
+
+
+def _CommandImportWordlist(args: argparse.Namespace) -> int:
+    from Backend.Utils.Wordlist import Wordlist
+
+    count = Wordlist.Convert(args.file, ProgramSettings.PASSPHRASE_WORDLIST_PATH)
+    print(f"{count} Wörter nach {ProgramSettings.PASSPHRASE_WORDLIST_PATH} konvertiert.", file=sys.stderr)
+    return 0
+
+
+def _CommandExport(args: argparse.Namespace) -> int:
+    toolHelper = _OpenVault()
+    print("Achtung: Die Passwörter werden unverschlüsselt exportiert!", file=sys.stderr)
+    with _OpenFile(args.file, "w") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "password"])
+        writer.writerows(toolHelper.IterDecryptedPWList())
+    return 0
+
+
+def _OpenFile(path: str, mode: str):
+    # '-' stands for stdin / stdout, which must not be closed after the command
+    if path == "-":
+        return os.fdopen(os.dup((sys.stdin if mode == "r" else sys.stdout).fileno()), mode,
+                         encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _ReadUserPassword() -> str:
+    return getpass.getpass("Passwort eingeben: ")
+
+
+def _PrintProgress(done: int, total: int):
+    print(f"\r{done}/{total}", end="" if done < total else "\n", file=sys.stderr, flush=True)
+
+
+def _OpenVault(user_password: str | None = None):
+    """
+    Opens and unlocks the vault in this process.
+
+    Args:
+        user_password (str | None): The user password, it is asked for if None.
+
+    Returns:
+        ToolHelper: The ToolHelper of the unlocked vault.
+    """
+    from Backend.Utils.DBManager import DBManager
+    from Backend.Utils.Encryption import Encryption
+    from Backend.Utils.ToolHelper import ToolHelper
+
+    toolHelper = ToolHelper(DBManager(), Encryption(ProgramSettings.DEFAULT_CRYPT_KEY))
+    if user_password is None:
+        user_password = _ReadUserPassword()
+    if not toolHelper.Unlock(user_password, _PrintProgress):
+        raise CliError("Das eingegebene Passwort ist nicht korrekt!")
+    return toolHelper
+
+
+def _RequestAgent(args: argparse.Namespace, operation: str, **arguments) -> tuple[bool, object]:
+    """
+    Sends a request to the vault agent, if it is running. A locked agent is unlocked first.
+
+    Returns:
+        tuple[bool, object]: (True, result) if the agent answered, (False, None) if no agent is running.
+    """
+    if args.no_agent or not os.path.exists(ProgramSettings.AGENT_SOCKET_PATH):
+        return False, None
+    from Backend.Utils.VaultAgentClient import VaultAgentClient, VaultAgentError
+
+    try:
+        client = VaultAgentClient(ProgramSettings.AGENT_SOCKET_PATH)
+    except OSError:
+        return False, None  # Socket left over by an agent that is not running anymore
+    with client:
+        try:
+            if not client.Request("ping") and not client.Unlock(_ReadUserPassword()):
+                raise CliError("Das eingegebene Passwort ist nicht korrekt!")
+            return True, client.Request(operation, **arguments)
+        except VaultAgentError as error:
+            raise CliError(f"Fehler des Vault-Agenten: {error}")
+
+
+def _LockAgent():
+    """
+    Locks the vault agent, if it is running (also with --no-agent, its session would use an old data key).
+    """
+    if not os.path.exists(ProgramSettings.AGENT_SOCKET_PATH):
+        return
+    from Backend.Utils.VaultAgentClient import VaultAgentClient
+
+    try:
+        with VaultAgentClient(ProgramSettings.AGENT_SOCKET_PATH) as client:
+            client.Lock()
+    except OSError:
+        pass  # Socket left over by an agent that is not running anymore
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,24 @@
+import multiprocessing
+
 from Backend.Utils.DBManager import DBManager
 from Backend.Utils.Encryption import Encryption
 from Backend.Utils.ToolHelper import ToolHelper
 from Backend.Utils.PasswordSafety import PasswordSafety
+from Backend.Utils.BreachedPasswords import BreachedPasswords
 from Backend.Utils.PasswordGeneration import PasswordGeneration
 from Backend.ProgramSettings import ProgramSettings
 from GUI import GUI
 
-# Program initilization
-db = DBManager()
-encryption = Encryption()
-ProgramSettings.CRYPT_KEY = ProgramSettings.DEFAULT_CRYPT_KEY   # Update setting to ensure crypt key is set to default
-toolHelper = ToolHelper(db, encryption)
-passwordSafety = PasswordSafety()
-passwordGeneration = PasswordGeneration()
+# Only run in the main process, worker processes of RecryptPool import this module again on some platforms
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+    # Program initilization
+    db = DBManager()
+    encryption = Encryption(ProgramSettings.DEFAULT_CRYPT_KEY)     # Encryption starts with the default crypt key
+    toolHelper = ToolHelper(db, encryption)
+    passwordSafety = PasswordSafety(BreachedPasswords.OpenIfExists(ProgramSettings.BREACHED_PASSWORDS_PATH))
+    passwordGeneration = PasswordGeneration()
 
-# Create gui
-GUI(db, encryption, toolHelper, passwordSafety, passwordGeneration)
\ No newline at end of file
+    # Create gui
+    GUI(db, encryption, toolHelper, passwordSafety, passwordGeneration)
@@ -1,25 +1,55 @@
+import asyncio
+import hashlib
+import math
+import csv
 import unittest
 from unittest.mock import MagicMock, patch
 import string
+import subprocess
+import sys
 import random
+import socket
+import sqlite3
+import os
+import tempfile
+import threading
+import time
+from base64 import b64decode, b64encode
+from io import StringIO
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 # Patch ProgramSettings with in-memory testing configuration
 # Ensures encryption and DBManager work without persistent file storage
-import Backend.ProgramSettings as ProgramSettings
+from Backend.ProgramSettings import ProgramSettings
 ProgramSettings.CRYPT_KEY = "UnitTestKey123!"              # Key used for encryption during test
 ProgramSettings.DEFAULT_CRYPT_KEY = "DefaultTestKey123!"   # Default key for fallback and re-encryption
 ProgramSettings.DATABASE_PATH = ":memory:"                 # Use in-memory SQLite database for isolation
+ProgramSettings.KDF_TARGET_SECONDS = 0.01                  # Keep the calibrated key derivation cheap
 
 # Import classes under test
 from Backend.Utils.Encryption import Encryption
 from Backend.Utils.PasswordSafety import PasswordSafety
-from Backend.Utils.PasswordGeneration import PasswordGeneration
-from Backend.Utils.ToolHelper import ToolHelper
+from Backend.Utils.BreachedPasswords import BreachedPasswords
+from Backend.Utils.PasswordSimilarity import PasswordSimilarity
+from Backend.Utils.StrengthEstimator import StrengthEstimator
+from Backend.Utils.PasswordGeneration import PasswordGeneration, PasswordPolicy
+from Backend.Utils.Wordlist import Wordlist
+from Backend.Utils.ToolHelper import ToolHelper, OperationCancelled, DataKeyChanged
 from Backend.Utils.DBManager import DBManager
+from Backend.Utils.PlaintextCache import PlaintextCache
+from Backend.Utils.NameIndex import NameIndex
+from Backend.Utils.AsyncDBManager import AsyncDBManager
+from Backend.Utils.AsyncEncryption import AsyncEncryption
+from Backend.Utils.VaultAgent import VaultAgent
+from Backend.Utils.VaultAgentClient import VaultAgentClient, VaultAgentError
+import cli
 
 
 class TestEncryption(unittest.TestCase):
-    """Tests for the Encryption class (AES-256 CBC mode)."""
+    """Tests for the Encryption class (AES-256 GCM mode)."""
 
     def test_encrypt_and_decrypt_cycle(self):
         """Encrypt and decrypt a message, ensuring the result is identical to the original."""
@@ -29,6 +59,90 @@ class TestEncryption(unittest.TestCase):
         decrypted = encryption.Decrypt(encrypted)
         self.assertEqual(decrypted, message)
 
+    def test_explicit_crypt_key(self):
+        """Encryption uses the crypt key passed in, not the current ProgramSettings.CRYPT_KEY."""
+        encryption = Encryption("ExplicitKey123!")
+        self.assertEqual(encryption.key, Encryption.DeriveKey("ExplicitKey123!"))
+        self.assertNotEqual(encryption.key, Encryption().key)
+
+    def test_encrypt_and_decrypt_many(self):
+        """Batch encryption keeps the order, also when the batch is split across threads."""
+        encryption = Encryption()
+        messages = [f"Secret{i}!" for i in range(Encryption.PARALLEL_MIN_BATCH * 2 + 1)]
+        with patch.object(Encryption, "MAX_WORKERS", 2):
+            encrypted = encryption.EncryptMany(messages)
+            self.assertEqual(encryption.DecryptMany(encrypted), messages)
+        self.assertEqual(encryption.DecryptMany(encrypted[:3]), messages[:3])
+
+    def test_gcm_format_and_legacy_cbc(self):
+        """New values use the versioned GCM format, old CBC values can still be decrypted."""
+        encryption = Encryption()
+        encrypted = encryption.Encrypt("SuperSecret123!")
+        self.assertTrue(encryption.IsCurrentFormat(encrypted))
+
+        legacy = _legacy_encrypt(encryption.key, "OldSecret123!")
+        self.assertFalse(encryption.IsCurrentFormat(legacy))
+        self.assertEqual(encryption.Decrypt(legacy), "OldSecret123!")
+        legacy_blob = bytes([Encryption.LEGACY_FORMAT_VERSION]) + b64decode(legacy)  # Migrated to a BLOB
+        self.assertFalse(encryption.IsCurrentFormat(legacy_blob))
+        self.assertEqual(encryption.Decrypt(legacy_blob), "OldSecret123!")
+        with self.assertRaises(InvalidTag):
+            encryption.Decrypt(b"\x07" + legacy_blob[1:])  # Unknown version byte
+
+    def test_gcm_detects_tampering(self):
+        """A changed ciphertext is rejected instead of decrypted to garbage."""
+        encryption = Encryption()
+        raw = bytearray(encryption.Encrypt("SuperSecret123!"))
+        raw[-1] ^= 1
+        with self.assertRaises(InvalidTag):
+            encryption.Decrypt(bytes(raw))
+
+        # 3-byte messages give 32-byte values, which look like old CBC values (IV + one block)
+        for _ in range(200):
+            raw = bytearray(encryption.Encrypt("abc"))
+            self.assertEqual(len(raw), 32)
+            raw[random.randrange(1, len(raw))] ^= 1 << random.randrange(8)
+            with self.assertRaises(InvalidTag):
+                encryption.Decrypt(bytes(raw))
+
+    def test_calibrate_kdf(self):
+        """Calibrated KDF parameters get a random salt and never go below the minimum cost."""
+        scrypt_params = Encryption.CalibrateKdf(0.001, Encryption.KDF_SCRYPT)
+        self.assertEqual(scrypt_params["n"], Encryption.SCRYPT_MIN_N)
+        pbkdf2_params = Encryption.CalibrateKdf(0.001, Encryption.KDF_PBKDF2)
+        self.assertEqual(pbkdf2_params["iterations"], Encryption.DEFAULT_ITERATIONS)
+        self.assertNotEqual(scrypt_params["salt"], pbkdf2_params["salt"])
+
+        key = Encryption.DeriveKey("Password1!", **scrypt_params)
+        self.assertEqual(len(key), 32)
+        self.assertNotEqual(key, Encryption.DeriveKey("Password1!", **pbkdf2_params))
+        with self.assertRaises(ValueError):
+            Encryption.CalibrateKdf(0.001, "md5")
+
+    def test_derived_key_cache(self):
+        """The key cache returns the same key for the same parameters and stays bounded."""
+        key = Encryption.DeriveKey("CachedKey", iterations=1000)
+        self.assertEqual(Encryption.DeriveKey("CachedKey", iterations=1000), key)
+        self.assertNotEqual(Encryption.DeriveKey("CachedKey", iterations=1001), key)
+
+        for i in range(Encryption.KEY_CACHE_SIZE + 2):
+            Encryption.DeriveKey(f"Key{i}", iterations=1000)
+        self.assertLessEqual(len(Encryption._key_cache), Encryption.KEY_CACHE_SIZE)
+
+        self.assertTrue(Encryption.EvictKey(f"Key{Encryption.KEY_CACHE_SIZE + 1}", iterations=1000))
+        self.assertFalse(Encryption.EvictKey("CachedKey", iterations=1000))  # Already evicted
+        Encryption.ClearKeyCache()
+        self.assertEqual(len(Encryption._key_cache), 0)
+
+
+def _legacy_encrypt(key: bytes, message: str) -> str:
+    """Encrypt a message in the old format (IV + AES-256-CBC with PKCS7 padding)."""
+    padder = padding.PKCS7(128).padder()
+    padded_data = padder.update(message.encode("utf-8")) + padder.finalize()
+    iv = os.urandom(16)
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    return b64encode(iv + encryptor.update(padded_data) + encryptor.finalize()).decode("utf-8")
+
 
 class TestPasswordSafety(unittest.TestCase):
     """Tests for the password safety checker (PasswordSafety class)."""
@@ -49,24 +163,172 @@ class TestPasswordSafety(unittest.TestCase):
         self.assertFalse(checker.Check("Secure!Word"))       # Missing digit
         self.assertFalse(checker.Check("Secure1234"))        # Missing special character
 
+    def test_analyze_reports_all_failed_rules(self):
+        """Test that the analyzer reports every failed rule and a score without showing anything."""
+        checker = PasswordSafety()
+        report = checker.Analyze("abc")
+        self.assertEqual(report.failed_rules, [PasswordSafety.RULE_LENGTH, PasswordSafety.RULE_UPPERCASE,
+                                               PasswordSafety.RULE_DIGIT, PasswordSafety.RULE_SPECIAL,
+                                               PasswordSafety.RULE_GUESSABLE])
+        self.assertEqual(report.score, 22)
+        self.assertEqual(checker.Analyze("").score, 0)
+        reports = checker.CheckMany(["Secure!Pass123", "Secure!Pass123Secure!", "secure1234"])
+        self.assertEqual([report.is_safe for report in reports], [True, True, False])
+        self.assertEqual([report.score for report in reports], [95, 100, 55])
+
+    def test_guessable_passwords_and_passphrases(self):
+        """Test that common patterns fail despite all character classes, and long passphrases pass without them."""
+        checker = PasswordSafety()
+        self.assertEqual(checker.Analyze("Password1!").failed_rules, [PasswordSafety.RULE_GUESSABLE])
+        self.assertEqual(checker.Analyze("Qwertz1234!").failed_rules, [PasswordSafety.RULE_GUESSABLE])
+        self.assertTrue(checker.Analyze("correcthorsebatterystaple").is_safe)
+
+
+class TestStrengthEstimator(unittest.TestCase):
+    """Tests for the pattern based guess estimation."""
+
+    def test_patterns(self):
+        """Test that each kind of pattern is recognized and estimated far below bruteforce."""
+        estimator = StrengthEstimator()
+        for password, pattern in [("p4ssw0rd", "dictionary"), ("drowssap", "dictionary"), ("xcvbnm,", "keyboard"),
+                                  ("zzzzzzzz", "repeat"), ("abcdefgh", "sequence"), ("24.12.1990", "date"),
+                                  ("19901224", "date")]:
+            estimate = estimator.Estimate(password)
+            self.assertEqual([match.pattern for match in estimate.sequence], [pattern], password)
+            self.assertLess(estimate.guesses, 10 ** (len(password) - 2), password)
+
+        estimate = estimator.Estimate("kD8#mQ2!xZ")
+        self.assertEqual((estimate.guesses, estimate.score), (10.0 ** 10, 4))
+        self.assertEqual(estimator.Estimate("").guesses, 1)
+
+        # Characters after MAX_PATTERN_LENGTH are bruteforce, the pattern search stays bounded
+        estimate = estimator.Estimate("ab" * StrengthEstimator.MAX_PATTERN_LENGTH)
+        self.assertEqual([(match.pattern, match.end) for match in estimate.sequence],
+                         [("repeat", StrengthEstimator.MAX_PATTERN_LENGTH),
+                          ("bruteforce", 2 * StrengthEstimator.MAX_PATTERN_LENGTH)])
+
+
+class TestPasswordSimilarity(unittest.TestCase):
+    """Tests for finding similar passwords with MinHash buckets."""
+
+    def test_normalize(self):
+        """Test that case, l33t substitutions and numbers are normalized."""
+        self.assertEqual(PasswordSimilarity.Normalize("P@ssw0rd"), "password")
+        self.assertEqual(PasswordSimilarity.Normalize("Sommer2023!"), PasswordSimilarity.Normalize("sommer24!"))
+
+    def test_find_groups(self):
+        """Test that near-duplicates are grouped and unrelated passwords are not."""
+        passwords = [("SiteA", "Sommer2023!"), ("SiteB", "xK9#mQ2$vLp"), ("SiteC", "sommer2024!"),
+                     ("SiteD", "P@ssw0rd"), ("SiteE", "password7"), ("SiteF", "Winter2023!"),
+                     ("SiteG", "Sommer2023?")]
+        self.assertEqual(PasswordSimilarity().FindGroups(passwords),
+                         [["SiteA", "SiteC", "SiteG"], ["SiteD", "SiteE"]])
+        self.assertEqual(PasswordSimilarity(threshold=0.9).FindGroups(passwords), [["SiteA", "SiteC"]])
+
+
+class TestBreachedPasswords(unittest.TestCase):
+    """Tests for the offline check against a list of breached passwords."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source_path = os.path.join(directory.name, "pwned.txt")
+        self.target_path = os.path.join(directory.name, "breached.bin")
+        self.breached = [f"password{i}" for i in range(50)]
+        lines = [f"{hashlib.sha1(password.encode()).hexdigest().upper()}:{i}" for i, password in enumerate(self.breached)]
+        with open(self.source_path, "w", encoding="ascii") as file:
+            file.write("\n".join(lines + lines[:5] + ["invalid line"]) + "\n")  # Unsorted, with duplicates
+
+    def test_convert_and_lookup(self):
+        """Test that the converted file is sorted, without duplicates, and finds exactly the breached passwords."""
+        # Several sorted runs, merged in more than one pass
+        with patch.multiple(BreachedPasswords, SORT_CHUNK_SIZE=7, MERGE_FAN_IN=3):
+            self.assertEqual(BreachedPasswords.Convert(self.source_path, self.target_path), 50)
+        with open(self.target_path, "rb") as file:
+            records = [record for record in iter(lambda: file.read(BreachedPasswords.RECORD_SIZE), b"")]
+        self.assertEqual(records, sorted(set(records)))
+        with open(self.target_path + BreachedPasswords.BLOOM_SUFFIX, "rb") as file:
+            bit_count, _ = BreachedPasswords.BLOOM_HEADER.unpack(file.read(BreachedPasswords.BLOOM_HEADER.size))
+        self.assertEqual(bit_count, 50 * BreachedPasswords.BLOOM_BITS_PER_HASH)  # Sized without the duplicates
+
+        for bloom_filter in (True, False):
+            BreachedPasswords.Convert(self.source_path, self.target_path, bloom_filter)
+            with BreachedPasswords(self.target_path) as breached_passwords:
+                self.assertEqual(breached_passwords._bloom is not None, bloom_filter)
+                self.assertTrue(all(breached_passwords.Contains(password) for password in self.breached))
+                self.assertFalse(any(breached_passwords.Contains(f"Secure!{i}") for i in range(200)))
+
+    def test_password_safety_rule(self):
+        """Test that PasswordSafety reports breached passwords."""
+        BreachedPasswords.Convert(self.source_path, self.target_path)
+        with BreachedPasswords(self.target_path) as breached_passwords:
+            checker = PasswordSafety(breached_passwords)
+            self.assertEqual(checker.Analyze("password1").failed_rules[-1], PasswordSafety.RULE_BREACHED)
+            self.assertEqual(checker.Analyze("password1").score, 0)
+            self.assertTrue(checker.Analyze("Secure!Pass123").is_safe)
+        self.assertIsNone(BreachedPasswords.OpenIfExists(self.target_path + ".missing"))
+
 
 class TestPasswordGeneration(unittest.TestCase):
     """Tests for password generator to ensure character set diversity and length."""
 
     def test_generated_length_and_charset(self):
         """Ensure generated passwords meet length and charset (letters, digits, special chars)."""
-        for length in range(8, 17, 2):
-            # Retry generation multiple times in case random result is incomplete
-            for _ in range(10):
-                password = PasswordGeneration.Generate(length)
-                if (any(c in string.ascii_letters for c in password)
-                    and any(c in string.digits for c in password)
-                    and any(c in string.punctuation for c in password)):
-                    break
-            else:
-                self.fail("Password does not include all required charsets")
-
+        for length in range(4, 17, 2):
+            password = PasswordGeneration.Generate(length)
             self.assertEqual(len(password), length)
+            for character_class in (string.ascii_uppercase, string.ascii_lowercase, string.digits, string.punctuation):
+                self.assertTrue(any(c in character_class for c in password))
+
+    def test_generate_many_with_policy(self):
+        """Ensure bulk generation keeps every class and exclusion of the policy."""
+        policy = PasswordPolicy((string.ascii_lowercase, string.digits), excluded="l1o0")
+        passwords = PasswordGeneration.GenerateMany(500, 8, policy)
+        self.assertEqual(len(set(passwords)), 500)
+        for password in passwords:
+            self.assertEqual(len(password), 8)
+            self.assertTrue(any(c in string.digits for c in password))
+            self.assertTrue(any(c in string.ascii_lowercase for c in password))
+            self.assertFalse(set(password) & set("l1o0"))
+        self.assertEqual(set("".join(passwords)), set(string.ascii_lowercase + string.digits) - set("l1o0"))
+
+        with self.assertRaises(ValueError):
+            PasswordGeneration.Generate(3)  # Shorter than the number of classes
+        with self.assertRaises(ValueError):
+            PasswordGeneration.Generate(8, PasswordPolicy((string.digits,), excluded=string.digits))
+
+    def test_passphrase_from_wordlist(self):
+        """Ensure passphrases are made of words of the converted word list and report their entropy."""
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, "words.txt")
+            with open(source_path, "w", encoding="utf-8") as file:
+                file.write("11111\tabacus\n11112\tabdomen\n\n11113\tabdominal\n11114\tabide\nabacus\n")
+            self.assertEqual(Wordlist.Convert(source_path, os.path.join(directory, "words.bin")), 4)
+
+            with Wordlist(os.path.join(directory, "words.bin")) as wordlist:
+                self.assertEqual([wordlist.GetWord(i) for i in range(len(wordlist))],
+                                 ["abacus", "abdomen", "abdominal", "abide"])
+                passphrase, entropy_bits, weak = PasswordGeneration.GeneratePassphrase(
+                    5, " ", PasswordGeneration.CAPITALIZE_WORDS, wordlist)
+                self.assertEqual((entropy_bits, weak), (10.0, True))
+                words = passphrase.split(" ")
+                self.assertEqual(len(words), 5)
+                self.assertTrue(all(word[0].isupper() and word.lower() in ("abacus", "abdomen", "abdominal", "abide")
+                                    for word in words))
+                self.assertEqual(PasswordGeneration.GeneratePassphrase(
+                    3, capitalization=PasswordGeneration.CAPITALIZE_RANDOM, wordlist=wordlist).entropy_bits, 9.0)
+
+                # Without a word count, enough words for the minimum entropy are used
+                self.assertEqual(len(PasswordGeneration.GeneratePassphrase(wordlist=wordlist).passphrase.split("-")),
+                                 math.ceil(PasswordGeneration.MIN_PASSPHRASE_ENTROPY_BITS / 2))
+
+        with Wordlist.OpenIfExists(None) as wordlist:
+            self.assertEqual(wordlist.path, Wordlist.BUNDLED_PATH)
+            self.assertGreater(len(wordlist), 256)
+            passphrase = PasswordGeneration.GeneratePassphrase(wordlist=wordlist)
+            self.assertGreater(len(passphrase.passphrase.split("-")), PasswordGeneration.PASSPHRASE_WORDS)
+            self.assertGreaterEqual(passphrase.entropy_bits, PasswordGeneration.MIN_PASSPHRASE_ENTROPY_BITS)
+            self.assertFalse(passphrase.weak)
 
 
 class TestDBManagerInMemory(unittest.TestCase):
@@ -96,6 +358,128 @@ class TestDBManagerInMemory(unittest.TestCase):
         self.assertTrue(self.db.tableValues_DeleteValue("TestSite"))
         self.assertIsNone(self.db.tableValues_GetValue("TestSite"))
 
+    def test_value_bulk_crud(self):
+        """Test the batch create, update and delete operations on the 'values' table."""
+        self.assertEqual(self.db.tableValues_CreateValues([("SiteA", "A"), ("SiteB", "B")]), 2)
+        self.assertEqual(self.db.tableValues_SaveValues([("SiteA", "A2"), ("SiteB", "B2")]), 2)
+        self.assertEqual(self.db.tableValues_GetAllValues(), [("SiteA", "A2"), ("SiteB", "B2")])
+        self.assertEqual(self.db.tableValues_DeleteValues(["SiteA", "SiteB"]), 2)
+        self.assertEqual(self.db.tableValues_GetAllValues(), [])
+
+    def test_value_chunks(self):
+        """Test the keyset-paginated chunk iterator over the 'values' table."""
+        self.db.tableValues_CreateValues([(f"Site{i}", b"Key") for i in range(5)])
+        chunks = list(self.db.tableValues_GetValueChunks(chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([name for chunk in chunks for _, name, _ in chunk], [f"Site{i}" for i in range(5)])
+
+        after_value_id = chunks[0][-1][0]
+        remaining = list(self.db.tableValues_GetValueChunks(chunk_size=10, after_value_id=after_value_id))
+        self.assertEqual([name for _, name, _ in remaining[0]], ["Site2", "Site3", "Site4"])
+        self.assertEqual(self.db.tableValues_Count(), 5)
+
+        # Records already at the key generation are not overwritten (e.g. by a second program resuming a re-key)
+        value_ids = [value_id for value_id, _, _ in chunks[0]]
+        self.assertEqual(self.db.tableValues_SaveKeys([(value_ids[0], b"New")], key_generation=1), 1)
+        self.assertEqual(self.db.tableValues_SaveKeys([(value_id, b"Stale") for value_id in value_ids], 1), 1)
+        self.assertEqual(self.db.tableValues_GetValue("Site0"), b"New")
+        self.assertEqual(self.db.tableValues_GetValue("Site1"), b"Stale")
+        self.assertEqual(self.db.tableValues_Count(below_key_generation=1), 3)
+
+    def test_transaction_rollback(self):
+        """Test that a failing transaction rolls back all writes of the block."""
+        self.db.tableValues_CreateValue("SiteA", "A")
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.tableValues_SaveValue("SiteA", "Changed")
+                self.db.tableValues_CreateValue("SiteB", "B")
+                raise RuntimeError("Failure while re-encrypting")
+        self.assertEqual(self.db.tableValues_GetAllValues(), [("SiteA", "A")])
+
+    def test_migrate_text_schema_to_blob(self):
+        """Test that a database with base64 TEXT columns is migrated in place to BLOB columns."""
+        encryption = Encryption()
+        encrypted = _legacy_encrypt(encryption.key, "MySecret123!" * 8)
+        connection = self.db.connection
+        connection.executescript("""
+            DROP TABLE "values";
+            DROP TABLE saves;
+            CREATE TABLE "values" (ValueId INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT NOT NULL, Key TEXT NOT NULL);
+            CREATE TABLE saves (SaveId INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT NOT NULL, Value TEXT NOT NULL);
+            PRAGMA user_version = 0;
+        """)
+        connection.executemany('INSERT INTO "values" (Name, Key) VALUES (?, ?)',
+                               [(f"Site{i}", encrypted) for i in range(1000)])
+        connection.execute("INSERT INTO saves (Name, Value) VALUES (?, ?)", ("user", b64encode(b"User").decode()))
+        connection.execute("INSERT INTO values_fts (values_fts) VALUES ('rebuild')")  # Same search index before and after
+        connection.commit()
+        size_before = self.db.GetDatabaseSize()
+
+        self.db.CreateTableIfNotExists()
+        self.assertEqual(connection.execute("PRAGMA user_version").fetchone()[0], DBManager.SCHEMA_VERSION)
+        # Old CBC values are marked with the legacy version byte
+        migrated = self.db.tableValues_GetValue("Site0")
+        self.assertEqual(migrated, bytes([Encryption.LEGACY_FORMAT_VERSION]) + b64decode(encrypted))
+        self.assertEqual(encryption.Decrypt(migrated), "MySecret123!" * 8)
+        self.assertEqual(self.db.tableSaves_GetSave(1), bytes([Encryption.LEGACY_FORMAT_VERSION]) + b"User")
+        self.assertLess(self.db.GetDatabaseSize(), size_before)
+
+    def test_upsert_and_unique_names(self):
+        """Test the single-statement insert / upsert paths on the unique Name index."""
+        self.assertTrue(self.db.tableValues_TryCreateValue("SiteA", b"A"))
+        self.assertFalse(self.db.tableValues_TryCreateValue("SiteA", b"Other"))
+        self.db.tableValues_UpsertValue("SiteA", b"A2")
+        self.db.tableValues_UpsertValues([("SiteA", b"A3"), ("SiteB", b"B")])
+        self.assertEqual(self.db.tableValues_GetAllValues(), [("SiteA", b"A3"), ("SiteB", b"B")])
+
+        plan = self.db.connection.execute('EXPLAIN QUERY PLAN SELECT Key FROM "values" WHERE Name = ?', ("SiteA",))
+        self.assertIn("ValuesNameIndex", " ".join(str(row) for row in plan))
+
+    def test_search(self):
+        """Test the ranked prefix search of the full-text index and its sync triggers."""
+        self.assertTrue(self.db.fts_available)
+        self.db.tableValues_CreateValues([("mail.example.com", b"1"), ("Example", b"2"), ("shop.exam.de", b"3"),
+                                          ("bank", b"4")])
+        # Fewer words rank higher (bm25), equal ranks are ordered by name
+        self.assertEqual(self.db.tableValues_Search("exam"), ["Example", "mail.example.com", "shop.exam.de"])
+        self.assertEqual(self.db.tableValues_Search("MAIL ex"), ["mail.example.com"])
+        self.assertEqual(self.db.tableValues_Search("exam", limit=1), ["Example"])
+        self.assertEqual(self.db.tableValues_Search('bank" OR "shop'), [])  # No FTS5 query syntax
+        self.assertEqual(self.db.tableValues_Search("  "), [])
+
+        self.db.tableValues_SaveValue("bank", b"5")
+        self.db.connection.execute('UPDATE "values" SET Name = ? WHERE Name = ?', ("bank.de", "bank"))
+        self.db.tableValues_DeleteValue("Example")
+        self.assertEqual(self.db.tableValues_Search("ban"), ["bank.de"])
+        self.assertEqual(self.db.tableValues_Search("exam"), ["mail.example.com", "shop.exam.de"])
+
+        # Databases of schema version 4 get the index of their existing names
+        self.db.connection.executescript("DROP TABLE values_fts; PRAGMA user_version = 4;")
+        self.db.CreateTableIfNotExists()
+        self.assertEqual(self.db.tableValues_Search("bank"), ["bank.de"])
+
+        # The best matches are kept, even if many weaker ones were inserted before them
+        self.db.tableValues_DeleteValue("bank.de")
+        self.db.tableValues_CreateValues([(f"shop.bank.de.{i}", b"6") for i in range(5)] + [("bank.de", b"5")])
+        with patch.object(DBManager, "SEARCH_CANDIDATES", 2):
+            self.assertEqual(self.db.tableValues_Search("bank", limit=1), ["bank.de"])
+
+        # Without FTS5 every word is matched on its own, like with the index
+        self.db.fts_available = False
+        self.assertEqual(self.db.tableValues_Search("EXA  mail"), ["mail.example.com"])
+        self.assertEqual(self.db.tableValues_Search("de_"), [])  # '_' is no LIKE wildcard
+
+    def test_migrate_duplicate_names(self):
+        """Test that duplicate names of an old database are renamed before the unique index is created."""
+        connection = self.db.connection
+        connection.execute("DROP INDEX ValuesNameIndex")
+        connection.executemany('INSERT INTO "values" (Name, Key) VALUES (?, ?)', [("Site", b"1"), ("Site", b"2")])
+        connection.execute("PRAGMA user_version = 1")
+        connection.commit()
+
+        self.db.CreateTableIfNotExists()
+        self.assertEqual(self.db.tableValues_GetAllValues(), [("Site", b"1"), ("Site (2)", b"2")])
+
     def test_save_crud(self):
         """Test retrieval and update of entries in the 'saves' table (used for storing master password)."""
         value = self.db.tableSaves_GetSave(1)
@@ -105,6 +489,222 @@ class TestDBManagerInMemory(unittest.TestCase):
         self.assertEqual(self.db.tableSaves_GetSave(1), "UpdatedValue")
 
 
+class TestDBManagerFile(unittest.TestCase):
+    """Tests for the per-thread connections of a database file (WAL mode)."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = patch.object(ProgramSettings, "DATABASE_PATH", os.path.join(directory.name, "test.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db = DBManager()
+        self.addCleanup(self.db.Close)
+
+    def test_readers_do_not_wait_for_writer(self):
+        """Test that another thread reads the committed state while a transaction holds the write lock."""
+        self.assertEqual(self.db.connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.db.tableValues_CreateValue("SiteA", b"old")
+
+        results = []
+        with patch.object(ProgramSettings, "DB_BUSY_TIMEOUT_SECONDS", 0.1), self.db.transaction():
+            self.db.tableValues_SaveValue("SiteA", b"new")
+            self.assertEqual(self.db.tableValues_GetValue("SiteA"), b"new")  # Own uncommitted write
+            reader = threading.Thread(target=lambda: results.append(self.db.tableValues_GetValue("SiteA")))
+            reader.start()
+            reader.join()
+        self.assertEqual(results, [b"old"])
+        self.assertEqual(self.db.tableValues_GetValue("SiteA"), b"new")
+
+    def test_read_connection_is_read_only(self):
+        """Test that lookups use a read-only connection outside of transactions."""
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.read_connection.execute('DELETE FROM "values"')
+
+
+class TestAsyncFacades(unittest.TestCase):
+    """Tests for the asyncio facades of DBManager and Encryption."""
+
+    def test_async_db_and_encryption(self):
+        """Test that lookups, writes and crypto run off the event loop thread and return the sync results."""
+        db = DBManager()
+
+        async def run():
+            async with AsyncDBManager(db) as async_db, AsyncEncryption(Encryption()) as async_encryption:
+                key = await async_encryption.Encrypt("MySecret123!")
+                self.assertTrue(await async_db.tableValues_TryCreateValue("SiteA", key))
+                await async_db.RunInTransaction(lambda db: db.tableValues_CreateValues([("SiteB", key), ("SiteC", key)]))
+                keys = await asyncio.gather(*(async_db.tableValues_GetValue(name) for name in ["SiteA", "SiteB", "SiteC"]))
+                self.assertEqual(await async_encryption.DecryptMany(keys), ["MySecret123!"] * 3)
+                chunks = [chunk async for chunk in async_db.tableValues_GetValueChunks(2)]
+                self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+                self.assertEqual(await async_db.tableValues_Count(), 3)
+
+        async def close_while_busy():
+            # Leaving 'async with' waits for a queued slow write without blocking the event loop
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            ticker = asyncio.ensure_future(tick())
+            async with AsyncDBManager(db) as async_db:
+                write = asyncio.ensure_future(async_db.RunInTransaction(lambda db: time.sleep(0.3)))
+                await asyncio.sleep(0)
+            self.assertTrue(write.done())
+            self.assertGreater(ticks, 5)
+            ticker.cancel()
+
+        asyncio.run(run())
+        asyncio.run(close_while_busy())
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix domain sockets are not available")
+class TestVaultAgent(unittest.TestCase):
+    """Tests for the unlocked-session agent and its client."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.socket_path = os.path.join(directory.name, "agent.sock")
+        db = DBManager()
+        db.connection.execute("UPDATE saves SET Value = ? WHERE Name = ?",
+                              (Encryption().Encrypt(ProgramSettings.DEFAULT_CRYPT_KEY), "user"))
+        db.connection.commit()
+        self.agent = VaultAgent(ToolHelper(db, Encryption()), self.socket_path, idle_lock_seconds=0.2)
+        thread = threading.Thread(target=self.agent.Run)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.agent.Stop)
+        self.assertTrue(self.agent.ready.wait(5))
+
+    def test_unlock_and_requests(self):
+        """Test that the agent answers requests of concurrent clients only while unlocked."""
+        with VaultAgentClient(self.socket_path) as client, VaultAgentClient(self.socket_path) as other_client:
+            with self.assertRaises(VaultAgentError):
+                client.Get("SiteA")  # Locked
+            self.assertFalse(client.Unlock("WrongPassword1!"))
+            self.assertTrue(client.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+
+            self.assertTrue(client.Add("SiteA", "MySecret123!"))
+            self.assertFalse(other_client.Add("SiteA", "Other123!"))
+            self.assertEqual(other_client.Get("SiteA"), "MySecret123!")
+            self.assertIsNone(client.Get("Missing"))
+            self.assertEqual(client.List(), ["SiteA"])
+            self.assertEqual(other_client.Search("sit"), ["SiteA"])
+
+            client.Lock()
+            with self.assertRaises(VaultAgentError):
+                other_client.List()
+
+    def test_unlock_checks_password_and_data_key(self):
+        """Test that a wrong password fails while unlocked and that a re-key of another program locks the vault."""
+        with VaultAgentClient(self.socket_path) as client:
+            self.assertTrue(client.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+            self.assertFalse(client.Unlock("WrongPassword1!"))
+            self.assertTrue(client.Add("SiteA", "Secret1!"))
+
+            other = ToolHelper(self.agent.toolHelper.db, Encryption())
+            self.assertTrue(other.RotateDataKey(ProgramSettings.DEFAULT_CRYPT_KEY))
+            with self.assertRaises(VaultAgentError):
+                client.Add("SiteB", "Secret2!")
+            self.assertFalse(client.Request("ping"))
+            self.assertTrue(client.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+            self.assertTrue(client.Add("SiteB", "Secret2!"))
+        self.assertEqual(other.GetDecryptedPassword("SiteB"), "Secret2!")
+
+    def test_idle_lock(self):
+        """Test that the agent locks the vault after the idle timeout."""
+        with VaultAgentClient(self.socket_path) as client:
+            self.assertTrue(client.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+            self.assertEqual(client.List(), [])
+            time.sleep(0.5)
+            with self.assertRaises(VaultAgentError):
+                client.List()
+
+
+class TestCli(unittest.TestCase):
+    """Tests for the command line interface."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        patcher = patch.multiple(ProgramSettings, DATABASE_PATH=os.path.join(self.directory, "test.db"),
+                                 AGENT_SOCKET_PATH=os.path.join(self.directory, "agent.sock"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        db = DBManager()
+        db.connection.execute("UPDATE saves SET Value = ? WHERE Name = ?",
+                              (Encryption(ProgramSettings.DEFAULT_CRYPT_KEY).Encrypt(ProgramSettings.DEFAULT_CRYPT_KEY), "user"))
+        db.connection.commit()
+        db.Close()
+
+    def _Run(self, *argv: str) -> tuple[int, str]:
+        output = StringIO()
+        with patch("getpass.getpass", return_value=ProgramSettings.DEFAULT_CRYPT_KEY), \
+                patch("sys.stdout", output), patch("sys.stderr", StringIO()):
+            return cli.main(list(argv)), output.getvalue()
+
+    def test_commands(self):
+        """Test add, get, list, rekey and the CSV import / export."""
+        import_file = os.path.join(self.directory, "import.csv")
+        with open(import_file, "w", encoding="utf-8", newline="") as file:
+            file.write('name,password\nSiteB,"Secret,2!"\nSiteC,secret3!\n')
+        self.assertEqual(self._Run("import", import_file)[0], 0)
+        invalid_file = os.path.join(self.directory, "invalid.csv")
+        for content in ("site,pw\nSiteD,secret4!\n", "", "name,password\nSiteD\n"):
+            with open(invalid_file, "w", encoding="utf-8", newline="") as file:
+                file.write(content)
+            self.assertEqual(self._Run("import", invalid_file)[0], 1)  # Missing column or value, nothing imported
+
+        exit_code, generated = self._Run("add", "SiteA", "--generate", "12")
+        self.assertEqual((exit_code, len(generated.strip())), (0, 12))
+        self.assertEqual(self._Run("add", "SiteA", "--generate", "12")[0], 1)  # Name already exists
+        self.assertEqual(self._Run("rekey")[0], 0)
+        self.assertEqual(self._Run("get", "SiteA"), (0, generated))
+        self.assertEqual(self._Run("get", "Missing")[0], 1)
+        self.assertEqual(self._Run("list"), (0, "SiteA\nSiteB\nSiteC\n"))
+        self.assertEqual(self._Run("search", "siteb"), (0, "SiteB\n"))
+        self.assertEqual(self._Run("search", "missing")[0], 1)
+        exit_code, audit = self._Run("audit")
+        self.assertEqual(exit_code, 1)
+        self.assertIn("SiteC", [line.split(":")[0] for line in audit.splitlines()])  # No uppercase letter
+        self.assertEqual(self._Run("audit", "--similar"), (exit_code, audit))  # Nothing similar in this vault
+
+        export_file = os.path.join(self.directory, "export.csv")
+        self.assertEqual(self._Run("export", export_file)[0], 0)
+        with open(export_file, encoding="utf-8", newline="") as file:
+            self.assertIn(["SiteB", "Secret,2!"], list(csv.reader(file)))
+
+    def test_rekey_locks_agent(self):
+        """Test that rekey locks a running agent, so it does not keep the old data key."""
+        agent = VaultAgent(ToolHelper(DBManager(), Encryption(ProgramSettings.DEFAULT_CRYPT_KEY)),
+                           ProgramSettings.AGENT_SOCKET_PATH)
+        thread = threading.Thread(target=agent.Run)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(agent.Stop)
+        self.assertTrue(agent.ready.wait(5))
+        with VaultAgentClient(ProgramSettings.AGENT_SOCKET_PATH) as client:
+            self.assertTrue(client.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+            self.assertEqual(self._Run("rekey")[0], 0)
+            self.assertFalse(agent.unlocked)
+            self.assertEqual(self._Run("add", "SiteA", "--generate", "12")[0], 0)  # Unlocks the agent again
+            self.assertTrue(agent.unlocked)
+        self.assertEqual(self._Run("--no-agent", "list"), (0, "SiteA\n"))
+
+    def test_no_tkinter_import(self):
+        """Test that the backend and the command line interface do not import tkinter."""
+        code = "import sys, cli, Backend.Utils.ToolHelper, Backend.Utils.PasswordSafety; print('tkinter' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip(), "False")
+
+
 class TestToolHelper(unittest.TestCase):
     """Tests for the ToolHelper logic, including password re-encryption and decryption."""
 
@@ -134,13 +734,239 @@ class TestToolHelper(unittest.TestCase):
     def test_update_user_password(self):
         """Test the full password update workflow (re-encryption of all values)."""
         new_pw = "NewSecret123!"
-        self.assertTrue(self.helper.UpdateUserPassword(new_pw))  # Update works
+        self.assertFalse(self.helper.UpdateUserPassword("WrongPassword1!", new_pw))  # Current password is checked
+        self.assertTrue(self.helper.UpdateUserPassword(ProgramSettings.DEFAULT_CRYPT_KEY, new_pw))  # Update works
 
         ProgramSettings.CRYPT_KEY = new_pw  # Switch encryption context
         self.db.tableValues_CreateValue("TestService", self.enc.Encrypt("Hello123!"))
         values = self.helper.GetDecryptedPWList()
         self.assertIsInstance(values, list)
 
+    def test_update_user_password_keeps_values(self):
+        """Test that a password change only rewraps the data key and leaves the values untouched."""
+        self.db.tableValues_CreateValue("SiteA", self.enc.Encrypt("MySecret123!"))
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))  # Migrates to the data key once
+        values_before = self.db.tableValues_GetAllValues()
+
+        self.assertTrue(self.helper.UpdateUserPassword(ProgramSettings.DEFAULT_CRYPT_KEY, "NewSecret123!"))
+        self.assertEqual(self.db.tableValues_GetAllValues(), values_before)
+
+        helper = ToolHelper(self.db, Encryption(self.helper.saves_encryption.key))
+        self.assertFalse(helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.assertTrue(helper.Unlock("NewSecret123!"))
+        self.assertEqual(helper.GetDecryptedPWList(), [("SiteA", "MySecret123!")])
+
+    def test_upgrade_values(self):
+        """Test that the background sweep upgrades old CBC values to the current format."""
+        self.db.tableValues_CreateValues([("Old", _legacy_encrypt(self.enc.key, "OldSecret1!")),
+                                          ("New", self.enc.Encrypt("NewSecret1!"))])
+        self.assertEqual(self.helper.UpgradeValues(), 1)
+        self.assertEqual(self.helper.UpgradeValues(), 0)
+        self.assertTrue(self.enc.IsCurrentFormat(self.db.tableValues_GetValue("Old")))
+        self.assertEqual(self.helper.GetDecryptedPWList(), [("Old", "OldSecret1!"), ("New", "NewSecret1!")])
+
+    def test_unlock_saves_calibrated_kdf_params(self):
+        """Test that unlocking an old vault stores a random salt and the configured KDF for the user password."""
+        self.assertEqual(self.helper.GetKdfParams()["salt"], Encryption.DEFAULT_SALT)
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+
+        kdf_params = self.helper.GetKdfParams()
+        self.assertEqual(kdf_params["algorithm"], ProgramSettings.KDF_ALGORITHM)
+        self.assertEqual(len(kdf_params["salt"]), Encryption.SALT_SIZE)
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.assertEqual(self.helper.GetKdfParams(), kdf_params)
+        self.assertEqual(self.helper.GetKeyGeneration(), 1)
+
+        # The KDF is only calibrated again (with a new salt) when the password changes, not for a re-key
+        with patch.object(Encryption, "CalibrateKdf", wraps=Encryption.CalibrateKdf) as calibrate_kdf:
+            self.assertTrue(self.helper.RotateDataKey(ProgramSettings.DEFAULT_CRYPT_KEY))
+            self.assertEqual(self.helper.GetKdfParams(), kdf_params)
+            self.assertTrue(self.helper.UpdateUserPassword(ProgramSettings.DEFAULT_CRYPT_KEY, "NewSecret123!"))
+        self.assertEqual(calibrate_kdf.call_count, 1)
+        self.assertNotEqual(self.helper.GetKdfParams()["salt"], kdf_params["salt"])
+        # Text records (KDF parameters, key generation) are stored as BLOBs like the wrapped keys
+        self.assertEqual({row[0] for row in self.db.connection.execute("SELECT typeof(Value) FROM saves")}, {"blob"})
+
+    def test_user_password_is_not_stored(self):
+        """Test that the migration deletes the reversible user password, the wrapped data key checks it instead."""
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.assertIsNone(self.db.tableSaves_GetSaveByName(ToolHelper.USER_SAVE_NAME))
+        self.db.CreateTableIfNotExists()
+        self.assertIsNone(self.db.tableSaves_GetSaveByName(ToolHelper.USER_SAVE_NAME))  # Not inserted again
+
+        self.assertTrue(self.helper.CheckUserPassword(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.assertFalse(self.helper.CheckUserPassword("WrongPassword1!"))
+        helper = ToolHelper(self.db, Encryption(self.helper.saves_encryption.key))
+        self.assertFalse(helper.Unlock("WrongPassword1!"))
+        self.assertTrue(helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+
+    def test_data_key_changed_by_other_program(self):
+        """Test that a session does not use its data key after another program re-keyed the vault."""
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.assertTrue(self.helper.AddPassword("SiteA", "Secret1!"))
+        old_data_key = self.helper.GetDataKey(ProgramSettings.DEFAULT_CRYPT_KEY)
+
+        other = ToolHelper(self.db, Encryption(self.helper.saves_encryption.key))
+        self.assertTrue(other.RotateDataKey(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.assertFalse(self.helper.IsDataKeyCurrent())
+        with self.assertRaises(DataKeyChanged):
+            self.helper.AddPassword("SiteB", "Secret2!")
+        self.assertEqual(self.helper.encryption.key, self.helper.saves_encryption.key)  # Locked
+        self.assertEqual(self.db.tableValues_GetAllNames(), ["SiteA"])
+        # A re-key started from the replaced data key would drop the data key of the other program
+        with patch.object(ToolHelper, "GetDataKey", return_value=old_data_key), self.assertRaises(DataKeyChanged):
+            self.helper.RotateDataKey(ProgramSettings.DEFAULT_CRYPT_KEY)
+
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.assertTrue(self.helper.AddPassword("SiteB", "Secret2!"))
+        self.assertEqual(other.GetDecryptedPWList(), [("SiteA", "Secret1!"), ("SiteB", "Secret2!")])
+
+        # Fingerprints depend on the data key, none of a replaced one are saved
+        self.assertTrue(other.RotateDataKey(ProgramSettings.DEFAULT_CRYPT_KEY))
+        with self.assertRaises(DataKeyChanged):
+            self.helper.FindReusedPasswords()
+        self.assertEqual(self.db.tableValues_Count(missing_fingerprint=True), 2)
+
+    def test_progress_and_cancel(self):
+        """Test that long operations report progress and leave the values untouched when cancelled."""
+        self.db.tableValues_CreateValues([(f"Site{i}", self.enc.Encrypt(f"Secret{i}!")) for i in range(5)])
+        progress = MagicMock()
+        with patch.object(ToolHelper, "CHUNK_SIZE", 2), patch.object(Encryption, "PARALLEL_MIN_BATCH", 1), \
+                patch.object(Encryption, "MAX_WORKERS", 1):
+            self.assertEqual(len(self.helper.GetDecryptedPWList(progress)), 5)
+            progress.assert_called_with(5, 5)
+            self.assertEqual(progress.call_count, 3)
+
+            values_before = self.db.tableValues_GetAllValues()
+            cancel_event = threading.Event()
+            cancel_event.set()
+            with self.assertRaises(OperationCancelled):
+                self.helper.UpdateUserPassword(ProgramSettings.DEFAULT_CRYPT_KEY, "NewSecret123!",
+                                               cancel_event=cancel_event)  # Cancels the migration
+        self.assertEqual(self.db.tableValues_GetAllValues(), values_before)
+        self.assertTrue(self.helper.CheckUserPassword(ProgramSettings.DEFAULT_CRYPT_KEY))
+
+    def test_interrupted_rekey_resumes_on_unlock(self):
+        """Test that a cancelled re-key keeps its committed chunks and is finished on the next unlock."""
+        self.db.tableValues_CreateValues([(f"Site{i}", self.enc.Encrypt(f"Secret{i}!")) for i in range(5)])
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+        cancel_event = threading.Event()
+        with patch.object(ToolHelper, "CHUNK_SIZE", 2), patch.object(Encryption, "PARALLEL_MIN_BATCH", 1), \
+                patch.object(Encryption, "MAX_WORKERS", 1):
+            with self.assertRaises(OperationCancelled):
+                self.helper.RotateDataKey(ProgramSettings.DEFAULT_CRYPT_KEY,
+                                          progress=lambda done, total: cancel_event.set(), cancel_event=cancel_event)
+            self.assertTrue(self.helper.IsRekeyPending())
+            self.assertEqual(self.db.tableValues_Count(below_key_generation=self.helper.GetKeyGeneration()), 3)
+
+            helper = ToolHelper(self.db, Encryption(self.helper.saves_encryption.key))
+            progress = MagicMock()
+            self.assertTrue(helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY, progress))
+        progress.assert_called_with(5, 5)
+        self.assertFalse(helper.IsRekeyPending())
+        self.assertEqual(helper.GetDecryptedPWList(), [(f"Site{i}", f"Secret{i}!") for i in range(5)])
+
+    def test_rekey_with_worker_processes(self):
+        """Test that large re-keys are re-encrypted in worker processes and written by the caller."""
+        self.db.tableValues_CreateValues([(f"Site{i}", self.enc.Encrypt(f"Secret{i}!")) for i in range(7)])
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+        progress = MagicMock()
+        with patch.object(ToolHelper, "CHUNK_SIZE", 2), patch.object(ProgramSettings, "RECRYPT_PROCESSES", 2), \
+                patch.object(ProgramSettings, "RECRYPT_PROCESS_MIN_VALUES", 1):
+            self.assertTrue(self.helper.RotateDataKey(ProgramSettings.DEFAULT_CRYPT_KEY, progress))
+        progress.assert_called_with(7, 7)
+        self.assertEqual(progress.call_count, 4)
+        self.assertEqual(self.db.tableValues_Count(below_key_generation=self.helper.GetKeyGeneration()), 0)
+        self.assertEqual(self.helper.GetDecryptedPWList(), [(f"Site{i}", f"Secret{i}!") for i in range(7)])
+
+    def test_find_reused_passwords(self):
+        """Test that reused passwords are found by their fingerprints, also after imports and a re-key."""
+        self.assertTrue(self.helper.Unlock(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.helper.AddPassword("SiteA", "Shared123!")
+        self.helper.SetPassword("SiteB", "Unique123!")
+        self.helper.ImportPasswords([("SiteC", "Shared123!"), ("SiteD", "Unique456!")])
+        self.assertEqual(self.db.tableValues_Count(missing_fingerprint=True), 2)
+        self.assertEqual(self.helper.FindReusedPasswords(), [["SiteA", "SiteC"]])
+        self.assertEqual(self.db.tableValues_Count(missing_fingerprint=True), 0)
+
+        self.helper.SavePassword("SiteB", "Shared123!")
+        self.assertEqual(self.helper.FindReusedPasswords(), [["SiteA", "SiteB", "SiteC"]])
+        self.assertTrue(self.helper.RotateDataKey(ProgramSettings.DEFAULT_CRYPT_KEY))
+        self.assertEqual(self.helper.UpdateFingerprints(), 4)  # Fingerprints depend on the data key
+        self.assertEqual(self.helper.FindReusedPasswords(), [["SiteA", "SiteB", "SiteC"]])
+        self.assertEqual(self.helper.FindSimilarPasswords(), [["SiteA", "SiteB", "SiteC"]])
+
+        self.helper.ImportPasswords([("SiteE", "Shared123!")])  # Without fingerprint
+        with patch.object(self.enc, "DecryptMany", wraps=self.enc.DecryptMany) as decrypt_many:
+            self.assertEqual(len(list(self.helper.IterDecryptedPWList(save_fingerprints=True))), 5)
+            self.assertEqual(self.helper.FindReusedPasswords(), [["SiteA", "SiteB", "SiteC", "SiteE"]])
+        self.assertEqual(decrypt_many.call_count, 1)  # The reuse check used the fingerprints saved on the way
+
+    def test_lazy_decryption_with_cache(self):
+        """Test that passwords are decrypted on demand and changes are not hidden by the cache."""
+        self.assertTrue(self.helper.AddPassword("SiteA", "MySecret123!"))
+        self.assertFalse(self.helper.AddPassword("SiteA", "Other123!"))  # Name already exists
+        self.assertEqual(self.helper.GetNames(), ["SiteA"])
+        self.assertIsNone(self.helper.plaintext_cache.Get("SiteA"))
+
+        self.assertEqual(self.helper.GetDecryptedPassword("SiteA"), "MySecret123!")
+        self.assertEqual(self.helper.plaintext_cache.Get("SiteA"), "MySecret123!")
+        self.assertTrue(self.helper.SavePassword("SiteA", "Changed123!"))
+        self.assertEqual(self.helper.GetDecryptedPassword("SiteA"), "Changed123!")
+        self.assertTrue(self.helper.DeletePassword("SiteA"))
+        self.assertIsNone(self.helper.GetDecryptedPassword("SiteA"))
+
+
+class TestPlaintextCache(unittest.TestCase):
+    """Tests for the LRU / TTL cache of decrypted passwords."""
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when the cache is full."""
+        cache = PlaintextCache(max_size=2, ttl_seconds=60)
+        cache.Put("A", "1")
+        cache.Put("B", "2")
+        cache.Get("A")
+        cache.Put("C", "3")
+        self.assertEqual(cache.Get("A"), "1")
+        self.assertIsNone(cache.Get("B"))
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiry(self):
+        """Entries expire after the TTL."""
+        cache = PlaintextCache(max_size=2, ttl_seconds=60)
+        with patch("time.monotonic", return_value=1000.0):
+            cache.Put("A", "1")
+        with patch("time.monotonic", return_value=1059.0):
+            self.assertEqual(cache.Get("A"), "1")
+        with patch("time.monotonic", return_value=1060.0):
+            self.assertIsNone(cache.Get("A"))
+
+
+class TestNameIndex(unittest.TestCase):
+    """Tests for the sorted name index of the password list."""
+
+    def test_sorted_updates(self):
+        """Test that added and removed names keep the case-insensitive order."""
+        index = NameIndex(["github", "Amazon", "zoom"])
+        self.assertEqual(index.Add("Bank"), 1)
+        self.assertEqual(list(index), ["Amazon", "Bank", "github", "zoom"])
+        self.assertEqual(index.Remove("github"), 2)
+        self.assertIsNone(index.Remove("github"))
+        self.assertNotIn("github", index)
+        self.assertEqual(list(index), ["Amazon", "Bank", "zoom"])
+
+    def test_find(self):
+        """Test prefix and substring search, also while the query grows."""
+        index = NameIndex(["mail.example.com", "Example", "shop", "examples.org", "bank"])
+        self.assertEqual(index.FindPrefix("EXAM"), ["Example", "examples.org"])
+        self.assertEqual(index.Find("ex"), ["Example", "examples.org", "mail.example.com"])
+        self.assertEqual(index.Find("exam"), ["Example", "examples.org", "mail.example.com"])
+        self.assertEqual(index.Find("example.c"), ["mail.example.com"])
+        index.Add("Example.com")
+        self.assertEqual(index.Find("example.c"), ["Example.com", "mail.example.com"])
+        self.assertEqual(index.Find("s"), ["shop", "examples.org"])
+        self.assertEqual(len(index.Find("")), 6)
+
 
 class TestGUILogicMocked(unittest.TestCase):
     """Tests parts of the GUI logic using mocks to simulate messagebox behavior."""
@@ -165,7 +991,7 @@ class TestGUILogicMocked(unittest.TestCase):
         db.connection.commit()
 
         helper = ToolHelper(db, enc)
-        self.assertTrue(helper.UpdateUserPassword("Abcd1234!"))
+        self.assertTrue(helper.UpdateUserPassword(ProgramSettings.DEFAULT_CRYPT_KEY, "Abcd1234!"))
 
 
 # Run all tests